@@ -0,0 +1,171 @@
+"""
+Поиск коворкингов со свободными местами на интервал: прежний запрос с LEFT JOIN
+к местам и бронированиям с DISTINCT и подсчет свободных мест через NOT EXISTS
+с группировкой по типу места в CoworkingRepository.
+
+Бронирования генерируются детерминированно (setseed) на 20 коворкингов по 50 мест,
+10% из них отменены. Интервал поиска берется в середине периода бронирований.
+
+Запуск из корня репозитория на базе с примененными миграциями:
+
+    PYTHONPATH=src python benchmarks/coworking_availability.py --reservations 10000 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, time as dt_time, timedelta
+from typing import Awaitable, Callable, List, Tuple
+
+import peewee
+from peewee_async import Manager
+
+from common.dto.input_params import TimestampInterval
+from infrastructure.database import (
+    Coworking,
+    CoworkingSeat,
+    Reservation,
+    User,
+    WorkingSchedule
+)
+from infrastructure.database.db import database
+from infrastructure.database.enum import BookingStatus, PlaceType
+from storage.coworking import CoworkingRepository
+from storage.routing_manager import RoutingManager
+
+COWORKINGS = 20
+TABLES = 40
+MEETING_ROOMS = 10
+SEATS = COWORKINGS * (TABLES + MEETING_ROOMS)
+# Бронирование длится от 30 до 75 минут и начинается в первые 45 минут своего двухчасового
+# слота, поэтому бронирования одного места не пересекаются
+SLOT = timedelta(hours=2)
+START = datetime(2030, 1, 7)
+
+SEED_RESERVATIONS = """
+INSERT INTO seats_reservations (user_id, seat_id, session_start, session_end, status, created_at)
+SELECT %s, seat.id, slot.start, slot.start + (30 + floor(random() * 46)) * INTERVAL '1 minute',
+       CASE WHEN random() < 0.1 THEN 'cancelled' ELSE 'confirmed' END, now()
+FROM coworking_seats seat
+CROSS JOIN LATERAL (
+    SELECT %s::timestamp + k * INTERVAL '2 hours' + floor(random() * 46) * INTERVAL '1 minute'
+           AS start
+    FROM generate_series(0, %s - 1) AS k
+) AS slot
+WHERE seat.coworking_id = ANY(%s)
+"""
+
+
+async def seed(objects: Manager, reservations: int) -> Tuple[User, List[Coworking]]:
+    user: User = await objects.create(
+        User, email='availability@benchmark', hashed_password='benchmark',
+        last_name='benchmark', first_name='benchmark', is_student=True,
+    )
+    coworkings = [
+        await objects.create(
+            Coworking, title='benchmark', institute='benchmark',
+            description='benchmark', address='benchmark',
+        )
+        for _ in range(COWORKINGS)
+    ]
+    for coworking in coworkings:
+        await objects.execute(CoworkingSeat.insert_many(
+            [{'coworking': coworking, 'place_type': PlaceType.TABLE, 'seats_count': 1}] * TABLES +
+            [{'coworking': coworking, 'place_type': PlaceType.MEETING_ROOM, 'seats_count': 8}] *
+            MEETING_ROOMS
+        ))
+        await objects.execute(WorkingSchedule.insert_many([
+            {
+                'coworking': coworking, 'week_day': week_day,
+                'start_time': dt_time(0), 'end_time': dt_time(23, 59)
+            }
+            for week_day in range(7)
+        ]))
+    with objects.allow_sync():
+        database.execute_sql('SELECT setseed(0.42)')
+        database.execute_sql(SEED_RESERVATIONS, (
+            user.id, START, reservations // SEATS, [coworking.id for coworking in coworkings]
+        ))
+        database.execute_sql('ANALYZE seats_reservations')
+    return user, coworkings
+
+
+async def cleanup(objects: Manager, user: User, coworkings: List[Coworking]) -> None:
+    await objects.execute(Reservation.delete().where(Reservation.user == user))
+    for coworking in coworkings:
+        for model in (CoworkingSeat, WorkingSchedule):
+            await objects.execute(model.delete().where(model.coworking == coworking))
+        await objects.delete(coworking)
+    await objects.delete(user)
+
+
+async def filter_with_left_joins(objects: Manager, interval: TimestampInterval) -> int:
+    """Запрос, использовавшийся до подсчета свободных мест"""
+    query = (
+        Coworking.select().distinct()
+        .join(WorkingSchedule, peewee.JOIN.LEFT_OUTER)
+        .where(
+            (WorkingSchedule.id.is_null()) |
+            (
+                (WorkingSchedule.week_day == interval.start.weekday()) &
+                (WorkingSchedule.start_time <= interval.start.time()) &
+                (interval.end.time() <= WorkingSchedule.end_time)
+            )
+        )
+        .switch(Coworking)
+        .join(CoworkingSeat, peewee.JOIN.LEFT_OUTER)
+        .join(Reservation, peewee.JOIN.LEFT_OUTER)
+        .where(
+            (Reservation.id.is_null()) |
+            (Reservation.status == BookingStatus.CANCELLED) |
+            (Reservation.session_end <= interval.start) |
+            (Reservation.session_start >= interval.end)
+        )
+    )
+    return len(await objects.execute(query))
+
+
+async def count_free(repository: CoworkingRepository, interval: TimestampInterval) -> int:
+    return len(await repository.select_filter_by_timestamp_range(interval))
+
+
+async def measure(search: Callable[[], Awaitable[int]], repeats: int) -> Tuple[int, float]:
+    found, timings = 0, []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        found = await search()
+        timings.append(time.perf_counter() - started)
+    return found, statistics.median(timings) * 1000
+
+
+async def main(reservation_counts: List[int], repeats: int) -> None:
+    manager = RoutingManager(database)
+    repository = CoworkingRepository(manager)
+    print(f"{'reservations':>12} | {'left join found':>15} | {'left join ms':>12} | "
+          f"{'not exists found':>16} | {'not exists ms':>13}")
+    for reservations in reservation_counts:
+        user, coworkings = await seed(manager, reservations)
+        middle = START + (reservations // SEATS // 2) * SLOT
+        interval = TimestampInterval.model_validate({
+            'from': middle + timedelta(minutes=30), 'to': middle + timedelta(minutes=90)
+        })
+        try:
+            old_found, old_ms = await measure(
+                lambda: filter_with_left_joins(manager, interval), repeats
+            )
+            new_found, new_ms = await measure(
+                lambda: count_free(repository, interval), repeats
+            )
+        finally:
+            await cleanup(manager, user, coworkings)
+        print(f"{reservations:>12} | {old_found:>15} | {old_ms:>12.2f} | "
+              f"{new_found:>16} | {new_ms:>13.2f}")
+    await manager.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reservations', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.reservations, args.repeats))
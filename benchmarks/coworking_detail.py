@@ -0,0 +1,136 @@
+"""
+Сравнение загрузки детальной информации о коворкинге соединением пяти таблиц
+и отдельными запросами на каждую связь.
+
+Запуск из корня репозитория на базе с созданной схемой:
+
+    PYTHONPATH=src python benchmarks/coworking_detail.py --seats 10 50 200 1000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, List, Tuple
+
+import peewee
+from peewee_async import Manager
+
+from infrastructure.database import (
+    Coworking,
+    CoworkingSeat,
+    WorkingSchedule,
+    CoworkingImages,
+    CoworkingEvent,
+    TechCapability
+)
+from infrastructure.database.db import database
+from infrastructure.database.enum import PlaceType
+from storage.coworking import CoworkingRepository
+from storage.routing_manager import RoutingManager
+
+SCHEDULES = 7
+IMAGES = 10
+EVENTS = 5
+CAPABILITIES = 5
+
+
+async def create_coworking(objects: Manager, seats: int) -> Coworking:
+    coworking: Coworking = await objects.create(
+        Coworking, title="benchmark", institute="benchmark",
+        description="benchmark", address="benchmark",
+    )
+    await objects.execute(CoworkingSeat.insert_many([
+        {'coworking': coworking, 'place_type': PlaceType.TABLE, 'seats_count': 1}
+        for _ in range(seats)
+    ]))
+    await objects.execute(WorkingSchedule.insert_many([
+        {
+            'coworking': coworking, 'week_day': week_day,
+            'start_time': datetime(2024, 1, 1, 9).time(),
+            'end_time': datetime(2024, 1, 1, 21).time()
+        }
+        for week_day in range(SCHEDULES)
+    ]))
+    await objects.execute(CoworkingImages.insert_many([
+        {'coworking': coworking, 'image_filename': f'{i}.png'} for i in range(IMAGES)
+    ]))
+    await objects.execute(CoworkingEvent.insert_many([
+        {'coworking': coworking, 'date': date.today() + timedelta(days=i + 1), 'name': 'event'}
+        for i in range(EVENTS)
+    ]))
+    await objects.execute(TechCapability.insert_many([
+        {'coworking': coworking, 'capability': f'capability {i}'} for i in range(CAPABILITIES)
+    ]))
+    return coworking
+
+
+async def delete_coworking(objects: Manager, coworking: Coworking) -> None:
+    for model in (CoworkingSeat, WorkingSchedule, CoworkingImages, CoworkingEvent, TechCapability):
+        await objects.execute(model.delete().where(model.coworking == coworking))
+    await objects.delete(coworking)
+
+
+async def load_with_join(objects: Manager, coworking_id: str) -> int:
+    """Запрос, использовавшийся до перехода на загрузку по связям"""
+    query = (
+        Coworking.select(
+            Coworking, CoworkingSeat, WorkingSchedule, CoworkingImages, CoworkingEvent,
+            TechCapability
+        )
+        .where(Coworking.id == coworking_id)
+        .join(CoworkingSeat, peewee.JOIN.LEFT_OUTER)
+        .switch(Coworking).join(WorkingSchedule, peewee.JOIN.LEFT_OUTER)
+        .switch(Coworking).join(CoworkingImages, peewee.JOIN.LEFT_OUTER)
+        .switch(Coworking).join(CoworkingEvent, peewee.JOIN.LEFT_OUTER)
+        .where((CoworkingEvent.id.is_null()) | (date.today() <= CoworkingEvent.date))
+        .switch(Coworking).join(TechCapability, peewee.JOIN.LEFT_OUTER)
+        .tuples()
+    )
+    return len(await objects.execute(query))
+
+
+async def load_by_relations(repository: CoworkingRepository, coworking_id: str) -> int:
+    coworking = await repository.get_coworking_by_id(coworking_id)
+    return 1 + sum(len(relation) for relation in (
+        coworking.seats, coworking.working_schedules, coworking.images, coworking.events,
+        coworking.technical_capabilities
+    ))
+
+
+async def measure(load: Callable[[], Awaitable[int]], repeats: int) -> Tuple[int, float]:
+    rows, timings = 0, []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = await load()
+        timings.append(time.perf_counter() - started)
+    return rows, statistics.median(timings) * 1000
+
+
+async def main(seat_counts: List[int], repeats: int) -> None:
+    manager = RoutingManager(database)
+    repository = CoworkingRepository(manager)
+    print(f"{'seats':>6} | {'join rows':>10} | {'join ms':>9} | {'loader rows':>11} | "
+          f"{'loader ms':>9}")
+    for seats in seat_counts:
+        coworking = await create_coworking(manager, seats)
+        try:
+            join_rows, join_ms = await measure(
+                lambda: load_with_join(manager, coworking.id), repeats
+            )
+            loader_rows, loader_ms = await measure(
+                lambda: load_by_relations(repository, coworking.id), repeats
+            )
+        finally:
+            await delete_coworking(manager, coworking)
+        print(f"{seats:>6} | {join_rows:>10} | {join_ms:>9.2f} | {loader_rows:>11} | "
+              f"{loader_ms:>9.2f}")
+    await manager.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seats', type=int, nargs='+', default=[10, 50, 200, 1000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.seats, args.repeats))
@@ -0,0 +1,83 @@
+"""
+Пропускная способность GET /api/v1/image/{filename} с клиентом S3 на каждый запрос
+(как было раньше) и с одним долгоживущим клиентом S3Repository.
+
+Нужен доступный S3-совместимый сервер (MinIO, moto_server) и переменные окружения
+ObjectStorageSettings. Бакет создается, если его нет. Запуск из корня репозитория:
+
+    PYTHONPATH=src python benchmarks/image_get_throughput.py --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import io
+import os
+import time
+from typing import AsyncGenerator
+
+import httpx
+from fastapi import FastAPI, UploadFile
+
+from controllers.rest import ImageRouter
+from infrastructure.config import ObjectStorageSettings
+from storage.s3_repository import S3Repository, CHUNK_SIZE
+
+
+class PerRequestClientS3Repository(S3Repository):
+    """Открывает нового клиента на каждое чтение файла"""
+
+    async def get_file_stream(self, filename: str) -> AsyncGenerator[bytes, None]:
+        async with self.session.client(self.service_name, endpoint_url=self.endpoint) as client:
+            response = await client.get_object(Bucket=self.bucket, Key=filename)
+            while bytes_data := await response['Body'].read(CHUNK_SIZE):
+                yield bytes_data
+
+
+async def measure(
+        repository: S3Repository,
+        filename: str,
+        requests: int,
+        concurrency: int
+) -> float:
+    app = FastAPI()
+    app.include_router(ImageRouter(None, repository).build_api_router())
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        async def get() -> None:
+            async with semaphore:
+                response = await client.get(f'/api/v1/image/{filename}')
+                assert response.status_code == 200 and response.content
+
+        started = time.perf_counter()
+        await asyncio.gather(*(get() for _ in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int, size: int) -> None:
+    settings = ObjectStorageSettings()
+    repository = S3Repository(settings)
+    await repository.start()
+    try:
+        buckets = await repository.client.list_buckets()
+        if settings.BUCKET_NAME not in [bucket['Name'] for bucket in buckets['Buckets']]:
+            await repository.client.create_bucket(Bucket=settings.BUCKET_NAME)
+        filename = await repository.upload_file(
+            UploadFile(io.BytesIO(os.urandom(size)), filename='benchmark.png')
+        )
+        per_request = PerRequestClientS3Repository(settings)
+        print(f"{'client':<12} | {'requests/s':>10}")
+        for label, client in [('per request', per_request), ('pooled', repository)]:
+            throughput = await measure(client, filename, requests, concurrency)
+            print(f"{label:<12} | {throughput:>10.1f}")
+        await repository.delete_file(filename)
+    finally:
+        await repository.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--size', type=int, default=64 * 1024, help='Image size in bytes')
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.size))
@@ -0,0 +1,81 @@
+"""
+Пропускная способность проверки паролей при параллельных входах и задержка event loop.
+
+Сравниваются синхронная проверка внутри корутины (как было до переноса в пул),
+пул потоков и пул процессов. Параллельно работает тикер, измеряющий, насколько
+event loop опаздывает с обработкой других задач.
+
+Запуск из корня репозитория:
+
+    PYTHONPATH=src python benchmarks/login_throughput.py --logins 200 --workers 4
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from common.hasher import Hasher
+
+TICK = 0.005
+
+
+class BlockingHasher:
+    """Проверка пароля прямо в event loop"""
+
+    def __init__(self):
+        self.context = CryptContext(schemes=['sha512_crypt'])
+
+    async def validate_plain(self, password: str, hashed_password: str) -> bool:
+        return self.context.verify(password, hashed_password)
+
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - started - TICK)
+    return worst
+
+
+async def run(label: str, hasher, logins: int, hashed_password: str) -> None:
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_lag(stop))
+    await asyncio.sleep(TICK)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        hasher.validate_plain('Password1!', hashed_password) for _ in range(logins)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await ticker
+    assert all(results)
+    print(f"{label:<8} | {logins / elapsed:>10.1f} | {worst_lag * 1000:>12.1f}")
+
+
+async def main(logins: int, workers: int, concurrency: int) -> None:
+    hashed_password = await Hasher().get_hash('Password1!')
+    print(f"{'executor':<8} | {'logins/s':>10} | {'max lag, ms':>12}")
+    await run('inline', BlockingHasher(), logins, hashed_password)
+    for label, executor in [
+        ('thread', ThreadPoolExecutor(max_workers=workers)),
+        ('process', ProcessPoolExecutor(max_workers=workers)),
+    ]:
+        hasher = Hasher(executor, concurrency)
+        # Прогрев пула, чтобы не учитывать запуск процессов
+        await asyncio.gather(*(
+            hasher.validate_plain('Password1!', hashed_password) for _ in range(workers)
+        ))
+        await run(label, hasher, logins, hashed_password)
+        hasher.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.workers, args.concurrency))
@@ -0,0 +1,79 @@
+"""
+Регистрация мест коворкинга: вставка по одной строке в транзакции (прежняя реализация
+create_places) и многострочный INSERT ... RETURNING пачками в CoworkingRepository.
+
+Запуск из корня репозитория на базе с примененными миграциями:
+
+    PYTHONPATH=src python benchmarks/seat_registration.py --seats 10 100 1000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from peewee_async import Manager
+
+from infrastructure.database import Coworking, CoworkingSeat
+from infrastructure.database.db import database
+from infrastructure.database.enum import PlaceType
+from storage.coworking import CoworkingRepository
+from storage.routing_manager import RoutingManager
+
+
+async def create_per_row(objects: Manager, coworking: Coworking, seats: int) -> List:
+    result = []
+    async with objects.transaction():
+        for _ in range(seats):
+            result.append(await objects.create(
+                CoworkingSeat, coworking=coworking, label=None, description=None,
+                place_type=PlaceType.TABLE, seats_count=1,
+            ))
+    return result
+
+
+async def measure(
+        objects: Manager,
+        coworking: Coworking,
+        create: Callable[[], Awaitable[List]],
+        repeats: int
+) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await create()
+        timings.append(time.perf_counter() - started)
+        await objects.execute(CoworkingSeat.delete().where(CoworkingSeat.coworking == coworking))
+    return statistics.median(timings) * 1000
+
+
+async def main(seat_counts: List[int], repeats: int) -> None:
+    manager = RoutingManager(database)
+    repository = CoworkingRepository(manager)
+    coworking: Coworking = await manager.create(
+        Coworking, title="benchmark", institute="benchmark",
+        description="benchmark", address="benchmark",
+    )
+    print(f"{'seats':>6} | {'per row ms':>10} | {'bulk ms':>8} | {'speedup':>7}")
+    try:
+        for seats in seat_counts:
+            per_row_ms = await measure(
+                manager, coworking, lambda: create_per_row(manager, coworking, seats), repeats
+            )
+            bulk_ms = await measure(
+                manager, coworking, lambda: repository.create_places(coworking, seats, []),
+                repeats
+            )
+            print(f"{seats:>6} | {per_row_ms:>10.2f} | {bulk_ms:>8.2f} | "
+                  f"{per_row_ms / bulk_ms:>6.1f}x")
+    finally:
+        await manager.delete(coworking)
+        await manager.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seats', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.seats, args.repeats))
@@ -0,0 +1,72 @@
+"""
+Стоимость рендеринга письма для сброса пароля и время компиляции шаблонов при запуске.
+
+Сравнивается прежний путь (get_template + render_async на каждую отправку) и рендеринг
+заранее скомпилированного шаблона из TemplateRegistry. Отдельно измеряется запуск
+реестра без кэша байткода и с прогретым кэшем.
+
+Запуск из корня репозитория:
+
+    PYTHONPATH=src python benchmarks/template_render.py --renders 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import jinja2
+
+from common.template_registry import TemplateRegistry
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates')
+TEMPLATE = 'password_reset_message.html'
+LINK = 'http://localhost:3000/password-recovery?token=token&email=name.surname@urfu.ru'
+
+
+async def render_per_send(renders: int) -> float:
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATES_DIR), enable_async=True)
+    started = time.perf_counter()
+    for _ in range(renders):
+        await env.get_template(TEMPLATE).render_async(link=LINK)
+    return time.perf_counter() - started
+
+
+def render_precompiled(renders: int) -> float:
+    template = TemplateRegistry(TEMPLATES_DIR).get(TEMPLATE)
+    started = time.perf_counter()
+    for _ in range(renders):
+        template.render(link=LINK)
+    return time.perf_counter() - started
+
+
+def startup(bytecode_cache_dir: str = None) -> float:
+    started = time.perf_counter()
+    TemplateRegistry(TEMPLATES_DIR, bytecode_cache_dir)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--renders', type=int, default=2000)
+    args = parser.parse_args()
+
+    per_send = asyncio.run(render_per_send(args.renders))
+    precompiled = render_precompiled(args.renders)
+    print(f'{"mode":<28}{"total, ms":>12}{"per render, us":>18}')
+    for label, elapsed in (('get_template + render_async', per_send),
+                           ('precompiled render', precompiled)):
+        print(f'{label:<28}{elapsed * 1000:>12.1f}{elapsed / args.renders * 1e6:>18.1f}')
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = startup()
+        startup(cache_dir)
+        warm = startup(cache_dir)
+    print()
+    print(f'{"startup":<28}{"ms":>12}')
+    print(f'{"no bytecode cache":<28}{cold * 1000:>12.2f}')
+    print(f'{"warm bytecode cache":<28}{warm * 1000:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
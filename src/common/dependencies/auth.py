@@ -15,9 +15,9 @@ class AuthRequired:
             return None
         if not (payload := self.token_service.get_token_payload(access_token)):
             return None
-        if not (email := payload.get('email', None)):
+        if not (user_id := payload.get('id', None)):
             return None
-        user: Optional[User] = await self.user_repository.get(User.email == email)
+        user: Optional[User] = await self.user_repository.get_by_id(user_id)
         if not user:
             return None
         return user
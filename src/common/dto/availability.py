@@ -0,0 +1,18 @@
+from typing import Dict, List
+
+from pydantic import BaseModel, NaiveDatetime
+
+from infrastructure.database.enum import PlaceType
+from .coworking import CoworkingResponseDTO
+
+
+class AvailabilityGridDTO(BaseModel):
+    coworking_id: str
+    slot_minutes: int
+    slots: List[NaiveDatetime]
+    is_open: List[bool]
+    free: Dict[PlaceType, List[int]]
+
+
+class AvailableCoworkingDTO(CoworkingResponseDTO):
+    free: Dict[PlaceType, int]
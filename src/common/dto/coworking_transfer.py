@@ -0,0 +1,28 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from .coworking import CoworkingCreateDTO
+from .coworking_event import CoworkingEventSchema
+from .coworking_seat import CreateSeatDTO
+from .schedule import ScheduleCreateDTO
+from .tech_capability import TechCapabilitySchema
+
+
+class CoworkingDocument(CoworkingCreateDTO):
+    """Коворкинг со связанными сущностями, одна строка документа импорта и экспорта"""
+    table_places: int = Field(0, ge=0)
+    meeting_rooms: List[CreateSeatDTO] = []
+    working_schedules: List[ScheduleCreateDTO] = []
+    events: List[CoworkingEventSchema] = []
+    technical_capabilities: List[TechCapabilitySchema] = []
+
+
+class ImportErrorDTO(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResultDTO(BaseModel):
+    coworking_ids: List[str] = []
+    errors: List[ImportErrorDTO] = []
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class EmailMessageDTO(BaseModel):
+    to: str
+    subject: str
+    html: str
+    attempts: int = 0
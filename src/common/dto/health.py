@@ -0,0 +1,21 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class DatabasePoolStatsDTO(BaseModel):
+    min_size: int
+    max_size: int
+    size: int
+    free: int
+    used: int
+    acquired: int
+    waited: int
+    timeouts: int
+    acquire_seconds_avg: float
+    acquire_seconds_max: float
+
+
+class HealthDTO(BaseModel):
+    healthy: bool
+    checks: Dict[str, bool]
@@ -1,7 +1,10 @@
-from typing import Optional
+import datetime
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, model_validator, NaiveDatetime
 
+MAX_GRID_DAYS = 7
+
 
 class TimestampInterval(BaseModel):
     start: NaiveDatetime = Field(..., validation_alias="from")
@@ -23,3 +26,23 @@ class TimestampInterval(BaseModel):
 class SearchParams(BaseModel):
     title: Optional[str] = None
     institute: Optional[str] = None
+
+
+class RankedSearchParams(BaseModel):
+    query: str = Field(..., min_length=1, max_length=128)
+    limit: int = Field(20, ge=1, le=100)
+    offset: int = Field(0, ge=0)
+
+
+class AvailabilityGridParams(BaseModel):
+    date_from: datetime.date
+    date_to: datetime.date
+    slot_minutes: Literal[15, 30] = 30
+
+    @model_validator(mode="after")
+    def validate_dates(self):
+        if self.date_to < self.date_from:
+            raise ValueError("'date_to' can't be less than 'date_from'")
+        if (self.date_to - self.date_from).days >= MAX_GRID_DAYS:
+            raise ValueError(f"Range must not be longer than {MAX_GRID_DAYS} days")
+        return self
@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class CoworkingNonBusinessDayException(Exception):
     """Exception when there is attempt to create booking at not working date"""
 
@@ -8,3 +11,35 @@ class NotAllowedReservationTimeException(Exception):
 
 class CoworkingNotExistsException(Exception):
     """Not exist coworking exception"""
+
+
+class UserReservationConflictException(Exception):
+    """Exception when user already has a reservation intersecting requested time"""
+
+
+class RangeNotSatisfiableException(Exception):
+    """Exception when requested byte range lies outside of the file"""
+
+    def __init__(self, size: Optional[int] = None):
+        super().__init__(size)
+        self.size = size
+
+
+class ImageProcessingException(Exception):
+    """Exception when uploaded file can not be decoded as an image"""
+
+
+class InvalidImageSignatureException(Exception):
+    """Exception when uploaded file signature does not match its image content type"""
+
+
+class InvalidMultipartException(Exception):
+    """Exception when request body is not a multipart form with expected file field"""
+
+
+class UploadTooLargeException(Exception):
+    """Exception when uploaded file exceeds maximum allowed size"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self.max_bytes = max_bytes
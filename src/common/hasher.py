@@ -1,13 +1,50 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Optional, TypeVar
+
 from passlib.context import CryptContext
 
+T = TypeVar('T')
+
+# Контекст на уровне модуля, чтобы функции хэширования можно было передать в пул процессов
+_context = CryptContext(schemes=['sha512_crypt'])
+
+
+def _hash(char_sequence: str) -> str:
+    return _context.hash(char_sequence)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return _context.verify(password, hashed_password)
+
 
 class Hasher:
-    def __init__(self):
-        self.__schemes = ['sha512_crypt']
-        self.context = CryptContext(schemes=self.__schemes)
+    """
+    Хэширование паролей вне event loop.
+    sha512_crypt занимает десятки миллисекунд процессорного времени, поэтому вычисления
+    выполняются в пуле потоков или процессов, а число одновременно ожидающих вызовов
+    ограничено семафором
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: int = 16):
+        """
+        :param executor: Пул для вычислений, по умолчанию используется пул потоков event loop
+        :param max_concurrency: Максимальное число одновременных вычислений хэша
+        """
+        self.__executor = executor
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_hash(self, char_sequence: str) -> str:
+        return await self.__run(_hash, char_sequence)
+
+    async def validate_plain(self, password: str, hashed_password: str) -> bool:
+        return await self.__run(_verify, password, hashed_password)
 
-    def get_hash(self, char_sequence: str) -> str:
-        return self.context.hash(char_sequence)
+    def close(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
 
-    def validate_plain(self, password: str, hashed_password: str) -> bool:
-        return self.context.verify(password, hashed_password)
+    async def __run(self, func: Callable[..., T], *args) -> T:
+        async with self.__semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__executor, func, *args)
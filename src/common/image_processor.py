@@ -0,0 +1,134 @@
+import asyncio
+import io
+import os
+from concurrent.futures import Executor
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from common.exceptions.application import ImageProcessingException
+
+WEBP = 'webp'
+
+
+class ImageSize(str, Enum):
+    THUMBNAIL = 'thumbnail'
+    CARD = 'card'
+    FULL = 'full'
+
+
+# Изображение вписывается в квадрат, увеличение исходника не выполняется
+VARIANT_BOUNDS: Dict[ImageSize, int] = {
+    ImageSize.THUMBNAIL: 160,
+    ImageSize.CARD: 480,
+    ImageSize.FULL: 1600,
+}
+
+_PIL_FORMATS = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', WEBP: 'WEBP'}
+_SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 80, 'method': 4},
+}
+
+
+def parse_image_size(value: Optional[str]) -> Optional[ImageSize]:
+    """
+    :return: Размер варианта или None, если значение не задано или неизвестно
+    """
+    try:
+        return ImageSize(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def variant_filename(filename: str, size: ImageSize, image_format: Optional[str] = None) -> str:
+    """
+    :param image_format: Расширение варианта, по умолчанию совпадает с исходным файлом
+    :return: Имя варианта изображения в хранилище, например <name>_card.webp
+    """
+    stem, extension = os.path.splitext(filename)
+    extension = f'.{image_format}' if image_format else extension
+    return f'{stem}_{size.value}{extension}'
+
+
+def variant_filenames(filename: str) -> List[str]:
+    """:return: Имена всех вариантов изображения"""
+    return [
+        variant_filename(filename, size, image_format)
+        for size in ImageSize
+        for image_format in (None, WEBP)
+    ]
+
+
+def _encode(image: Image.Image, pil_format: str) -> bytes:
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **_SAVE_OPTIONS[pil_format])
+    return buffer.getvalue()
+
+
+def _render_variants(
+        path: str,
+        source_format: str
+) -> List[Tuple[ImageSize, Optional[str], bytes]]:
+    """
+    Строит уменьшенные копии изображения в исходном формате и в WebP.
+    Функция на уровне модуля, чтобы ее можно было передать в пул процессов
+    """
+    try:
+        with Image.open(path) as source:
+            source.load()
+            image = ImageOps.exif_transpose(source)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ImageProcessingException(str(exc)) from exc
+    variants = []
+    for size, bound in VARIANT_BOUNDS.items():
+        resized = image.copy()
+        resized.thumbnail((bound, bound), Image.Resampling.LANCZOS)
+        variants.append((size, None, _encode(resized, _PIL_FORMATS[source_format])))
+        variants.append((size, WEBP, _encode(resized, 'WEBP')))
+    return variants
+
+
+class ImageProcessor:
+    """
+    Генерация вариантов изображений разного размера вне event loop.
+    Декодирование и масштабирование занимают процессорное время, поэтому выполняются
+    в пуле потоков или процессов, а число одновременных задач ограничено семафором
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: int = 4):
+        """
+        :param executor: Пул для вычислений, по умолчанию используется пул потоков event loop
+        :param max_concurrency: Максимальное число одновременно обрабатываемых изображений
+        """
+        self.__executor = executor
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def render_variants(
+            self,
+            path: str,
+            source_format: str
+    ) -> List[Tuple[ImageSize, Optional[str], bytes]]:
+        """
+        :param path: Путь к исходному файлу. Файл читается в пуле, а не передается в него
+        :param source_format: Формат исходного файла по его сигнатуре: jpg, jpeg или png.
+            Имя файла в хранилище может иметь любое расширение
+        :return: Кортежи (размер, формат варианта или None для исходного формата, содержимое)
+        :raises ImageProcessingException: Файл не удалось декодировать
+        """
+        source_format = source_format.lower()
+        if source_format not in _PIL_FORMATS:
+            raise ImageProcessingException(f"Unsupported image format {source_format}")
+        async with self.__semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.__executor, _render_variants, path, source_format
+            )
+
+    def close(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
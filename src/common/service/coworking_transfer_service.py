@@ -0,0 +1,151 @@
+import logging
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
+
+import peewee
+from pydantic import ValidationError
+
+from common.dto.coworking_event import CoworkingEventSchema
+from common.dto.coworking_seat import CreateSeatDTO
+from common.dto.coworking_transfer import CoworkingDocument, ImportErrorDTO, ImportResultDTO
+from common.dto.schedule import ScheduleCreateDTO
+from common.dto.tech_capability import TechCapabilitySchema
+from infrastructure.database import Coworking
+from infrastructure.database.enum import PlaceType
+from storage.coworking import AbstractCoworkingRepository
+
+logger = logging.getLogger(__name__)
+
+# Номер строки и ее содержимое, None для строки длиннее допустимой
+Line = Tuple[int, Optional[bytes]]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[Line]:
+    """
+    Разбивает поток на строки, не накапливая в памяти больше одной строки сверх чанка.
+    Пустые строки пропускаются, нумерация строк документа при этом сохраняется
+    """
+    buffer, line_number, overflow = b'', 0, False
+    async for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split(b'\n')
+        for line in lines:
+            line_number += 1
+            if overflow or len(line) > max_line_bytes:
+                overflow = False
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+        if len(buffer) > max_line_bytes:
+            # Остаток строки до перевода строки отбрасывается
+            buffer, overflow = b'', True
+    if overflow or buffer.strip():
+        line_number += 1
+        yield line_number, None if overflow else buffer
+
+
+class CoworkingTransferService:
+    """
+    Импорт и экспорт коворкингов документом JSON Lines, по одному CoworkingDocument в строке.
+    Строки проверяются пачками по chunk_size, каждый коворкинг загружается в своей транзакции.
+    Ошибочная строка не прерывает импорт и возвращается в результате с номером строки
+    """
+
+    def __init__(
+            self,
+            coworking_repository: AbstractCoworkingRepository,
+            chunk_size: int = 100,
+            max_line_bytes: int = 1024 * 1024,
+            export_page_size: int = 100
+    ):
+        self.coworking_repository = coworking_repository
+        self.chunk_size = chunk_size
+        self.max_line_bytes = max_line_bytes
+        self.export_page_size = export_page_size
+
+    async def import_lines(self, chunks: AsyncIterable[bytes]) -> ImportResultDTO:
+        result = ImportResultDTO()
+        chunk: List[Line] = []
+        async for line in iter_lines(chunks, self.max_line_bytes):
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                await self.__import_chunk(chunk, result)
+                chunk = []
+        if chunk:
+            await self.__import_chunk(chunk, result)
+        logger.info(
+            "Imported %s coworkings, %s lines rejected",
+            len(result.coworking_ids), len(result.errors)
+        )
+        return result
+
+    async def export_lines(self) -> AsyncIterator[bytes]:
+        after_id: Optional[str] = None
+        while True:
+            coworkings = await self.coworking_repository.export_coworkings(
+                after_id, self.export_page_size
+            )
+            if not coworkings:
+                return
+            yield b''.join(
+                to_document(coworking).model_dump_json(by_alias=True).encode() + b'\n'
+                for coworking in coworkings
+            )
+            after_id = coworkings[-1].id
+
+    async def __import_chunk(self, chunk: List[Line], result: ImportResultDTO) -> None:
+        documents: List[Tuple[int, CoworkingDocument]] = []
+        for line_number, line in chunk:
+            if line is None:
+                result.errors.append(ImportErrorDTO(
+                    line=line_number, error=f"Line exceeds {self.max_line_bytes} bytes"
+                ))
+                continue
+            try:
+                documents.append((line_number, CoworkingDocument.model_validate_json(line)))
+            except ValidationError as exc:
+                result.errors.append(ImportErrorDTO(line=line_number, error=_describe(exc)))
+        for line_number, document in documents:
+            try:
+                coworking = await self.coworking_repository.import_coworking(document)
+            except peewee.DatabaseError as exc:
+                logger.info("Failed to import coworking at line %s: %s", line_number, exc)
+                result.errors.append(ImportErrorDTO(line=line_number, error=str(exc).strip()))
+                continue
+            result.coworking_ids.append(coworking.id)
+
+
+def to_document(coworking: Coworking) -> CoworkingDocument:
+    """
+    Коворкинг со связями, загруженными CoworkingRepository.export_coworkings
+    """
+    return CoworkingDocument(
+        title=coworking.title,
+        institute=coworking.institute,
+        description=coworking.description,
+        address=coworking.address,
+        table_places=sum(seat.place_type == PlaceType.TABLE for seat in coworking.seats),
+        meeting_rooms=[
+            CreateSeatDTO(
+                label=seat.label or '', description=seat.description,
+                seats_count=seat.seats_count
+            )
+            for seat in coworking.seats if seat.place_type == PlaceType.MEETING_ROOM
+        ],
+        working_schedules=[
+            ScheduleCreateDTO.model_validate(schedule, from_attributes=True)
+            for schedule in coworking.working_schedules
+        ],
+        events=[
+            CoworkingEventSchema(date=event.date, name=event.name, description=event.description)
+            for event in coworking.events
+        ],
+        technical_capabilities=[
+            TechCapabilitySchema.model_validate(capability, from_attributes=True)
+            for capability in coworking.technical_capabilities
+        ],
+    )
+
+
+def _describe(exc: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(map(str, error['loc'])) or 'line'}: {error['msg']}" for error in exc.errors()
+    )
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from common.dto.email import EmailMessageDTO
+from common.service.smtp_email_sender import SMTPEmailSender
+from storage.email_outbox import AbstractEmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxWorker:
+    """
+    Фоновая отправка писем из очереди пачками через одно SMTP соединение.
+    Соединение закрывается, когда очередь пуста. Неотправленное письмо возвращается в очередь,
+    после max_attempts попыток перемещается в dead letter поток
+    """
+
+    def __init__(
+            self,
+            outbox: AbstractEmailOutbox,
+            sender: SMTPEmailSender,
+            batch_size: int = 20,
+            max_attempts: int = 5,
+            idle_timeout: timedelta = timedelta(seconds=5),
+            retry_delay: timedelta = timedelta(seconds=10)
+    ):
+        self.outbox = outbox
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        # Имя потребителя уникально для процесса, чтобы несколько воркеров uvicorn делили очередь
+        self.consumer = f'{socket.gethostname()}-{os.getpid()}'
+        self.__task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
+        await self.sender.close()
+
+    async def process_batch(self, entries: List[Tuple[str, EmailMessageDTO]]) -> bool:
+        """
+        :return: Все ли письма пачки отправлены
+        """
+        sent, success = [], True
+        for entry_id, message in entries:
+            try:
+                await self.sender.send(message)
+            except Exception as exc:
+                success = False
+                message.attempts += 1
+                if message.attempts >= self.max_attempts:
+                    logger.error("Email to %s dropped after %s attempts: %s",
+                                 message.to, message.attempts, exc)
+                    await self.outbox.dead_letter(entry_id, message)
+                else:
+                    logger.warning("Email to %s failed (attempt %s): %s",
+                                   message.to, message.attempts, exc)
+                    await self.outbox.retry(entry_id, message)
+                continue
+            sent.append(entry_id)
+        await self.outbox.ack(*sent)
+        logger.info("Sent %s of %s emails", len(sent), len(entries))
+        return success
+
+    async def __run(self) -> None:
+        logger.info("Email outbox worker %s started", self.consumer)
+        while True:
+            try:
+                entries = await self.outbox.receive(
+                    self.consumer, self.batch_size, self.idle_timeout
+                )
+                if not entries:
+                    await self.sender.close()
+                    continue
+                if not await self.process_batch(entries):
+                    await asyncio.sleep(self.retry_delay.total_seconds())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox worker failed to process batch")
+                await asyncio.sleep(self.retry_delay.total_seconds())
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import tempfile
+from typing import AsyncIterable, AsyncIterator, BinaryIO
+
+from fastapi import Request
+
+from common.exceptions.application import InvalidImageSignatureException
+from common.image_processor import ImageProcessor, variant_filename, variant_filenames
+from common.utils.image_validators import (
+    SIGNATURE_LENGTH,
+    detect_image_media_type,
+    is_valid_image_signature
+)
+from common.utils.multipart_stream import MultipartFileStream
+from storage.s3_repository import S3Repository
+
+logger = logging.getLogger(__name__)
+
+
+class ImageUploadService:
+    """Загрузка изображения в хранилище вместе с вариантами уменьшенного размера"""
+
+    field_name = 'image'
+
+    def __init__(
+            self,
+            s3_repository: S3Repository,
+            image_processor: ImageProcessor,
+            max_bytes: int,
+            max_concurrency: int = 8
+    ):
+        """
+        :param max_bytes: Максимальный размер загружаемого изображения
+        :param max_concurrency: Максимальное число одновременных загрузок. Каждая загрузка
+            держит в памяти до одной части multipart upload S3
+        """
+        self.s3_repository = s3_repository
+        self.image_processor = image_processor
+        self.max_bytes = max_bytes
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def upload(self, request: Request) -> str:
+        """
+        Передает файл из поля image тела запроса в хранилище по мере получения,
+        без сохранения во временный файл. Сигнатура проверяется по первым байтам,
+        до начала загрузки. Полученные части копируются во временный файл на диске,
+        из которого затем строятся варианты. Недекодируемое изображение удаляется из хранилища
+        :return: Имя исходного файла в хранилище
+        :raises InvalidMultipartException: В теле запроса нет файла image
+        :raises InvalidImageSignatureException: Файл не является изображением png, jpg, jpeg
+        :raises UploadTooLargeException: Файл больше max_bytes
+        :raises ImageProcessingException: Файл не удалось декодировать
+        """
+        async with self.__semaphore:
+            image = MultipartFileStream(request, self.field_name, self.max_bytes)
+            await image.open()
+            head = await image.peek(SIGNATURE_LENGTH)
+            # Content-Type объекта и формат вариантов берутся из сигнатуры, а не из заголовка
+            # части запроса или расширения имени файла
+            media_type = detect_image_media_type(head)
+            if media_type is None or not is_valid_image_signature(image.content_type, head):
+                raise InvalidImageSignatureException()
+            with tempfile.NamedTemporaryFile(prefix='image_upload_') as spool:
+                filename = await self.s3_repository.upload_stream(
+                    image.filename, _spool_chunks(image, spool), media_type
+                )
+                await asyncio.to_thread(spool.flush)
+                try:
+                    await self.__upload_variants(filename, spool.name, media_type)
+                except Exception:
+                    await self.delete(filename)
+                    raise
+            return filename
+
+    async def delete(self, filename: str) -> None:
+        await self.s3_repository.delete_files([filename, *variant_filenames(filename)])
+
+    async def __upload_variants(self, filename: str, path: str, media_type: str) -> None:
+        source_format = media_type.split('/')[1]
+        variants = await self.image_processor.render_variants(path, source_format)
+        await asyncio.gather(*(
+            self.s3_repository.upload_bytes(
+                variant_filename(filename, size, image_format),
+                content,
+                f'image/{image_format or source_format}'
+            )
+            for size, image_format, content in variants
+        ))
+        logger.info("Uploaded %s with %s variants", filename, len(variants))
+
+
+async def _spool_chunks(chunks: AsyncIterable[bytes], spool: BinaryIO) -> AsyncIterator[bytes]:
+    """Передает части дальше, сохраняя их копию в файл spool"""
+    async for chunk in chunks:
+        await asyncio.to_thread(spool.write, chunk)
+        yield chunk
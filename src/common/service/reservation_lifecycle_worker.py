@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+
+from storage.reservation import AbstractReservationRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationLifecycleWorker:
+    """
+    Фоновый перевод бронирований по статусам с заданным интервалом:
+    неподтвержденные бронирования без подтверждения через no_show_grace после начала
+    отменяются, освобождая место; подтвержденные после окончания становятся прошедшими;
+    новые за confirm_window до начала переходят в ожидание подтверждения;
+    прошедшие и отмененные переносятся в архив.
+    Каждый шаг выполняется пачками по batch_size, пока пачки заполнены
+    """
+
+    def __init__(
+            self,
+            reservation_repository: AbstractReservationRepository,
+            interval: timedelta = timedelta(seconds=60),
+            confirm_window: timedelta = timedelta(minutes=30),
+            no_show_grace: timedelta = timedelta(minutes=15),
+            batch_size: int = 500
+    ):
+        self.reservation_repository = reservation_repository
+        self.interval = interval
+        self.confirm_window = confirm_window
+        self.no_show_grace = no_show_grace
+        self.batch_size = batch_size
+        self.__task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        :param now: Момент, относительно которого выполняются переходы
+        :return: Количество бронирований, обработанных каждым шагом
+        """
+        now = now or datetime.now()
+        repository = self.reservation_repository
+        # Отмена неявок идет первой: неподтвержденное бронирование не становится прошедшим
+        return {
+            'cancelled': await self.__drain(
+                partial(repository.cancel_unconfirmed, now - self.no_show_grace)
+            ),
+            'passed': await self.__drain(partial(repository.mark_as_passed, now)),
+            'await_confirm': await self.__drain(
+                partial(repository.mark_awaiting_confirmation, now + self.confirm_window)
+            ),
+            'archived': await self.__drain(repository.archive_finished),
+        }
+
+    async def __drain(self, step: Callable[[int], Awaitable[int]]) -> int:
+        total = 0
+        while True:
+            count = await step(self.batch_size)
+            total += count
+            if count < self.batch_size:
+                return total
+
+    async def __run(self) -> None:
+        logger.info("Reservation lifecycle worker started")
+        while True:
+            try:
+                counts = await self.run_once()
+                if any(counts.values()):
+                    logger.info("Reservation statuses updated: %s", counts)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reservation lifecycle worker failed to update statuses")
+            await asyncio.sleep(self.interval.total_seconds())
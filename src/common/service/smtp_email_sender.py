@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+from typing import Optional
+
+from common.dto.email import EmailMessageDTO
+from infrastructure.config import SMTPSettings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPEmailSender:
+    """
+    Отправка писем через одно долгоживущее SMTP соединение.
+    Вызовы smtplib блокирующие, поэтому выполняются в отдельном потоке. Методы не должны
+    вызываться конкурентно: соединение используется одним отправителем
+    """
+
+    def __init__(self, smtp_settings: SMTPSettings):
+        self.smtp_settings = smtp_settings
+        self.__connection: Optional[smtplib.SMTP_SSL] = None
+
+    async def send(self, message: EmailMessageDTO) -> None:
+        await asyncio.to_thread(self.__send, self.__build(message))
+
+    async def close(self) -> None:
+        if self.__connection is not None:
+            await asyncio.to_thread(self.__close)
+
+    def __build(self, message: EmailMessageDTO) -> EmailMessage:
+        email = EmailMessage()
+        email['From'] = self.smtp_settings.SMTP_EMAIL
+        email['To'] = message.to
+        email['Subject'] = message.subject
+        email.set_content(message.html, subtype='html')
+        return email
+
+    def __send(self, email: EmailMessage) -> None:
+        try:
+            self.__connect().send_message(email)
+        except smtplib.SMTPServerDisconnected:
+            # Сервер закрывает простаивающие соединения, поэтому повторяем один раз с новым
+            logger.info("SMTP connection was closed by server, reconnecting")
+            self.__close()
+            sent = False
+            try:
+                self.__connect().send_message(email)
+                sent = True
+            finally:
+                # Новое соединение после неудачной повторной попытки не переиспользуется
+                if not sent:
+                    self.__close()
+        except (smtplib.SMTPException, OSError):
+            self.__close()
+            raise
+
+    def __connect(self) -> smtplib.SMTP_SSL:
+        if self.__connection is None:
+            connection = smtplib.SMTP_SSL(
+                host=self.smtp_settings.SMTP_SERVER,
+                port=self.smtp_settings.SMTP_PORT
+            )
+            try:
+                connection.login(self.smtp_settings.SMTP_EMAIL, self.smtp_settings.SMTP_PASSWORD)
+            except BaseException:
+                connection.close()
+                raise
+            self.__connection = connection
+        return self.__connection
+
+    def __close(self) -> None:
+        connection, self.__connection = self.__connection, None
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
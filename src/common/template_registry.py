@@ -0,0 +1,52 @@
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import jinja2
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+class TemplateRegistry:
+    """
+    Реестр шаблонов, скомпилированных при запуске приложения.
+    Все шаблоны каталога компилируются в конструкторе, поэтому синтаксические ошибки
+    и отсутствующие шаблоны обнаруживаются при старте, а не при отправке письма.
+    Байткод шаблонов сохраняется на диск и переиспользуется при следующих запусках
+    """
+
+    def __init__(self, directory: str, bytecode_cache_dir: Optional[str] = None):
+        """
+        :param directory: Каталог с шаблонами
+        :param bytecode_cache_dir: Каталог для байткода шаблонов, None отключает кэш
+        """
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+        self.__env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(directory),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False,
+        )
+        self.__templates: Dict[str, jinja2.Template] = {
+            name: self.__env.get_template(name)
+            for name in self.__env.list_templates(
+                filter_func=lambda name: name.endswith(TEMPLATE_EXTENSIONS)
+            )
+        }
+        logger.info("Compiled %s templates from %s", len(self.__templates), directory)
+
+    def get(self, name: str) -> jinja2.Template:
+        """
+        :raises jinja2.TemplateNotFound: Шаблона нет в каталоге
+        """
+        try:
+            return self.__templates[name]
+        except KeyError:
+            raise jinja2.TemplateNotFound(name)
+
+    def render(self, name: str, **context: Any) -> str:
+        return self.get(name).render(**context)
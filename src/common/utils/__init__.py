@@ -1 +1,2 @@
+from .lru_cache import LRUCache
 from .time import utc_with_zone
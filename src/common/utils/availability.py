@@ -0,0 +1,92 @@
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from infrastructure.database.enum import PlaceType
+
+
+def build_open_slots(
+        start: datetime,
+        slot: timedelta,
+        slots_count: int,
+        schedules: Dict[int, List[Tuple[time, time]]],
+        closed_dates: Set[date]
+) -> List[bool]:
+    """
+    Отмечает слоты, целиком попадающие в рабочее время коворкинга
+    :param schedules: Интервалы работы по номеру дня недели.
+    Пустой словарь означает, что расписание не задано и коворкинг работает круглосуточно
+    :param closed_dates: Даты мероприятий, в которые коворкинг не работает
+    :return: Признак открытости для каждого слота
+    """
+    result = []
+    for i in range(slots_count):
+        slot_start = start + i * slot
+        slot_end = slot_start + slot
+        day = slot_start.date()
+        if day in closed_dates:
+            result.append(False)
+            continue
+        if not schedules:
+            result.append(True)
+            continue
+        result.append(any(
+            datetime.combine(day, opens) <= slot_start and
+            slot_end <= datetime.combine(day, closes)
+            for opens, closes in schedules.get(day.weekday(), [])
+        ))
+    return result
+
+
+def count_free_seats(
+        start: datetime,
+        slot: timedelta,
+        slots_count: int,
+        seats: Dict[int, PlaceType],
+        reservations: Iterable[Tuple[int, datetime, datetime]]
+) -> Dict[PlaceType, List[int]]:
+    """
+    Считает количество свободных мест каждого типа в каждом слоте за один проход заметающей
+    прямой. Место считается занятым в слоте, если его бронирование пересекается со слотом
+    :param seats: Тип места по его идентификатору
+    :param reservations: Кортежи (seat_id, session_start, session_end),
+    отсортированные по seat_id и session_start
+    :return: Количество свободных мест по типу места для каждого слота
+    """
+    deltas: Dict[PlaceType, List[int]] = {
+        place_type: [0] * (slots_count + 1) for place_type in PlaceType
+    }
+    totals: Dict[PlaceType, int] = {place_type: 0 for place_type in PlaceType}
+    for place_type in seats.values():
+        totals[place_type] += 1
+
+    def close_range(seat_id: int, first: int, last: int) -> None:
+        deltas[seats[seat_id]][first] += 1
+        deltas[seats[seat_id]][last] -= 1
+
+    current_seat, first, last = None, 0, 0
+    for seat_id, session_start, session_end in reservations:
+        if seat_id not in seats:
+            continue
+        begin = max(0, math.floor((session_start - start) / slot))
+        end = min(slots_count, math.ceil((session_end - start) / slot))
+        if begin >= end:
+            continue
+        # Пересекающиеся диапазоны одного места объединяются, чтобы не считать место дважды
+        if seat_id == current_seat and begin <= last:
+            last = max(last, end)
+            continue
+        if current_seat is not None:
+            close_range(current_seat, first, last)
+        current_seat, first, last = seat_id, begin, end
+    if current_seat is not None:
+        close_range(current_seat, first, last)
+
+    result: Dict[PlaceType, List[int]] = {}
+    for place_type, place_deltas in deltas.items():
+        busy, free = 0, []
+        for i in range(slots_count):
+            busy += place_deltas[i]
+            free.append(totals[place_type] - busy)
+        result[place_type] = free
+    return result
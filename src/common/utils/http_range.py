@@ -0,0 +1,78 @@
+import re
+from typing import NamedTuple, Optional, Tuple
+
+from common.exceptions.application import RangeNotSatisfiableException
+
+_BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class ByteRange(NamedTuple):
+    """Один диапазон байт из заголовка Range. Границы включительные, как в HTTP"""
+    start: Optional[int]
+    end: Optional[int]
+
+    def resolve(self, size: int) -> Tuple[int, int]:
+        """
+        :param size: Размер файла
+        :return: Включительные границы диапазона внутри файла
+        :raises RangeNotSatisfiableException: Диапазон не пересекается с файлом
+        """
+        if self.start is None:
+            # Суффиксный диапазон bytes=-N - последние N байт
+            if not self.end or size == 0:
+                raise RangeNotSatisfiableException(size)
+            return max(0, size - self.end), size - 1
+        if self.start >= size:
+            raise RangeNotSatisfiableException(size)
+        end = size - 1 if self.end is None else min(self.end, size - 1)
+        return self.start, end
+
+    def to_header(self) -> str:
+        start = '' if self.start is None else self.start
+        end = '' if self.end is None else self.end
+        return f'bytes={start}-{end}'
+
+
+def parse_byte_range(header: Optional[str]) -> Optional[ByteRange]:
+    """
+    Разбирает заголовок Range.
+    Поддерживается только один диапазон: для нескольких диапазонов и некорректных значений
+    возвращается None, и файл отдается целиком, что допускается RFC 9110
+    """
+    if not header:
+        return None
+    match = _BYTE_RANGE.match(header.strip())
+    if match is None:
+        return None
+    start, end = (int(value) if value else None for value in match.groups())
+    if start is None and end is None:
+        return None
+    if start is not None and end is not None and start > end:
+        return None
+    return ByteRange(start, end)
+
+
+def etag_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Проверяет заголовок If-None-Match слабым сравнением ETag.
+    Вызывается только для существующего ресурса, поэтому * совпадает всегда
+    :param etag: ETag ресурса в кавычках или None, если у ресурса нет ETag
+    """
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or etag is not None and any(
+        candidate.removeprefix('W/') == etag.removeprefix('W/') for candidate in candidates
+    )
+
+
+def if_range_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Проверяет заголовок If-Range. Сравнение строгое: слабый ETag и дата не совпадают никогда,
+    и тогда вместо диапазона отдается файл целиком
+    :param etag: ETag ресурса в кавычках или None, если у ресурса нет ETag
+    """
+    if header is None:
+        return True
+    header = header.strip()
+    return etag is not None and not header.startswith('W/') and header == etag
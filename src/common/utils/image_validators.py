@@ -1,7 +1,5 @@
 import logging
-from typing import Dict
-
-from fastapi import UploadFile
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -10,18 +8,41 @@ _SIGNATURES: Dict = {
     'jpeg': ['FF D8 FF E0', 'FF D8 FF E1'],
     'png': ['89 50 4E 47 0D 0A 1A 0A']
 }
+SIGNATURE_LENGTH = 32
+# Префиксы файлов, по которым определяется тип изображения, отдаваемый клиенту
+_MEDIA_TYPE_PREFIXES = (
+    (b'\xFF\xD8\xFF', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1A\n', 'image/png'),
+)
+
+
+def detect_image_media_type(data: bytes) -> Optional[str]:
+    """
+    Определяет тип изображения по сигнатуре, а не по имени файла
+    :param data: Первые SIGNATURE_LENGTH байт файла
+    :return: image/jpeg, image/png, image/webp или None для неизвестной сигнатуры
+    """
+    for prefix, media_type in _MEDIA_TYPE_PREFIXES:
+        if data.startswith(prefix):
+            return media_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
 
 
-async def is_valid_image_signature(file: UploadFile) -> bool:
-    if not file.content_type:
-        logger.error("File %s has no content type", file.filename)
+def is_valid_image_signature(content_type: Optional[str], data: bytes) -> bool:
+    """
+    :param content_type: Content-Type загружаемого файла
+    :param data: Первые SIGNATURE_LENGTH байт файла
+    """
+    if not content_type:
+        logger.error("File has no content type")
         return False
-    file_type, extension = file.content_type.split('/')
+    file_type, extension = content_type.split('/')
     if file_type != 'image':
         logger.error("File has invalid type %s", file_type)
         return False
     is_valid: bool = False
-    data = await file.read(32)
     logger.info("Validation file with extension = %s", extension)
     hex_data: str = ' '.join(['{:02X}'.format(byte) for byte in data])
     for signature in _SIGNATURES.get(extension, []):
@@ -29,6 +50,5 @@ async def is_valid_image_signature(file: UploadFile) -> bool:
             is_valid = True
             logger.info("File validated at signature %s", signature)
             break
-    await file.seek(0)
     logger.info("Validation file signature result = %s", is_valid)
     return is_valid
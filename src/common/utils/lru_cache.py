@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar('V')
+
+
+class LRUCache(Generic[V]):
+    """
+    Внутрипроцессный LRU-кэш с ограничением размера и временем жизни записей.
+    Не потокобезопасен, рассчитан на использование из одного event loop
+    """
+
+    def __init__(self, maxsize: int, ttl: timedelta):
+        self.maxsize = maxsize
+        self.ttl = ttl.total_seconds()
+        self._items: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        item = self._items.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
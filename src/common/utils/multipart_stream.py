@@ -0,0 +1,124 @@
+from collections import deque
+from typing import AsyncGenerator, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from common.exceptions.application import (
+    InvalidMultipartException,
+    UploadTooLargeException
+)
+
+_Event = Tuple[str, object]
+
+
+async def _parse_events(request: Request) -> AsyncGenerator[_Event, None]:
+    """
+    Разбирает тело multipart/form-data по мере поступления.
+    :return: События ('headers', dict), ('data', bytes) и ('end', None) для каждой части
+    :raises InvalidMultipartException: Тело не соответствует границе из Content-Type
+    """
+    content_type, params = parse_options_header(request.headers.get('Content-Type', ''))
+    boundary = params.get(b'boundary')
+    if content_type != b'multipart/form-data' or not boundary:
+        raise InvalidMultipartException("Expected multipart/form-data body")
+
+    events: Deque[_Event] = deque()
+    headers: Dict[bytes, bytes] = {}
+    header_field, header_value = bytearray(), bytearray()
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    parser = MultipartParser(boundary, {
+        'on_part_begin': headers.clear,
+        'on_header_field': lambda data, start, end: header_field.extend(data[start:end]),
+        'on_header_value': lambda data, start, end: header_value.extend(data[start:end]),
+        'on_header_end': on_header_end,
+        'on_headers_finished': lambda: events.append(('headers', dict(headers))),
+        'on_part_data': lambda data, start, end: events.append(('data', data[start:end])),
+        'on_part_end': lambda: events.append(('end', None)),
+    })
+    async for chunk in request.stream():
+        try:
+            parser.write(chunk)
+        except MultipartParseError as exc:
+            raise InvalidMultipartException(f"Malformed multipart body: {exc}") from exc
+        while events:
+            yield events.popleft()
+    parser.finalize()
+    while events:
+        yield events.popleft()
+
+
+class MultipartFileStream:
+    """
+    Потоковое чтение одного файлового поля multipart/form-data без сохранения во временный файл.
+    Содержимое поля читается из тела запроса по мере итерации, размер ограничен max_bytes
+    """
+
+    def __init__(self, request: Request, field_name: str, max_bytes: int):
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.__events = _parse_events(request)
+        self.__head = b''
+        self.__received = 0
+        self.__finished = False
+
+    async def open(self) -> None:
+        """
+        Пропускает части тела до заголовков нужного поля
+        :raises InvalidMultipartException: Поле отсутствует или не является файлом
+        """
+        async for kind, value in self.__events:
+            if kind != 'headers':
+                continue
+            _, disposition = parse_options_header(value.get(b'content-disposition', b''))
+            if disposition.get(b'name', b'').decode() != self.field_name:
+                continue
+            if b'filename' not in disposition:
+                raise InvalidMultipartException(f"Field {self.field_name} is not a file")
+            self.filename = disposition[b'filename'].decode()
+            content_type = value.get(b'content-type')
+            self.content_type = content_type.decode() if content_type else None
+            return
+        raise InvalidMultipartException(f"Field {self.field_name} is missing")
+
+    async def peek(self, size: int) -> bytes:
+        """
+        Читает первые size байт файла, не теряя их для последующей итерации
+        """
+        while len(self.__head) < size:
+            chunk = await self.__read_chunk()
+            if chunk is None:
+                break
+            self.__head += chunk
+        return self.__head[:size]
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self.__head:
+            head, self.__head = self.__head, b''
+            yield head
+        while (chunk := await self.__read_chunk()) is not None:
+            yield chunk
+
+    async def __read_chunk(self) -> Optional[bytes]:
+        if self.__finished:
+            return None
+        async for kind, value in self.__events:
+            if kind == 'end':
+                self.__finished = True
+                return None
+            if kind != 'data' or not value:
+                continue
+            self.__received += len(value)
+            if self.__received > self.max_bytes:
+                raise UploadTooLargeException(self.max_bytes)
+            return value
+        # Тело оборвалось внутри части, файл неполный
+        raise InvalidMultipartException(f"Field {self.field_name} is truncated")
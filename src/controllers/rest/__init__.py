@@ -1 +1,2 @@
+from .health import HealthRouter
 from .images import ImageRouter
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Awaitable
+
+from aioredis import Redis
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from common.decorators import rest_admin
+from common.dto.health import DatabasePoolStatsDTO, HealthDTO
+from infrastructure.database.pool import InstrumentedPooledPostgresqlDatabase
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_TIMEOUT_SECONDS = 2
+
+
+class HealthRouter:
+    def __init__(self, database: InstrumentedPooledPostgresqlDatabase, redis: Redis):
+        self.database = database
+        self.redis = redis
+
+    def build_api_router(self) -> APIRouter:
+        router = APIRouter(prefix='/api/v1', tags=['HEALTH'])
+        router.add_api_route(
+            '/health',
+            endpoint=self.health,
+            methods=['GET'],
+            response_model=HealthDTO
+        )
+        router.add_api_route(
+            '/health/db-pool',
+            endpoint=self.database_pool_stats,
+            methods=['GET'],
+            response_model=DatabasePoolStatsDTO
+        )
+        return router
+
+    async def health(self) -> JSONResponse:
+        """
+        Health check of database and Redis
+        :return: 200 if all dependencies are available, 503 otherwise
+        """
+        checks = {
+            'database': await self.__check('database', self.database.ping()),
+            'redis': await self.__check('redis', self.redis.ping()),
+        }
+        health = HealthDTO(healthy=all(checks.values()), checks=checks)
+        status = HTTPStatus.OK if health.healthy else HTTPStatus.SERVICE_UNAVAILABLE
+        return JSONResponse(health.model_dump(), status_code=status.value)
+
+    @rest_admin
+    async def database_pool_stats(self) -> DatabasePoolStatsDTO:
+        """
+        Database connection pool size, saturation and acquire latency, available to admins only
+        """
+        return self.database.stats()
+
+    @staticmethod
+    async def __check(name: str, check: Awaitable) -> bool:
+        try:
+            await asyncio.wait_for(check, HEALTH_CHECK_TIMEOUT_SECONDS)
+        except Exception as exc:
+            logger.warning("Health check of %s failed: %r", name, exc)
+            return False
+        return True
@@ -1,28 +1,111 @@
-import http
+import asyncio
 import logging
+import os
 from http import HTTPStatus
-from typing import Optional
+from typing import AsyncGenerator, Dict, Optional
 
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
 from common.context import CONTEXT_USER
-from common.utils.image_validators import is_valid_image_signature
+from common.exceptions.application import (
+    ImageProcessingException,
+    InvalidImageSignatureException,
+    InvalidMultipartException,
+    RangeNotSatisfiableException,
+    UploadTooLargeException
+)
+from common.image_processor import (
+    WEBP,
+    parse_image_size,
+    variant_filename,
+    variant_filenames
+)
+from common.service.image_upload_service import ImageUploadService
+from common.utils.http_range import (
+    ByteRange,
+    etag_matches,
+    if_range_matches,
+    parse_byte_range
+)
 from infrastructure.database import User
+from storage.image_cache import LocalImageCache
 from storage.s3_repository import S3Repository
 from storage.user import AbstractUserRepository
 
 logger = logging.getLogger(__name__)
 
+# Имя файла генерируется при каждой загрузке, поэтому содержимое по URL никогда не меняется
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Оригинал, отданный вместо еще не созданного варианта, нельзя кэшировать по URL варианта
+FALLBACK_CACHE_CONTROL = 'no-cache'
+# Тип ответа для файла с нераспознанной сигнатурой
+DEFAULT_MEDIA_TYPE = 'application/octet-stream'
+
+# Тело запроса читается потоком, поэтому схема формы описывается вручную
+IMAGE_UPLOAD_OPENAPI = {
+    'requestBody': {
+        'required': True,
+        'content': {
+            'multipart/form-data': {
+                'schema': {
+                    'type': 'object',
+                    'required': ['image'],
+                    'properties': {'image': {'type': 'string', 'format': 'binary'}},
+                }
+            }
+        },
+    }
+}
+
+
+async def upload_image(image_upload_service: ImageUploadService, request: Request) -> str:
+    """
+    Загружает изображение из тела запроса, ошибки загрузки преобразуются в HTTP ответы
+    :return: Имя файла в хранилище
+    """
+    try:
+        return await image_upload_service.upload(request)
+    except InvalidMultipartException as exc:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST.value, detail=str(exc))
+    except InvalidImageSignatureException:
+        logger.info("Attempt to upload image with incorrect signature")
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail="Invalid image signature"
+        )
+    except UploadTooLargeException as exc:
+        logger.info("Attempt to upload image larger than %s bytes", exc.max_bytes)
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE.value,
+            detail=f"Image must not exceed {exc.max_bytes} bytes"
+        )
+    except ImageProcessingException:
+        logger.info("Attempt to upload image that can not be decoded")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST.value, detail="Invalid image")
+
 
 class ImageRouter:
-    def __init__(self, user_repository: AbstractUserRepository, s3_repository: S3Repository):
+    def __init__(
+            self,
+            user_repository: AbstractUserRepository,
+            s3_repository: S3Repository,
+            image_cache: LocalImageCache,
+            image_upload_service: ImageUploadService
+    ):
         self.user_repository = user_repository
         self.s3_repository = s3_repository
+        self.image_cache = image_cache
+        self.image_upload_service = image_upload_service
 
     def build_api_router(self) -> APIRouter:
         router = APIRouter(prefix='/api/v1', tags=['IMAGE'])
-        router.add_api_route('/image', endpoint=self.upload_avatar, methods=['POST'])
+        router.add_api_route(
+            '/image',
+            endpoint=self.upload_avatar,
+            methods=['POST'],
+            openapi_extra=IMAGE_UPLOAD_OPENAPI
+        )
         router.add_api_route(
             '/image/{filename}',
             endpoint=self.response_image,
@@ -31,35 +114,185 @@ class ImageRouter:
         )
         return router
 
-    async def upload_avatar(self, image: UploadFile = File()) -> str:
+    async def upload_avatar(self, request: Request) -> str:
         """
         Upload Avatar
-        :param image: Image file of types png, jpg, jpeg
+        :param request: multipart/form-data with image file of types png, jpg, jpeg
         :return: str (filename)
         """
         user: Optional[User] = CONTEXT_USER.get()
         if not user:
             logger.info("Attempt to upload avatar as anonymous")
             raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED.value)
-        if not await is_valid_image_signature(image):
-            logger.exception("Attempt to upload image with incorrect signature")
-            raise HTTPException(
-                status_code=http.HTTPStatus.BAD_REQUEST,
-                detail="Invalid image signature"
-            )
-        if user.avatar_filename:
-            logger.info("Deleting existing avatar of User(email=%s)", user.email)
-            await self.s3_repository.delete_file(user.avatar_filename)
         logger.info("Upload avatar for User(email=%s)", user.email)
-        filename = await self.s3_repository.upload_file(image)
+        filename = await upload_image(self.image_upload_service, request)
+        previous_filename = user.avatar_filename
         await self.user_repository.set_avatar(user, filename)
         logger.info("User(email=%s) successfully uploaded %s", user.email, filename)
+        if previous_filename:
+            logger.info("Deleting previous avatar of User(email=%s)", user.email)
+            await self.image_upload_service.delete(previous_filename)
+            for key in (previous_filename, *variant_filenames(previous_filename)):
+                self.image_cache.discard(key)
         return filename
 
-    async def response_image(self, filename: str) -> StreamingResponse:
+    async def response_image(
+            self,
+            filename: str,
+            request: Request,
+            size: Optional[str] = None
+    ) -> Response:
         """
-        Streaming response of requested file
+        Response of requested file from local disk cache, filled from S3 on miss.
+        Supports conditional requests (If-None-Match, If-Range) with the S3 object ETag
+        and a single byte range (Range)
         :param filename: Image filename
+        :param size: Resized variant of image: thumbnail, card or full.
+            WebP is served if client accepts it, the original is served for unknown size
         :return: bytes
         """
-        return StreamingResponse(self.s3_repository.get_file_stream(filename))
+        image_size = parse_image_size(size)
+        candidates = [filename]
+        if image_size is not None:
+            image_format = WEBP if 'image/webp' in request.headers.get('Accept', '') else None
+            # Для изображений, загруженных до появления вариантов, отдается оригинал
+            candidates.insert(0, variant_filename(filename, image_size, image_format))
+        for key in candidates:
+            # Ответ оригиналом по URL варианта отдается без ETag: иначе после создания
+            # варианта клиент продолжит получать 304 для закэшированного оригинала
+            fallback = key != candidates[0]
+            try:
+                return await self.__response_file(
+                    key, request, vary=image_size is not None, fallback=fallback
+                )
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                break
+        logger.info("Requested image %s not found", filename)
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND.value)
+
+    async def __response_file(
+            self,
+            filename: str,
+            request: Request,
+            vary: bool,
+            fallback: bool
+    ) -> Response:
+        """
+        Условные заголовки проверяются только для найденного файла по ETag объекта S3
+        :raises FileNotFoundError: Файла нет в хранилище
+        :raises ValueError: Некорректное имя файла
+        """
+        byte_range = parse_byte_range(request.headers.get('Range'))
+        if_range = request.headers.get('If-Range')
+        try:
+            path = self.image_cache.get(filename)
+            if path is None and byte_range is not None and if_range is None:
+                # Частичный ответ не заполняет кэш, диапазон запрашивается напрямую из S3
+                return await self.__response_range_from_s3(
+                    filename, byte_range, request, vary, fallback
+                )
+            if path is None:
+                path = await self.image_cache.put(
+                    filename, lambda: self.s3_repository.get_object(filename)
+                )
+            headers = self.__get_headers(self.image_cache.etag(filename), vary, fallback)
+            if etag_matches(request.headers.get('If-None-Match'), headers.get('ETag')):
+                return Response(status_code=HTTPStatus.NOT_MODIFIED.value, headers=headers)
+            if not if_range_matches(if_range, headers.get('ETag')):
+                byte_range = None
+            # Тип берется из сигнатуры файла, а не из расширения в имени, заданном клиентом
+            media_type = self.image_cache.media_type(filename) or DEFAULT_MEDIA_TYPE
+            if byte_range is None:
+                return self.__file_response(path, media_type, headers)
+            size = os.path.getsize(path)
+            start, end = byte_range.resolve(size)
+        except RangeNotSatisfiableException as exc:
+            raise self.__range_not_satisfiable(exc)
+        return StreamingResponse(
+            read_file_range(path, start, end),
+            status_code=HTTPStatus.PARTIAL_CONTENT.value,
+            media_type=media_type,
+            headers={
+                **headers,
+                'Content-Range': f'bytes {start}-{end}/{size}',
+                'Content-Length': str(end - start + 1),
+            }
+        )
+
+    async def __response_range_from_s3(
+            self,
+            filename: str,
+            byte_range: ByteRange,
+            request: Request,
+            vary: bool,
+            fallback: bool
+    ) -> Response:
+        s3_object = await self.s3_repository.get_object(filename, byte_range)
+        headers = self.__get_headers(s3_object.etag, vary, fallback)
+        if etag_matches(request.headers.get('If-None-Match'), headers.get('ETag')):
+            s3_object.close()
+            return Response(status_code=HTTPStatus.NOT_MODIFIED.value, headers=headers)
+        headers['Content-Length'] = str(s3_object.content_length)
+        if s3_object.content_range is not None:
+            headers['Content-Range'] = s3_object.content_range
+        return StreamingResponse(
+            s3_object,
+            status_code=(
+                HTTPStatus.PARTIAL_CONTENT.value if s3_object.content_range
+                else HTTPStatus.OK.value
+            ),
+            media_type=s3_object.content_type or DEFAULT_MEDIA_TYPE,
+            headers=headers
+        )
+
+    @staticmethod
+    def __file_response(path: str, media_type: str, headers: Dict[str, str]) -> FileResponse:
+        response = FileResponse(
+            path, media_type=media_type, headers=headers, stat_result=os.stat(path)
+        )
+        # Валидаторы FileResponse строятся по файлу локального кэша, а не по объекту S3
+        own_headers = {name.lower() for name in headers}
+        for header in ('etag', 'last-modified'):
+            if header not in own_headers:
+                del response.headers[header]
+        return response
+
+    @staticmethod
+    def __get_headers(etag: Optional[str], vary: bool, fallback: bool) -> Dict[str, str]:
+        headers = {
+            'Cache-Control': FALLBACK_CACHE_CONTROL if fallback else IMMUTABLE_CACHE_CONTROL,
+            'Accept-Ranges': 'bytes',
+        }
+        if etag is not None and not fallback:
+            headers['ETag'] = etag
+        if vary:
+            headers['Vary'] = 'Accept'
+        return headers
+
+    @staticmethod
+    def __range_not_satisfiable(exc: RangeNotSatisfiableException) -> HTTPException:
+        headers = {'Content-Range': f'bytes */{exc.size}'} if exc.size is not None else None
+        return HTTPException(
+            status_code=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE.value,
+            headers=headers
+        )
+
+
+async def read_file_range(
+        path: str,
+        start: int,
+        end: int,
+        chunk_size: int = 64 * 1024
+) -> AsyncGenerator[bytes, None]:
+    """Читает включительный диапазон байт файла, не блокируя event loop"""
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(file.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
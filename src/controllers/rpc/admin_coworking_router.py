@@ -2,12 +2,14 @@ import http
 from typing import List, Optional
 
 import fastapi_jsonrpc as jsonrpc
-from fastapi import UploadFile, File, HTTPException
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from common.decorators import admin_required, rest_admin
 from common.dto.coworking import CoworkingCreateDTO, CoworkingResponseDTO
 from common.dto.coworking_event import CoworkingEventSchema, CoworkingEventResponseSchema
 from common.dto.coworking_seat import CoworkingSeatResponse, CreateSeatDTO
+from common.dto.coworking_transfer import ImportResultDTO
 from common.dto.schedule import ScheduleCreateDTO, ScheduleResponseDTO
 from common.dto.tech_capability import TechCapabilitySchema
 from common.exceptions.rpc import (
@@ -15,24 +17,47 @@ from common.exceptions.rpc import (
     UnauthorizedError,
     NotAdminException
 )
-from common.utils.image_validators import is_valid_image_signature
+from common.service.coworking_transfer_service import CoworkingTransferService
+from common.service.image_upload_service import ImageUploadService
+from controllers.rest.images import IMAGE_UPLOAD_OPENAPI, upload_image
 from infrastructure.database import Coworking, TechCapability, CoworkingEvent, CoworkingSeat
 from storage.coworking import AbstractCoworkingRepository
+from storage.coworking_cache import AbstractCoworkingCache
 from storage.coworking_event import AbstractCoworkingEventRepository
-from storage.s3_repository import S3Repository
 from .abstract_rpc_router import AbstractRPCRouter
 
+JSON_LINES_MEDIA_TYPE = 'application/x-ndjson'
+
+# Тело запроса читается потоком, поэтому схема документа описывается вручную
+COWORKING_IMPORT_OPENAPI = {
+    'requestBody': {
+        'required': True,
+        'content': {
+            JSON_LINES_MEDIA_TYPE: {
+                'schema': {
+                    'type': 'string',
+                    'description': 'JSON Lines, one CoworkingDocument per line',
+                }
+            }
+        },
+    }
+}
+
 
 class AdminCoworkingRouter(AbstractRPCRouter):
     def __init__(
             self,
             coworking_repository: AbstractCoworkingRepository,
             coworking_event_repository: AbstractCoworkingEventRepository,
-            s3_repository: S3Repository
+            image_upload_service: ImageUploadService,
+            coworking_cache: AbstractCoworkingCache,
+            coworking_transfer_service: CoworkingTransferService
     ):
         self.coworking_event_repository = coworking_event_repository
         self.coworking_repository = coworking_repository
-        self.s3_repository = s3_repository
+        self.image_upload_service = image_upload_service
+        self.coworking_cache = coworking_cache
+        self.coworking_transfer_service = coworking_transfer_service
 
     def build_entrypoint(self) -> jsonrpc.Entrypoint:
         entrypoint = jsonrpc.Entrypoint(
@@ -55,11 +80,19 @@ class AdminCoworkingRouter(AbstractRPCRouter):
         )
         entrypoint.add_api_route(
             "/api/v1/admin/coworking/avatar", self.upload_coworking_avatar, methods=["POST"],
-            tags=["ADMIN COWORKING REST"]
+            tags=["ADMIN COWORKING REST"], openapi_extra=IMAGE_UPLOAD_OPENAPI
         )
         entrypoint.add_api_route(
             "/api/v1/admin/coworking/image", self.add_coworking_image, methods=["POST"],
-            tags=["ADMIN COWORKING REST"]
+            tags=["ADMIN COWORKING REST"], openapi_extra=IMAGE_UPLOAD_OPENAPI
+        )
+        entrypoint.add_api_route(
+            "/api/v1/admin/coworking/import", self.import_coworkings, methods=["POST"],
+            tags=["ADMIN COWORKING REST"], openapi_extra=COWORKING_IMPORT_OPENAPI
+        )
+        entrypoint.add_api_route(
+            "/api/v1/admin/coworking/export", self.export_coworkings, methods=["GET"],
+            tags=["ADMIN COWORKING REST"], response_class=StreamingResponse
         )
         return entrypoint
 
@@ -69,31 +102,42 @@ class AdminCoworkingRouter(AbstractRPCRouter):
         return CoworkingResponseDTO.model_validate(coworking, from_attributes=True)
 
     @rest_admin
-    async def upload_coworking_avatar(
-            self,
-            coworking_id: str,
-            image: UploadFile = File()
-    ) -> str:
-        await self.__validate_image_file(image)
+    async def upload_coworking_avatar(self, coworking_id: str, request: Request) -> str:
         coworking: Optional[Coworking] = await self.coworking_repository.get(coworking_id)
         if not coworking:
             raise HTTPException(status_code=http.HTTPStatus.NOT_FOUND.value)
-        avatar_image_filename = await self.s3_repository.upload_file(image)
+        avatar_image_filename = await upload_image(self.image_upload_service, request)
         await self.coworking_repository.set_avatar_filename(coworking, avatar_image_filename)
+        await self.coworking_cache.invalidate(coworking.id)
         return avatar_image_filename
 
     @rest_admin
-    async def add_coworking_image(
-            self,
-            coworking_id: str,
-            image: UploadFile = File(),
-    ) -> str:
-        await self.__validate_image_file(image)
+    async def import_coworkings(self, request: Request) -> ImportResultDTO:
+        """
+        Import coworkings from JSON Lines body, one document per line.
+        Invalid lines are skipped and reported with their line numbers
+        """
+        return await self.coworking_transfer_service.import_lines(request.stream())
+
+    @rest_admin
+    async def export_coworkings(self) -> StreamingResponse:
+        """
+        Export all coworkings as JSON Lines in the import format
+        """
+        return StreamingResponse(
+            self.coworking_transfer_service.export_lines(),
+            media_type=JSON_LINES_MEDIA_TYPE,
+            headers={'Content-Disposition': 'attachment; filename="coworkings.jsonl"'}
+        )
+
+    @rest_admin
+    async def add_coworking_image(self, coworking_id: str, request: Request) -> str:
         coworking: Optional[Coworking] = await self.coworking_repository.get(coworking_id)
         if not coworking:
             raise HTTPException(status_code=http.HTTPStatus.NOT_FOUND.value)
-        image_filename = await self.s3_repository.upload_file(image)
+        image_filename = await upload_image(self.image_upload_service, request)
         await self.coworking_repository.create_coworking_image(coworking, image_filename)
+        await self.coworking_cache.invalidate(coworking.id)
         return image_filename
 
     @admin_required
@@ -108,6 +152,7 @@ class AdminCoworkingRouter(AbstractRPCRouter):
         capabilities: List[TechCapability] = (
             await self.coworking_repository.create_tech_capabilities(coworking, capabilities)
         )
+        await self.coworking_cache.invalidate(coworking.id)
         return [
             TechCapabilitySchema.model_validate(item, from_attributes=True)
             for item in capabilities
@@ -123,6 +168,7 @@ class AdminCoworkingRouter(AbstractRPCRouter):
         if not coworking:
             raise CoworkingDoesNotExistException()
         event: CoworkingEvent = await self.coworking_event_repository.create(coworking, event)
+        await self.coworking_cache.invalidate(coworking.id)
         return CoworkingEventResponseSchema.model_validate(event, from_attributes=True)
 
     @admin_required
@@ -138,6 +184,7 @@ class AdminCoworkingRouter(AbstractRPCRouter):
         seats: List[CoworkingSeat] = await self.coworking_repository.create_places(
             coworking, table_places, meeting_rooms
         )
+        await self.coworking_cache.invalidate(coworking.id)
         return [
             CoworkingSeatResponse.model_validate(seat, from_attributes=True)
             for seat in seats
@@ -153,15 +200,8 @@ class AdminCoworkingRouter(AbstractRPCRouter):
         if not coworking:
             raise CoworkingDoesNotExistException()
         result = await self.coworking_repository.register_schedule(coworking, schedules)
+        await self.coworking_cache.invalidate(coworking.id)
         return [
             ScheduleResponseDTO.model_validate(schedule, from_attributes=True)
             for schedule in result
         ]
-
-    @staticmethod
-    async def __validate_image_file(image: UploadFile) -> None:
-        if not await is_valid_image_signature(image):
-            raise HTTPException(
-                status_code=http.HTTPStatus.BAD_REQUEST,
-                detail="Invalid image signature"
-            )
@@ -82,7 +82,7 @@ class AuthRouter(AbstractRPCRouter):
         if not user:
             logger.error("User with email = %s not found", data.email)
             raise AuthenticationError()
-        if not self.hasher.validate_plain(data.password, user.hashed_password):
+        if not await self.hasher.validate_plain(data.password, user.hashed_password):
             logger.error("User(email=%s) has bad credentials", user.email)
             raise AuthenticationError()
         access_token: str = self.token_service.get_access_token(user)
@@ -1,29 +1,47 @@
 import datetime
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import fastapi_jsonrpc as jsonrpc
 
+from common.dto.availability import AvailabilityGridDTO, AvailableCoworkingDTO
 from common.dto.coworking import CoworkingResponseDTO, CoworkingDetailDTO
-from common.dto.input_params import TimestampInterval, SearchParams
+from common.dto.input_params import (
+    TimestampInterval,
+    SearchParams,
+    AvailabilityGridParams,
+    RankedSearchParams
+)
 from common.dto.schedule import ScheduleResponseDTO
 from common.exceptions.rpc import CoworkingDoesNotExistException
+from common.utils.availability import build_open_slots, count_free_seats
 from infrastructure.database import Coworking, WorkingSchedule
+from infrastructure.database.enum import PlaceType, Weekday
 from storage.coworking import AbstractCoworkingRepository
+from storage.coworking_cache import AbstractCoworkingCache
 from .abstract_rpc_router import AbstractRPCRouter
 
 logger = logging.getLogger(__name__)
 
 
 class CoworkingRouter(AbstractRPCRouter):
-    def __init__(self, coworking_repository: AbstractCoworkingRepository):
+    def __init__(
+            self,
+            coworking_repository: AbstractCoworkingRepository,
+            coworking_cache: AbstractCoworkingCache
+    ):
         self.coworking_repository = coworking_repository
+        self.coworking_cache = coworking_cache
 
     def build_entrypoint(self) -> jsonrpc.Entrypoint:
         entrypoint = jsonrpc.Entrypoint(path='/api/v1/coworking', tags=['COWORKING'])
         entrypoint.add_method_route(self.available_coworking_by_timestamp)
         entrypoint.add_method_route(self.get_coworking_by_search_params)
+        entrypoint.add_method_route(self.search_coworkings)
         entrypoint.add_method_route(self.get_coworking, errors=[CoworkingDoesNotExistException])
+        entrypoint.add_method_route(
+            self.get_availability_grid, errors=[CoworkingDoesNotExistException]
+        )
         return entrypoint
 
     async def get_coworking(self, coworking_id: str) -> CoworkingDetailDTO:
@@ -33,13 +51,19 @@ class CoworkingRouter(AbstractRPCRouter):
         :return: CoworkingDetailDTO
         """
         logger.info("Requested coworking with id=%s", coworking_id)
+        cached: Optional[CoworkingDetailDTO] = await self.coworking_cache.get(coworking_id)
+        if cached is not None:
+            logger.info("Response cached Coworking(id=%s, title=%s)", cached.id, cached.title)
+            return cached
         coworking: Optional[Coworking] = await self.coworking_repository.get_coworking_by_id(
             coworking_id)
         if not coworking:
             logger.error("Coworking with id=%s not found", coworking_id)
             raise CoworkingDoesNotExistException()
         logger.info("Response Coworking(id=%s, title=%s)", coworking.id, coworking.title)
-        return CoworkingDetailDTO.model_validate(coworking, from_attributes=True)
+        result = CoworkingDetailDTO.model_validate(coworking, from_attributes=True)
+        await self.coworking_cache.set(result)
+        return result
 
     async def get_coworking_by_search_params(
             self, search: SearchParams
@@ -55,60 +79,126 @@ class CoworkingRouter(AbstractRPCRouter):
             search.institute
         )
         coworkings: List[Coworking] = await self.coworking_repository.find_by_search_params(search)
-        result = []
-        for coworking in coworkings:
-            logger.info("Founded Coworking(id=%s, title=%s)", coworking.id, coworking.title)
-            working_schedule: Optional[WorkingSchedule] = (
-                await self.coworking_repository.get_coworking_schedule_at_day(datetime.date.today())
-            )
-            result.append(
-                CoworkingResponseDTO(
-                    id=coworking.id,
-                    avatar=coworking.avatar,
-                    title=coworking.title,
-                    institute=coworking.institute,
-                    description=coworking.description,
-                    address=coworking.address,
-                    working_schedule=ScheduleResponseDTO.model_validate(
-                        working_schedule, from_attributes=True
-                    ) if working_schedule else None,
-                )
-            )
+        result = await self.__to_response_list(coworkings, datetime.date.today())
+        logger.info("Founded %s coworkings", len(result))
+        return result
+
+    async def search_coworkings(self, search: RankedSearchParams) -> List[CoworkingResponseDTO]:
+        """
+        Fuzzy search by title, institute, description and address ranked by relevance
+        :param search: RankedSearchParams
+        :return: List[CoworkingResponseDTO]
+        """
+        logger.info(
+            "Searching coworkings by query = %s, limit = %s, offset = %s",
+            search.query, search.limit, search.offset
+        )
+        coworkings: List[Coworking] = await self.coworking_repository.search(search)
+        result = await self.__to_response_list(coworkings, datetime.date.today())
         logger.info("Founded %s coworkings", len(result))
         return result
 
     async def available_coworking_by_timestamp(
             self, interval: TimestampInterval
-    ) -> List[CoworkingResponseDTO]:
+    ) -> List[AvailableCoworkingDTO]:
         """
-        Search available coworking by timestamp interval
+        Search coworkings with free seats in timestamp interval
         :param interval: TimestampInterval
-        :return: List[CoworkingResponseDTO]
+        :return: List[AvailableCoworkingDTO] with free seats count of every place type
         """
         logger.info(
             "Request coworking with interval(start=%s, end=%s)",
             interval.start,
             interval.end
         )
-        available_coworking_list: List[Coworking] = (
+        available: List[Tuple[Coworking, Dict[PlaceType, int]]] = (
             await self.coworking_repository.select_filter_by_timestamp_range(interval)
         )
+        coworkings = await self.__to_response_list(
+            [coworking for coworking, _ in available], interval.start
+        )
+        return [
+            AvailableCoworkingDTO(**coworking.model_dump(), free=free)
+            for coworking, (_, free) in zip(coworkings, available)
+        ]
+
+    async def get_availability_grid(
+            self, coworking_id: str, params: AvailabilityGridParams
+    ) -> AvailabilityGridDTO:
+        """
+        Free seats count of every place type per time slot over a date range
+        :param coworking_id: Coworking ID
+        :param params: AvailabilityGridParams
+        :return: AvailabilityGridDTO
+        """
+        logger.info(
+            "Requested availability grid of coworking with id=%s, params=%s",
+            coworking_id, params
+        )
+        coworking: Optional[Coworking] = await self.coworking_repository.get(coworking_id)
+        if not coworking:
+            logger.error("Coworking with id=%s not found", coworking_id)
+            raise CoworkingDoesNotExistException()
+        slot = datetime.timedelta(minutes=params.slot_minutes)
+        start = datetime.datetime.combine(params.date_from, datetime.time())
+        end = datetime.datetime.combine(
+            params.date_to + datetime.timedelta(days=1), datetime.time()
+        )
+        slots_count = (end - start) // slot
+
+        schedules = {}
+        for schedule in await self.coworking_repository.get_schedules(coworking_id):
+            schedules.setdefault(schedule.week_day.value, []).append(
+                (schedule.start_time, schedule.end_time)
+            )
+        events = await self.coworking_repository.get_events_between(
+            coworking_id, params.date_from, params.date_to
+        )
+        seats = await self.coworking_repository.get_seats(coworking_id)
+        reservations = await self.coworking_repository.get_reservation_intervals(
+            coworking_id, start, end
+        )
+        is_open = build_open_slots(
+            start, slot, slots_count, schedules, {event.date for event in events}
+        )
+        free = count_free_seats(
+            start, slot, slots_count, {seat.id: seat.place_type for seat in seats}, reservations
+        )
+        for place_type in free:
+            free[place_type] = [
+                count if opened else 0 for count, opened in zip(free[place_type], is_open)
+            ]
+        return AvailabilityGridDTO(
+            coworking_id=coworking_id,
+            slot_minutes=params.slot_minutes,
+            slots=[start + i * slot for i in range(slots_count)],
+            is_open=is_open,
+            free=free,
+        )
+
+    async def __to_response_list(
+            self,
+            coworkings: List[Coworking],
+            day: datetime.date
+    ) -> List[CoworkingResponseDTO]:
+        schedules: Dict[str, WorkingSchedule] = await self.coworking_repository.get_schedules_for(
+            [coworking.id for coworking in coworkings], Weekday(day.weekday())
+        )
         result = []
-        for coworking in available_coworking_list:
+        for coworking in coworkings:
             logger.info("Founded Coworking(id=%s, title=%s)", coworking.id, coworking.title)
-            working_time: Optional[WorkingSchedule] = (
-                await self.coworking_repository.get_coworking_schedule_at_day(interval.start)
-            )
-            validated = CoworkingResponseDTO(
-                id=coworking.id,
-                avatar=coworking.avatar,
-                title=coworking.title,
-                institute=coworking.institute,
-                description=coworking.description,
-                address=coworking.address,
-                working_schedule=ScheduleResponseDTO.model_validate(
-                    working_time, from_attributes=True
-                ) if working_time else None,
+            working_schedule: Optional[WorkingSchedule] = schedules.get(coworking.id)
+            result.append(
+                CoworkingResponseDTO(
+                    id=coworking.id,
+                    avatar=coworking.avatar,
+                    title=coworking.title,
+                    institute=coworking.institute,
+                    description=coworking.description,
+                    address=coworking.address,
+                    working_schedule=ScheduleResponseDTO.model_validate(
+                        working_schedule, from_attributes=True
+                    ) if working_schedule else None,
+                )
             )
-            result.append(validated)
         return result
@@ -15,7 +15,8 @@ from common.dto.seats import SeatResponseDTO
 from common.exceptions.application import (
     CoworkingNonBusinessDayException,
     NotAllowedReservationTimeException,
-    CoworkingNotExistsException
+    CoworkingNotExistsException,
+    UserReservationConflictException
 )
 from common.exceptions.rpc import UnauthorizedError, ReservationException
 from infrastructure.database import User, Reservation
@@ -39,6 +40,7 @@ class ReservationRouter(AbstractRPCRouter):
         entrypoint.add_method_route(self.get_user_reservations)
         entrypoint.add_method_route(self.create_reservation, errors=[ReservationException])
         entrypoint.add_method_route(self.cancel_reservation, errors=[ReservationException])
+        entrypoint.add_method_route(self.confirm_reservation, errors=[ReservationException])
         return entrypoint
 
     @login_required
@@ -77,15 +79,6 @@ class ReservationRouter(AbstractRPCRouter):
         :return: ReservationResponse
         """
         user: User = CONTEXT_USER.get()
-        if await self.reservation_repository.is_conflict_reservation(
-                user, reservation.session_start, reservation.session_end):
-            logger.error(
-                "User(email=%s) has a reservations conflict at {start=%s, end=%s}",
-                user.email, reservation.session_start, reservation.session_end
-            )
-            raise ReservationException(
-                {'error': 'user already has conflicting reservation this time'}
-            )
         try:
             logger.info(
                 "User(email=%s) create reservation with params = %s",
@@ -101,6 +94,14 @@ class ReservationRouter(AbstractRPCRouter):
                 reservation.coworking_id, reservation.session_start.date()
             )
             raise ReservationException(data={'error': 'coworking does not work this date'})
+        except UserReservationConflictException:
+            logger.error(
+                "User(email=%s) has a reservations conflict at {start=%s, end=%s}",
+                user.email, reservation.session_start, reservation.session_end
+            )
+            raise ReservationException(
+                {'error': 'user already has conflicting reservation this time'}
+            )
         except NotAllowedReservationTimeException:
             logger.exception(
                 "Failed to create reservation to this timestamp range %s",
@@ -137,6 +138,44 @@ class ReservationRouter(AbstractRPCRouter):
         if reservation.status == BookingStatus.CANCELLED:
             logger.exception("Reservation(id=%s) already cancelled", reservation.id)
             raise ReservationException(data={'error': 'reservation already cancelled'})
-        await self.reservation_repository.mark_as_cancelled(reservation)
+        if not await self.reservation_repository.mark_as_cancelled(reservation):
+            logger.error(
+                "Reservation(id=%s) passed or was archived before cancellation", reservation.id
+            )
+            raise ReservationException(
+                data={'error': 'reservation already cancelled or passed'}
+            )
         logger.info("Reservation(id=%s) successfully cancelled", reservation.id)
         return None
+
+    @login_required
+    async def confirm_reservation(self, reservation_id: int) -> None:
+        """
+        Confirm reservation. Unconfirmed reservations are cancelled shortly after session start
+        :param reservation_id: Reservation ID
+        :return: None
+        """
+        user: User = CONTEXT_USER.get()
+        reservation: Optional[Reservation] = await self.reservation_repository.get(reservation_id)
+        if not reservation:
+            logger.error("Reservation with id=%s not found", reservation_id)
+            raise ReservationException(data={'error': 'reservation does not exist'})
+        if reservation.user != user:
+            logger.error(
+                "User(email=%s) attempted to confirm another user reservation", user.email
+            )
+            raise ReservationException(
+                data={'error': 'unable to confirm another user reservation'}
+            )
+        if reservation.status == BookingStatus.CONFIRMED:
+            return None
+        if not await self.reservation_repository.mark_as_confirmed(reservation):
+            logger.error(
+                "Reservation(id=%s) with status %s can't be confirmed",
+                reservation.id, reservation.status
+            )
+            raise ReservationException(
+                data={'error': 'reservation already cancelled or passed'}
+            )
+        logger.info("Reservation(id=%s) successfully confirmed", reservation.id)
+        return None
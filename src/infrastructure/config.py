@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import List, Literal, Optional, Tuple
 
 import dotenv
 from pydantic import computed_field, Field
@@ -15,6 +16,27 @@ class DatabaseSettings(BaseSettings):
     DATABASE_HOST: str
     DATABASE_PORT: str
     DATABASE_NAME: str
+    DATABASE_POOL_MIN_SIZE: int = 1
+    DATABASE_POOL_MAX_SIZE: int = 20
+    DATABASE_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 10
+    DATABASE_POOL_RECYCLE_SECONDS: float = 1800
+    # Реплики для чтения через запятую в формате host или host:port
+    DATABASE_REPLICA_HOSTS: str = ''
+    DATABASE_REPLICA_STICKY_SECONDS: int = 5
+
+    @computed_field
+    @property
+    def replica_hosts(self) -> List[Tuple[str, str]]:
+        hosts = []
+        for replica in filter(None, map(str.strip, self.DATABASE_REPLICA_HOSTS.split(','))):
+            host, _, port = replica.partition(':')
+            hosts.append((host, port or self.DATABASE_PORT))
+        return hosts
+
+    @computed_field
+    @property
+    def replica_sticky_ttl(self) -> timedelta:
+        return timedelta(seconds=self.DATABASE_REPLICA_STICKY_SECONDS)
 
 
 class RedisSettings(BaseSettings):
@@ -22,6 +44,57 @@ class RedisSettings(BaseSettings):
     REDIS_PORT: int
 
 
+class CoworkingCacheSettings(BaseSettings):
+    COWORKING_CACHE_TTL_SECONDS: int = 600
+    COWORKING_LOCAL_CACHE_TTL_SECONDS: int = 10
+    COWORKING_LOCAL_CACHE_SIZE: int = 256
+
+    @computed_field
+    @property
+    def cache_ttl(self) -> timedelta:
+        return timedelta(seconds=self.COWORKING_CACHE_TTL_SECONDS)
+
+    @computed_field
+    @property
+    def local_cache_ttl(self) -> timedelta:
+        return timedelta(seconds=self.COWORKING_LOCAL_CACHE_TTL_SECONDS)
+
+
+class UserCacheSettings(BaseSettings):
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_SIZE: int = 4096
+
+    @computed_field
+    @property
+    def cache_ttl(self) -> timedelta:
+        return timedelta(seconds=self.USER_CACHE_TTL_SECONDS)
+
+
+class HasherSettings(BaseSettings):
+    HASHER_EXECUTOR: Literal['thread', 'process'] = 'process'
+    HASHER_MAX_WORKERS: int = 2
+    HASHER_MAX_CONCURRENCY: int = 16
+
+
+class ImageProcessingSettings(BaseSettings):
+    IMAGE_PROCESSING_EXECUTOR: Literal['thread', 'process'] = 'process'
+    IMAGE_PROCESSING_MAX_WORKERS: int = 2
+    IMAGE_PROCESSING_MAX_CONCURRENCY: int = 4
+    IMAGE_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    IMAGE_UPLOAD_MAX_CONCURRENCY: int = 8
+
+
+class ImageCacheSettings(BaseSettings):
+    IMAGE_CACHE_DIR: str = '/tmp/coworking_images'
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+
+class CoworkingTransferSettings(BaseSettings):
+    COWORKING_IMPORT_CHUNK_SIZE: int = 100
+    COWORKING_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+    COWORKING_EXPORT_PAGE_SIZE: int = 100
+
+
 class ApplicationSettings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_TTL_MINUTES: int
@@ -44,6 +117,9 @@ class ObjectStorageSettings(BaseSettings):
     REGION_NAME: str
     BUCKET_NAME: str
     S3_ENDPOINT_URL: str
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    S3_CONNECT_TIMEOUT: float = 5
+    S3_READ_TIMEOUT: float = 30
 
 
 class SMTPSettings(BaseSettings):
@@ -53,10 +129,56 @@ class SMTPSettings(BaseSettings):
     SMTP_PORT: int
 
 
+class EmailOutboxSettings(BaseSettings):
+    EMAIL_OUTBOX_STREAM: str = 'email:outbox'
+    EMAIL_OUTBOX_DEAD_LETTER_MAXLEN: int = 10000
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_RETRY_DELAY_SECONDS: int = 10
+    EMAIL_OUTBOX_CLAIM_IDLE_SECONDS: int = 300
+
+    @computed_field
+    @property
+    def retry_delay(self) -> timedelta:
+        return timedelta(seconds=self.EMAIL_OUTBOX_RETRY_DELAY_SECONDS)
+
+    @computed_field
+    @property
+    def claim_idle(self) -> timedelta:
+        return timedelta(seconds=self.EMAIL_OUTBOX_CLAIM_IDLE_SECONDS)
+
+
+class ReservationLifecycleSettings(BaseSettings):
+    RESERVATION_LIFECYCLE_INTERVAL_SECONDS: int = 60
+    RESERVATION_LIFECYCLE_BATCH_SIZE: int = 500
+    RESERVATION_CONFIRM_WINDOW_MINUTES: int = 30
+    RESERVATION_NO_SHOW_GRACE_MINUTES: int = 15
+
+    @computed_field
+    @property
+    def interval(self) -> timedelta:
+        return timedelta(seconds=self.RESERVATION_LIFECYCLE_INTERVAL_SECONDS)
+
+    @computed_field
+    @property
+    def confirm_window(self) -> timedelta:
+        return timedelta(minutes=self.RESERVATION_CONFIRM_WINDOW_MINUTES)
+
+    @computed_field
+    @property
+    def no_show_grace(self) -> timedelta:
+        return timedelta(minutes=self.RESERVATION_NO_SHOW_GRACE_MINUTES)
+
+
 class InfrastructureSettings(BaseSettings):
     FRONTEND_URL: str = 'http://localhost:3000'
 
 
+class TemplateSettings(BaseSettings):
+    TEMPLATES_DIR: str = '/templates'
+    TEMPLATES_BYTECODE_CACHE_DIR: Optional[str] = '/tmp/jinja_bytecode'
+
+
 class LoggingSettings(BaseSettings):
     log_format: str = Field(
         "%(asctime)s - %(name)s.%(funcName)s:%(lineno)d - %(levelname)s - %(message)s",
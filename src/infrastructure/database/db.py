@@ -1,14 +1,31 @@
-from peewee_async import PostgresqlDatabase, Manager
+from typing import Optional
 
 from infrastructure.config import DatabaseSettings
+from infrastructure.database.pool import InstrumentedPooledPostgresqlDatabase
+
+
+def create_database(
+        settings: DatabaseSettings,
+        host: Optional[str] = None,
+        port: Optional[str] = None
+) -> InstrumentedPooledPostgresqlDatabase:
+    """
+    :param host: Хост реплики, по умолчанию DATABASE_HOST
+    :param port: Порт реплики, по умолчанию DATABASE_PORT
+    """
+    return InstrumentedPooledPostgresqlDatabase(
+        database=settings.DATABASE_NAME,
+        user=settings.DATABASE_USER,
+        password=settings.DATABASE_PASSWORD,
+        host=host or settings.DATABASE_HOST,
+        port=port or settings.DATABASE_PORT,
+        min_connections=settings.DATABASE_POOL_MIN_SIZE,
+        max_connections=settings.DATABASE_POOL_MAX_SIZE,
+        acquire_timeout=settings.DATABASE_POOL_ACQUIRE_TIMEOUT_SECONDS,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS
+    )
+
 
 db_settings = DatabaseSettings()
 
-database = PostgresqlDatabase(
-    database=db_settings.DATABASE_NAME,
-    user=db_settings.DATABASE_USER,
-    password=db_settings.DATABASE_PASSWORD,
-    host=db_settings.DATABASE_HOST,
-    port=db_settings.DATABASE_PORT
-)
-manager = Manager(database)
+database = create_database(db_settings)
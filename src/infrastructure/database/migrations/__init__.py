@@ -0,0 +1 @@
+from .runner import Migration, MigrationRunner, load_migrations
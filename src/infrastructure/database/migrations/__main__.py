@@ -0,0 +1,12 @@
+"""
+Применение миграций схемы базы данных:
+
+    python -m infrastructure.database.migrations
+"""
+from infrastructure.database.db import database
+from infrastructure.logging import configure_logging
+from .runner import MigrationRunner
+
+if __name__ == '__main__':
+    configure_logging()
+    MigrationRunner(database).run()
@@ -0,0 +1,102 @@
+import importlib
+import logging
+import pkgutil
+import re
+from types import ModuleType
+from typing import Callable, List, NamedTuple, Optional, Set
+
+import peewee
+
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_MIGRATIONS_TABLE = 'schema_migrations'
+# Ключ advisory lock, не дающий нескольким экземплярам приложения мигрировать одновременно
+MIGRATIONS_LOCK_KEY = 4_216_773_901
+
+_MODULE_NAME = re.compile(r'^v(?P<version>\d{4})_(?P<name>\w+)$')
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    up: Callable[[peewee.Database], None]
+
+
+def load_migrations(package: ModuleType = versions) -> List[Migration]:
+    """
+    Загружает миграции из модулей пакета с именами вида v0001_name, в каждом функция up
+    :raises ValueError: Две миграции с одной версией
+    """
+    migrations = {}
+    for module_info in pkgutil.iter_modules(package.__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match is None:
+            continue
+        version = int(match['version'])
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {module_info.name}")
+        module = importlib.import_module(f'{package.__name__}.{module_info.name}')
+        migrations[version] = Migration(version, match['name'], module.up)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+class MigrationRunner:
+    """
+    Применяет еще не примененные миграции по возрастанию версии.
+    Каждая миграция выполняется в своей транзакции вместе с записью в schema_migrations,
+    поэтому упавшая миграция не оставляет схему в промежуточном состоянии
+    """
+
+    def __init__(self, database: peewee.Database, migrations: Optional[List[Migration]] = None):
+        self.database = database
+        self.migrations = load_migrations() if migrations is None else migrations
+
+    def run(self) -> List[Migration]:
+        """
+        :return: Примененные миграции
+        """
+        with self.database.connection_context():
+            self.database.execute_sql('SELECT pg_advisory_lock(%s)', (MIGRATIONS_LOCK_KEY,))
+            try:
+                self.__create_table()
+                pending = self.__pending()
+                for migration in pending:
+                    self.__apply(migration)
+            finally:
+                self.database.execute_sql(
+                    'SELECT pg_advisory_unlock(%s)', (MIGRATIONS_LOCK_KEY,)
+                )
+        if not pending:
+            logger.info("Database schema is up to date")
+        return pending
+
+    def pending(self) -> List[Migration]:
+        with self.database.connection_context():
+            self.__create_table()
+            return self.__pending()
+
+    def __pending(self) -> List[Migration]:
+        applied: Set[int] = {
+            row[0] for row in
+            self.database.execute_sql(f'SELECT version FROM {SCHEMA_MIGRATIONS_TABLE}')
+        }
+        return [migration for migration in self.migrations if migration.version not in applied]
+
+    def __apply(self, migration: Migration) -> None:
+        logger.info("Applying migration %04d_%s", migration.version, migration.name)
+        with self.database.atomic():
+            migration.up(self.database)
+            self.database.execute_sql(
+                f'INSERT INTO {SCHEMA_MIGRATIONS_TABLE} (version, name) VALUES (%s, %s)',
+                (migration.version, migration.name)
+            )
+
+    def __create_table(self) -> None:
+        self.database.execute_sql(
+            f'CREATE TABLE IF NOT EXISTS {SCHEMA_MIGRATIONS_TABLE} ('
+            'version INTEGER NOT NULL PRIMARY KEY, '
+            'name VARCHAR(128) NOT NULL, '
+            'applied_at TIMESTAMP NOT NULL DEFAULT now())'
+        )
@@ -0,0 +1,170 @@
+"""
+Исходная схема: таблицы моделей, расширения, exclusion constraint бронирований и
+триграммные индексы поиска коворкингов.
+Все выражения идемпотентны, поэтому миграция также принимает базы, созданные
+до появления миграций через create_tables при запуске приложения. Пересекающиеся
+бронирования таких баз отменяются перед созданием exclusion constraint
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import peewee
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ['btree_gist', 'pg_trgm']
+
+TABLES = [
+    'CREATE TABLE IF NOT EXISTS "users" ('
+    '"id" VARCHAR(64) NOT NULL PRIMARY KEY, "email" VARCHAR(64) NOT NULL, '
+    '"hashed_password" VARCHAR(256) NOT NULL, "last_name" VARCHAR(32) NOT NULL, '
+    '"first_name" VARCHAR(32) NOT NULL, "patronymic" VARCHAR(32), '
+    '"is_student" BOOLEAN NOT NULL, "is_admin" BOOLEAN NOT NULL, '
+    '"telegram_chat_id" BIGINT, "avatar_filename" VARCHAR(128))',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "user_email" ON "users" ("email")',
+
+    'CREATE TABLE IF NOT EXISTS "coworking" ('
+    '"id" VARCHAR(64) NOT NULL PRIMARY KEY, "avatar" VARCHAR(64), '
+    '"title" VARCHAR(128) NOT NULL, "institute" VARCHAR(128) NOT NULL, '
+    '"description" VARCHAR(1024) NOT NULL, "address" VARCHAR(128) NOT NULL)',
+
+    'CREATE TABLE IF NOT EXISTS "coworking_working_schedule" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "coworking_id" VARCHAR(64) NOT NULL, '
+    '"week_day" INTEGER NOT NULL, "start_time" TIME NOT NULL, "end_time" TIME NOT NULL, '
+    'FOREIGN KEY ("coworking_id") REFERENCES "coworking" ("id") ON DELETE RESTRICT)',
+    'CREATE INDEX IF NOT EXISTS "workingschedule_coworking_id" '
+    'ON "coworking_working_schedule" ("coworking_id")',
+
+    'CREATE TABLE IF NOT EXISTS "coworking_seats" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "coworking_id" VARCHAR(64) NOT NULL, '
+    '"label" VARCHAR(64), "description" VARCHAR(1024), "place_type" VARCHAR(32) NOT NULL, '
+    '"seats_count" SMALLINT NOT NULL, '
+    'FOREIGN KEY ("coworking_id") REFERENCES "coworking" ("id"))',
+    'CREATE INDEX IF NOT EXISTS "coworkingseat_coworking_id" '
+    'ON "coworking_seats" ("coworking_id")',
+
+    'CREATE TABLE IF NOT EXISTS "seats_reservations" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "user_id" VARCHAR(64) NOT NULL, '
+    '"seat_id" BIGINT NOT NULL, "session_start" TIMESTAMP NOT NULL, '
+    '"session_end" TIMESTAMP NOT NULL, "status" VARCHAR(255) NOT NULL, '
+    '"created_at" TIMESTAMP NOT NULL, '
+    'FOREIGN KEY ("user_id") REFERENCES "users" ("id") ON DELETE CASCADE, '
+    'FOREIGN KEY ("seat_id") REFERENCES "coworking_seats" ("id") ON DELETE CASCADE)',
+    'CREATE INDEX IF NOT EXISTS "reservation_user_id" ON "seats_reservations" ("user_id")',
+    'CREATE INDEX IF NOT EXISTS "reservation_seat_id" ON "seats_reservations" ("seat_id")',
+
+    'CREATE TABLE IF NOT EXISTS "coworking_images" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "coworking_id" VARCHAR(64) NOT NULL, '
+    '"image_filename" VARCHAR(64) NOT NULL, '
+    'FOREIGN KEY ("coworking_id") REFERENCES "coworking" ("id") ON DELETE CASCADE)',
+    'CREATE INDEX IF NOT EXISTS "coworkingimages_coworking_id" '
+    'ON "coworking_images" ("coworking_id")',
+
+    'CREATE TABLE IF NOT EXISTS "coworking_events" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "coworking_id" VARCHAR(64) NOT NULL, '
+    '"date" DATE NOT NULL, "name" VARCHAR(128) NOT NULL, "description" VARCHAR(512), '
+    'FOREIGN KEY ("coworking_id") REFERENCES "coworking" ("id") ON DELETE CASCADE)',
+    'CREATE INDEX IF NOT EXISTS "coworkingevent_coworking_id" '
+    'ON "coworking_events" ("coworking_id")',
+
+    'CREATE TABLE IF NOT EXISTS "email_auth_data" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "user_id" VARCHAR(64) NOT NULL, '
+    '"chat_id" BIGINT NOT NULL, "password" INTEGER NOT NULL, "created_at" TIMESTAMP NOT NULL, '
+    'FOREIGN KEY ("user_id") REFERENCES "users" ("id"))',
+    'CREATE INDEX IF NOT EXISTS "emailauthdata_user_id" ON "email_auth_data" ("user_id")',
+
+    'CREATE TABLE IF NOT EXISTS "password_reset_tokens" ('
+    '"id" VARCHAR(64) NOT NULL PRIMARY KEY, "user_id" VARCHAR(64) NOT NULL, '
+    '"fingerprint" VARCHAR(128) NOT NULL, "created_at" TIMESTAMP NOT NULL, '
+    '"status" VARCHAR(255) NOT NULL, '
+    'FOREIGN KEY ("user_id") REFERENCES "users" ("id"))',
+    'CREATE INDEX IF NOT EXISTS "passwordresettoken_user_id" '
+    'ON "password_reset_tokens" ("user_id")',
+
+    'CREATE TABLE IF NOT EXISTS "coworking_technical_capabilities" ('
+    '"id" BIGSERIAL NOT NULL PRIMARY KEY, "capability" VARCHAR(64) NOT NULL, '
+    '"coworking_id" VARCHAR(64) NOT NULL, '
+    'FOREIGN KEY ("coworking_id") REFERENCES "coworking" ("id"))',
+    'CREATE INDEX IF NOT EXISTS "techcapability_coworking_id" '
+    'ON "coworking_technical_capabilities" ("coworking_id")',
+]
+
+# Неотмененные бронирования, пересекающиеся с другим неотмененным бронированием того же места
+OVERLAPPING_RESERVATIONS = """
+SELECT DISTINCT r.id, r.seat_id, r.session_start, r.session_end, r.created_at
+FROM seats_reservations r
+JOIN seats_reservations o
+    ON o.seat_id = r.seat_id AND o.id <> r.id
+    AND tsrange(o.session_start, o.session_end) && tsrange(r.session_start, r.session_end)
+WHERE r.status <> 'cancelled' AND o.status <> 'cancelled'
+ORDER BY r.created_at, r.id
+"""
+
+# Запрещает пересекающиеся неотмененные бронирования одного места
+RESERVATION_NO_OVERLAP = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'seats_reservations_no_overlap'
+    ) THEN
+        ALTER TABLE seats_reservations
+            ADD CONSTRAINT seats_reservations_no_overlap
+            EXCLUDE USING gist (seat_id WITH =, tsrange(session_start, session_end) WITH &&)
+            WHERE (status <> 'cancelled');
+    END IF;
+END
+$$
+"""
+
+SEARCH_INDEXES = [
+    # Ускоряют ILIKE-поиск по отдельным полям
+    'CREATE INDEX IF NOT EXISTS coworking_title_trgm_idx '
+    'ON coworking USING gin (title gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS coworking_institute_trgm_idx '
+    'ON coworking USING gin (institute gin_trgm_ops)',
+    # Выражение должно совпадать с SEARCH_DOCUMENT в CoworkingRepository
+    "CREATE INDEX IF NOT EXISTS coworking_search_document_trgm_idx ON coworking USING gin "
+    "((title || ' ' || institute || ' ' || description || ' ' || address) gin_trgm_ops)",
+]
+
+
+def cancel_overlapping_reservations(database: peewee.Database) -> List[int]:
+    """
+    Отменяет бронирования, пересекающиеся с более ранним по created_at бронированием того же
+    места, чтобы exclusion constraint мог быть создан на базе, где двойные бронирования
+    уже появились. Из каждой группы пересечений остается самое раннее бронирование
+    :return: id отмененных бронирований
+    """
+    kept: Dict[int, List[Tuple[datetime, datetime]]] = defaultdict(list)
+    cancelled = []
+    rows = database.execute_sql(OVERLAPPING_RESERVATIONS).fetchall()
+    for reservation_id, seat_id, start, end, _ in rows:
+        # Пустой интервал ни с чем не пересекается, как и tsrange в ограничении
+        if start < end and any(start < kept_end and kept_start < end
+                               for kept_start, kept_end in kept[seat_id]):
+            cancelled.append(reservation_id)
+        else:
+            kept[seat_id].append((start, end))
+    if cancelled:
+        database.execute_sql(
+            "UPDATE seats_reservations SET status = 'cancelled' WHERE id = ANY(%s)",
+            (cancelled,)
+        )
+        logger.warning(
+            "Cancelled %s overlapping reservations before adding "
+            "seats_reservations_no_overlap: %s", len(cancelled), cancelled
+        )
+    return cancelled
+
+
+def up(database: peewee.Database) -> None:
+    for extension in EXTENSIONS:
+        database.execute_sql(f'CREATE EXTENSION IF NOT EXISTS {extension}')
+    for statement in TABLES:
+        database.execute_sql(statement)
+    cancel_overlapping_reservations(database)
+    database.execute_sql(RESERVATION_NO_OVERLAP)
+    for statement in SEARCH_INDEXES:
+        database.execute_sql(statement)
@@ -0,0 +1,35 @@
+"""
+Составные индексы под частые условия запросов.
+Индексы по (coworking_id, ...) заменяют одноколоночные индексы внешних ключей:
+префикс составного индекса обслуживает те же запросы
+"""
+import peewee
+
+STATEMENTS = [
+    # Пересечения с неотмененными бронированиями места: выбор свободного места при
+    # бронировании и занятость мест коворкинга для расчета доступности.
+    # session_end идет перед session_start: условие session_end > начала интервала
+    # отсекает прошедшие бронирования, которых у места большинство
+    'CREATE INDEX IF NOT EXISTS reservation_seat_session_active_idx '
+    'ON seats_reservations (seat_id, session_end, session_start) '
+    "WHERE status <> 'cancelled'",
+    # Предстоящие бронирования пользователя и проверка пересечений с ними
+    'CREATE INDEX IF NOT EXISTS reservation_user_session_end_idx '
+    'ON seats_reservations (user_id, session_end)',
+    'DROP INDEX IF EXISTS reservation_user_id',
+    # События коворкинга на дату и в диапазоне дат
+    'CREATE INDEX IF NOT EXISTS coworkingevent_coworking_date_idx '
+    'ON coworking_events (coworking_id, date)',
+    'DROP INDEX IF EXISTS coworkingevent_coworking_id',
+    # Расписание коворкинга на день недели
+    'CREATE INDEX IF NOT EXISTS workingschedule_coworking_week_day_idx '
+    'ON coworking_working_schedule (coworking_id, week_day)',
+    'DROP INDEX IF EXISTS workingschedule_coworking_id',
+]
+
+
+def up(database: peewee.Database) -> None:
+    for statement in STATEMENTS:
+        database.execute_sql(statement)
+    for table in ('seats_reservations', 'coworking_events', 'coworking_working_schedule'):
+        database.execute_sql(f'ANALYZE {table}')
@@ -0,0 +1,23 @@
+"""
+Частичные индексы по времени для фонового перевода бронирований по статусам.
+В индексы попадают только бронирования, ожидающие перехода, поэтому они остаются
+небольшими независимо от истории бронирований
+"""
+import peewee
+
+STATEMENTS = [
+    # Неподтвержденные бронирования: переход в ожидание подтверждения перед началом
+    # и отмена неявки после начала
+    'CREATE INDEX IF NOT EXISTS reservation_unconfirmed_session_start_idx '
+    'ON seats_reservations (session_start) '
+    "WHERE status IN ('new', 'await_confirm')",
+    # Подтвержденные бронирования: переход в прошедшие после окончания
+    'CREATE INDEX IF NOT EXISTS reservation_confirmed_session_end_idx '
+    'ON seats_reservations (session_end) '
+    "WHERE status = 'confirmed'",
+]
+
+
+def up(database: peewee.Database) -> None:
+    for statement in STATEMENTS:
+        database.execute_sql(statement)
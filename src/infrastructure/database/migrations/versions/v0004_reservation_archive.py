@@ -0,0 +1,56 @@
+"""
+Архив прошедших и отмененных бронирований, секционированный по месяцам начала сессии.
+Рабочая таблица seats_reservations остается несекционированной: exclusion constraint
+на пересечения бронирований места должен охватывать все строки таблицы, а у секционированной
+таблицы он возможен только при равенстве по ключу секционирования. Поэтому рабочая таблица
+играет роль горячей секции, а архив хранит холодные строки
+"""
+import peewee
+
+STATEMENTS = [
+    'CREATE TABLE IF NOT EXISTS "seats_reservations_archive" ('
+    '"id" BIGINT NOT NULL, "user_id" VARCHAR(64) NOT NULL, '
+    '"seat_id" BIGINT NOT NULL, "session_start" TIMESTAMP NOT NULL, '
+    '"session_end" TIMESTAMP NOT NULL, "status" VARCHAR(255) NOT NULL, '
+    '"created_at" TIMESTAMP NOT NULL, '
+    'PRIMARY KEY ("id", "session_start"), '
+    'FOREIGN KEY ("user_id") REFERENCES "users" ("id") ON DELETE CASCADE, '
+    'FOREIGN KEY ("seat_id") REFERENCES "coworking_seats" ("id") ON DELETE CASCADE) '
+    'PARTITION BY RANGE ("session_start")',
+    # История бронирований пользователя и поиск бронирования по id без ключа секции
+    'CREATE INDEX IF NOT EXISTS reservation_archive_user_session_end_idx '
+    'ON seats_reservations_archive (user_id, session_end)',
+    'CREATE INDEX IF NOT EXISTS reservation_archive_id_idx '
+    'ON seats_reservations_archive (id)',
+    # Бронирования, ожидающие переноса в архив
+    'CREATE INDEX IF NOT EXISTS reservation_finished_id_idx '
+    'ON seats_reservations (id) '
+    "WHERE status IN ('passed', 'cancelled')",
+]
+
+# Секция создается при первом переносе строк за месяц. Блокировка по имени секции
+# защищает CREATE TABLE IF NOT EXISTS от гонки нескольких процессов.
+# %% экранирует спецификаторы format() от подстановки параметров драйвером
+ARCHIVE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION seats_reservations_archive_partition(moment TIMESTAMP)
+RETURNS TEXT AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', moment);
+    partition_name TEXT := 'seats_reservations_archive_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(partition_name));
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %%I PARTITION OF seats_reservations_archive '
+        'FOR VALUES FROM (%%L) TO (%%L)',
+        partition_name, month_start, month_start + INTERVAL '1 month'
+    );
+    RETURN partition_name;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def up(database: peewee.Database) -> None:
+    for statement in STATEMENTS:
+        database.execute_sql(statement)
+    database.execute_sql(ARCHIVE_PARTITION_FUNCTION)
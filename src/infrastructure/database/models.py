@@ -13,6 +13,7 @@ __all__ = [
     'WorkingSchedule',
     'CoworkingSeat',
     'Reservation',
+    'ReservationArchive',
     'CoworkingImages',
     'CoworkingEvent',
     'EmailAuthData',
@@ -100,6 +101,32 @@ class Reservation(peewee.Model):
         database = database
 
 
+class ReservationArchive(peewee.Model):
+    """
+    Прошедшие и отмененные бронирования, перенесенные из Reservation.
+    Таблица секционирована по месяцам session_start, id совпадает с id исходного бронирования
+    """
+
+    id: int = peewee.BigIntegerField()
+    user: User = peewee.ForeignKeyField(
+        User, backref='archived_bookings', on_delete=OnDelete.CASCADE.value
+    )
+    # Архив не индексируется по seat_id: выборки по местам идут только по активным бронированиям
+    seat: CoworkingSeat = peewee.ForeignKeyField(
+        CoworkingSeat, backref='archived_seat_booking', on_delete=OnDelete.CASCADE.value,
+        index=False
+    )
+    session_start = peewee.DateTimeField(null=False)
+    session_end = peewee.DateTimeField(null=False)
+    status: BookingStatus = CharEnum(_enum=BookingStatus, null=False)
+    created_at: datetime.datetime = peewee.DateTimeField()
+
+    class Meta:
+        table_name = 'seats_reservations_archive'
+        database = database
+        primary_key = peewee.CompositeKey('id', 'session_start')
+
+
 class CoworkingImages(peewee.Model):
     id: int = peewee.BigAutoField(primary_key=True)
     coworking: Coworking = peewee.ForeignKeyField(
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from typing import Optional
+
+from peewee_async import AsyncPostgresqlConnection, PooledPostgresqlDatabase
+
+from common.dto.health import DatabasePoolStatsDTO
+
+
+class PoolCounters:
+    """Счетчики получения соединений из пула за время жизни процесса"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+
+    def observe(self, elapsed: float) -> None:
+        self.acquired += 1
+        self.acquire_seconds_total += elapsed
+        self.acquire_seconds_max = max(self.acquire_seconds_max, elapsed)
+
+
+class InstrumentedPostgresqlConnection(AsyncPostgresqlConnection):
+    """
+    Пул соединений aiopg с ограничением времени ожидания соединения и счетчиками ожиданий.
+    Ожиданием считается получение соединения, когда свободных соединений нет
+    и пул уже достиг максимального размера
+    """
+
+    def __init__(
+            self,
+            *,
+            counters: PoolCounters,
+            acquire_timeout: Optional[float] = None,
+            **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.counters = counters
+        self.acquire_timeout = acquire_timeout
+
+    async def acquire(self):
+        if self.pool.freesize == 0 and self.pool.size >= self.pool.maxsize:
+            self.counters.waited += 1
+        started = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(self.pool.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.counters.timeouts += 1
+            raise
+        self.counters.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedPooledPostgresqlDatabase(PooledPostgresqlDatabase):
+    """
+    PooledPostgresqlDatabase с настройкой переподключения, ограничением ожидания соединения
+    и статистикой пула
+
+    :param pool_recycle: Через сколько секунд соединение пересоздается, -1 отключает
+    :param acquire_timeout: Максимальное время ожидания свободного соединения в секундах
+    """
+
+    def init(self, database, **kwargs):
+        self.pool_recycle = kwargs.pop('pool_recycle', -1)
+        self.acquire_timeout = kwargs.pop('acquire_timeout', None)
+        super().init(database, **kwargs)
+        self.init_async(conn_cls=InstrumentedPostgresqlConnection)
+        # Счетчики принадлежат базе данных, чтобы переживать пересоздание пула
+        self.counters = PoolCounters()
+
+    @property
+    def connect_params_async(self):
+        kwargs = super().connect_params_async
+        kwargs.update({
+            'pool_recycle': self.pool_recycle,
+            'acquire_timeout': self.acquire_timeout,
+            'counters': self.counters,
+        })
+        return kwargs
+
+    async def cursor_async(self):
+        """
+        В отличие от peewee_async, истечение ожидания соединения не закрывает весь пул:
+        пул исправен, он лишь исчерпан
+        """
+        await self.connect_async(loop=self._loop)
+        conn = self.transaction_conn_async() if self.transaction_depth_async() > 0 else None
+        try:
+            return await self._async_conn.cursor(conn=conn)
+        except asyncio.TimeoutError:
+            raise
+        except Exception:
+            await self.close_async()
+            raise
+
+    async def ping(self) -> None:
+        """
+        Проверка доступности базы данных через соединение из пула
+        """
+        cursor = await self.cursor_async()
+        try:
+            await cursor.execute('SELECT 1')
+        finally:
+            await cursor.release()
+
+    def stats(self) -> DatabasePoolStatsDTO:
+        connection: Optional[InstrumentedPostgresqlConnection] = self._async_conn
+        pool = connection.pool if connection is not None else None
+        counters = self.counters
+        size = pool.size if pool is not None else 0
+        free = pool.freesize if pool is not None else 0
+        return DatabasePoolStatsDTO(
+            min_size=self.min_connections,
+            max_size=self.max_connections,
+            size=size,
+            free=free,
+            used=size - free,
+            acquired=counters.acquired,
+            waited=counters.waited,
+            timeouts=counters.timeouts,
+            acquire_seconds_avg=(
+                counters.acquire_seconds_total / counters.acquired if counters.acquired else 0.0
+            ),
+            acquire_seconds_max=counters.acquire_seconds_max,
+        )
@@ -1,17 +1,25 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 import fastapi_jsonrpc as jsonrpc
-import jinja2
 from aioredis import Redis
+from peewee_async import Manager
 from fastapi.middleware.cors import CORSMiddleware
-from jinja2 import FileSystemLoader
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from common.hasher import Hasher
+from common.image_processor import ImageProcessor
+from common.service.coworking_transfer_service import CoworkingTransferService
+from common.service.email_outbox_worker import EmailOutboxWorker
+from common.service.image_upload_service import ImageUploadService
+from common.service.reservation_lifecycle_worker import ReservationLifecycleWorker
 from common.service.reset_password_send_service import PasswordResetSendService
+from common.service.smtp_email_sender import SMTPEmailSender
 from common.session import TokenService
+from common.template_registry import TemplateRegistry
+from common.utils import LRUCache
 from controllers.middlewares import AuthMiddleware
-from controllers.rest import ImageRouter
+from controllers.rest import HealthRouter, ImageRouter
 from controllers.rpc import (
     AuthRouter,
     ReservationRouter,
@@ -24,37 +32,37 @@ from infrastructure.config import (
     RedisSettings,
     ObjectStorageSettings,
     InfrastructureSettings,
-    SMTPSettings
+    SMTPSettings,
+    CoworkingCacheSettings,
+    CoworkingTransferSettings,
+    UserCacheSettings,
+    HasherSettings,
+    ImageCacheSettings,
+    ImageProcessingSettings,
+    EmailOutboxSettings,
+    ReservationLifecycleSettings,
+    TemplateSettings
 )
-from infrastructure.database.db import manager, database
-from infrastructure.database.models import *
+from infrastructure.database.db import create_database, database, db_settings
 from infrastructure.logging import configure_logging
 from storage.coworking import CoworkingRepository
+from storage.coworking_cache import RedisCoworkingCache
 from storage.coworking_event import CoworkingEventRepository
+from storage.email_outbox import RedisEmailOutbox
 from storage.password_reset_token import PasswordResetTokenRepository
+from storage.recent_writes import RedisRecentWrites
+from storage.reservation import SeatOccupancyIndex
 from storage.reservation.reservation_repository import ReservationRepository
+from storage.routing_manager import RoutingManager
+from storage.image_cache import LocalImageCache
 from storage.s3_repository import S3Repository
 from storage.session import RedisSessionRepository
 from storage.user import UserRepository
 
 
-@asynccontextmanager
-async def lifespan(_api: jsonrpc.API):
-    models = [
-        User,
-        Coworking,
-        Reservation,
-        CoworkingSeat,
-        CoworkingEvent,
-        CoworkingImages,
-        WorkingSchedule,
-        EmailAuthData,
-        PasswordResetToken,
-        TechCapability
-    ]
-    with database:
-        database.create_tables(models)
-    yield
+def _create_executor(kind: str, max_workers: int) -> Executor:
+    executor_class = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+    return executor_class(max_workers=max_workers)
 
 
 def _create_app() -> jsonrpc.API:
@@ -65,39 +73,115 @@ def _create_app() -> jsonrpc.API:
     redis_settings = RedisSettings()
     object_storage_settings = ObjectStorageSettings()
     smtp_settings = SMTPSettings()
+    email_outbox_settings = EmailOutboxSettings()
     infra_settings = InfrastructureSettings()
-
-    jinja2_env = jinja2.Environment(
-        loader=FileSystemLoader('/templates'),
-        enable_async=True
+    coworking_cache_settings = CoworkingCacheSettings()
+    coworking_transfer_settings = CoworkingTransferSettings()
+    user_cache_settings = UserCacheSettings()
+    hasher_settings = HasherSettings()
+    image_cache_settings = ImageCacheSettings()
+    image_processing_settings = ImageProcessingSettings()
+    template_settings = TemplateSettings()
+    reservation_lifecycle_settings = ReservationLifecycleSettings()
+
+    template_registry = TemplateRegistry(
+        template_settings.TEMPLATES_DIR, template_settings.TEMPLATES_BYTECODE_CACHE_DIR
     )
 
     redis = Redis(host=redis_settings.REDIS_HOST, port=redis_settings.REDIS_PORT)
 
     # Initialize utils, repositories and etc.
-    hasher = Hasher()
-    user_repository = UserRepository(manager, hasher)
+    manager = RoutingManager(
+        database,
+        [
+            Manager(create_database(db_settings, host, port))
+            for host, port in db_settings.replica_hosts
+        ],
+        RedisRecentWrites(redis, db_settings.replica_sticky_ttl)
+    )
+    hasher = Hasher(
+        _create_executor(hasher_settings.HASHER_EXECUTOR, hasher_settings.HASHER_MAX_WORKERS),
+        hasher_settings.HASHER_MAX_CONCURRENCY
+    )
+    image_processor = ImageProcessor(
+        _create_executor(
+            image_processing_settings.IMAGE_PROCESSING_EXECUTOR,
+            image_processing_settings.IMAGE_PROCESSING_MAX_WORKERS
+        ),
+        image_processing_settings.IMAGE_PROCESSING_MAX_CONCURRENCY
+    )
+    user_repository = UserRepository(
+        manager,
+        hasher,
+        LRUCache(user_cache_settings.USER_CACHE_SIZE, user_cache_settings.cache_ttl)
+    )
     coworking_repository = CoworkingRepository(manager)
+    coworking_cache = RedisCoworkingCache(
+        redis,
+        coworking_cache_settings.cache_ttl,
+        LRUCache(
+            coworking_cache_settings.COWORKING_LOCAL_CACHE_SIZE,
+            coworking_cache_settings.local_cache_ttl
+        )
+    )
     session_repository = RedisSessionRepository(redis, application_settings.session_ttl)
     coworking_event_repository = CoworkingEventRepository(manager)
     token_service = TokenService(
         application_settings.SECRET_KEY, application_settings.access_token_ttl
     )
     s3_repository = S3Repository(object_storage_settings)
-    reservation_repository = ReservationRepository(manager)
+    image_cache = LocalImageCache(
+        image_cache_settings.IMAGE_CACHE_DIR, image_cache_settings.IMAGE_CACHE_MAX_BYTES
+    )
+    image_upload_service = ImageUploadService(
+        s3_repository,
+        image_processor,
+        image_processing_settings.IMAGE_UPLOAD_MAX_BYTES,
+        image_processing_settings.IMAGE_UPLOAD_MAX_CONCURRENCY
+    )
+    reservation_repository = ReservationRepository(manager, SeatOccupancyIndex())
     password_reset_token_repo = PasswordResetTokenRepository(manager)
 
     # Services
+    email_outbox = RedisEmailOutbox(
+        redis,
+        email_outbox_settings.EMAIL_OUTBOX_STREAM,
+        email_outbox_settings.claim_idle,
+        email_outbox_settings.EMAIL_OUTBOX_DEAD_LETTER_MAXLEN
+    )
+    email_outbox_worker = EmailOutboxWorker(
+        email_outbox,
+        SMTPEmailSender(smtp_settings),
+        email_outbox_settings.EMAIL_OUTBOX_BATCH_SIZE,
+        email_outbox_settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        retry_delay=email_outbox_settings.retry_delay
+    )
+    reservation_lifecycle_worker = ReservationLifecycleWorker(
+        reservation_repository,
+        reservation_lifecycle_settings.interval,
+        reservation_lifecycle_settings.confirm_window,
+        reservation_lifecycle_settings.no_show_grace,
+        reservation_lifecycle_settings.RESERVATION_LIFECYCLE_BATCH_SIZE
+    )
+    coworking_transfer_service = CoworkingTransferService(
+        coworking_repository,
+        coworking_transfer_settings.COWORKING_IMPORT_CHUNK_SIZE,
+        coworking_transfer_settings.COWORKING_IMPORT_MAX_LINE_BYTES,
+        coworking_transfer_settings.COWORKING_EXPORT_PAGE_SIZE
+    )
     send_reset_password_message_service = PasswordResetSendService(
-        jinja2_env, smtp_settings, infra_settings
+        template_registry, email_outbox, infra_settings
     )
 
     # Initialize routers
     auth_router = AuthRouter(user_repository, hasher, token_service, session_repository)
-    image_router = ImageRouter(user_repository, s3_repository)
+    image_router = ImageRouter(
+        user_repository, s3_repository, image_cache, image_upload_service
+    )
+    health_router = HealthRouter(database, redis)
     user_router = UserRouter(user_repository, token_service)
     reservation_router = ReservationRouter(reservation_repository)
-    coworking_router = CoworkingRouter(coworking_repository)
+    coworking_router = CoworkingRouter(coworking_repository, coworking_cache)
     user_settings_router = UserSettingsRouter(
         user_repository,
         password_reset_token_repo,
@@ -105,16 +189,34 @@ def _create_app() -> jsonrpc.API:
         hasher
     )
     admin_coworking_router = AdminCoworkingRouter(
-        coworking_repository, coworking_event_repository, s3_repository
+        coworking_repository,
+        coworking_event_repository,
+        image_upload_service,
+        coworking_cache,
+        coworking_transfer_service
     )
 
     # Middlewares
 
+    @asynccontextmanager
+    async def lifespan(_api: jsonrpc.API):
+        await s3_repository.start()
+        email_outbox_worker.start()
+        reservation_lifecycle_worker.start()
+        yield
+        await reservation_lifecycle_worker.stop()
+        await email_outbox_worker.stop()
+        await s3_repository.close()
+        hasher.close()
+        image_processor.close()
+        await manager.close()
+
     # Create app and register routers
     _app = jsonrpc.API(lifespan=lifespan)
     _app.bind_entrypoint(auth_router.build_entrypoint())
     _app.bind_entrypoint(coworking_router.build_entrypoint())
     _app.include_router(image_router.build_api_router())
+    _app.include_router(health_router.build_api_router())
     _app.bind_entrypoint(user_router.build_entrypoint())
     _app.bind_entrypoint(reservation_router.build_entrypoint())
     _app.bind_entrypoint(user_settings_router.build_entrypoint())
@@ -1,13 +1,21 @@
 from abc import ABC, abstractmethod
-from datetime import date
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Optional, List, Tuple, Dict
 
 from common.dto.coworking import CoworkingCreateDTO
 from common.dto.coworking_seat import CreateSeatDTO
-from common.dto.input_params import SearchParams, TimestampInterval
+from common.dto.coworking_transfer import CoworkingDocument
+from common.dto.input_params import SearchParams, TimestampInterval, RankedSearchParams
 from common.dto.schedule import ScheduleCreateDTO
 from common.dto.tech_capability import TechCapabilitySchema
-from infrastructure.database import Coworking, TechCapability, WorkingSchedule
+from infrastructure.database import (
+    Coworking,
+    TechCapability,
+    WorkingSchedule,
+    CoworkingSeat,
+    CoworkingEvent
+)
+from infrastructure.database.enum import PlaceType, Weekday
 
 
 class AbstractCoworkingRepository(ABC):
@@ -20,7 +28,14 @@ class AbstractCoworkingRepository(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def select_filter_by_timestamp_range(self, interval: TimestampInterval) -> List[Coworking]:
+    async def search(self, search_params: RankedSearchParams) -> List[Coworking]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def select_filter_by_timestamp_range(
+            self,
+            interval: TimestampInterval
+    ) -> List[Tuple[Coworking, Dict[PlaceType, int]]]:
         raise NotImplementedError()
 
     @abstractmethod
@@ -48,7 +63,37 @@ class AbstractCoworkingRepository(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def get_coworking_schedule_at_day(self, d: date) -> Optional[WorkingSchedule]:
+    async def get_schedules_for(
+            self,
+            coworking_ids: List[str],
+            weekday: Weekday
+    ) -> Dict[str, WorkingSchedule]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_schedules(self, coworking_id: str) -> List[WorkingSchedule]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_seats(self, coworking_id: str) -> List[CoworkingSeat]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_events_between(
+            self,
+            coworking_id: str,
+            date_from: date,
+            date_to: date
+    ) -> List[CoworkingEvent]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_reservation_intervals(
+            self,
+            coworking_id: str,
+            start: datetime,
+            end: datetime
+    ) -> List[Tuple[int, datetime, datetime]]:
         raise NotImplementedError()
 
     @abstractmethod
@@ -67,3 +112,11 @@ class AbstractCoworkingRepository(ABC):
             meeting_rooms: List[CreateSeatDTO]
     ):
         raise NotImplementedError()
+
+    @abstractmethod
+    async def import_coworking(self, document: CoworkingDocument) -> Coworking:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def export_coworkings(self, after_id: Optional[str], limit: int) -> List[Coworking]:
+        raise NotImplementedError()
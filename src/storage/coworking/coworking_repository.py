@@ -1,12 +1,14 @@
+import asyncio
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Any, Optional, List, Tuple, Dict, Type
 
 import peewee
-from peewee_async import Manager
 
 from common.dto.coworking import CoworkingCreateDTO
+from common.dto.coworking_event import CoworkingEventSchema
 from common.dto.coworking_seat import CreateSeatDTO
-from common.dto.input_params import SearchParams, TimestampInterval
+from common.dto.coworking_transfer import CoworkingDocument
+from common.dto.input_params import SearchParams, TimestampInterval, RankedSearchParams
 from common.dto.schedule import ScheduleCreateDTO
 from common.dto.tech_capability import TechCapabilitySchema
 from infrastructure.database import (
@@ -18,28 +20,75 @@ from infrastructure.database import (
     Reservation,
     TechCapability
 )
-from infrastructure.database.enum import BookingStatus, PlaceType
+from infrastructure.database.enum import BookingStatus, PlaceType, Weekday
+from storage.routing_manager import RoutingManager
 from .abstract_coworking_repository import AbstractCoworkingRepository
 
+# Число строк в одном INSERT: 1000 строк мест используют 5000 из 65535 параметров запроса
+INSERT_BATCH_SIZE = 1000
+
+# Выражение совпадает с индексом coworking_search_document_trgm_idx
+SEARCH_DOCUMENT = (
+    Coworking.title.concat(' ').concat(Coworking.institute)
+    .concat(' ').concat(Coworking.description)
+    .concat(' ').concat(Coworking.address)
+)
+
 
 class CoworkingRepository(AbstractCoworkingRepository):
-    def __init__(self, manager: Manager):
+    def __init__(self, manager: RoutingManager):
         self.manager = manager
 
     async def get_coworking_by_id(self, coworking_id: str) -> Optional[Coworking]:
-        try:
-            return await self.manager.get_or_none(
-                Coworking.select()
-                .where(Coworking.id == coworking_id)
-                .join(CoworkingSeat, peewee.JOIN.LEFT_OUTER)
-                .switch(Coworking).join(WorkingSchedule, peewee.JOIN.LEFT_OUTER)
-                .switch(Coworking).join(CoworkingImages, peewee.JOIN.LEFT_OUTER)
-                .switch(Coworking).join(CoworkingEvent, peewee.JOIN.LEFT_OUTER)
-                .where((CoworkingEvent.id.is_null()) | (date.today() <= CoworkingEvent.date))
-                .switch(Coworking).join(TechCapability, peewee.JOIN.LEFT_OUTER)
-            )
-        except AttributeError:
+        """
+        Загружает коворкинг и его связанные сущности отдельным запросом на каждую связь.
+        Запросы выполняются конкурентно, поэтому число строк растет линейно от размера связей,
+        а не как их произведение при соединении таблиц.
+        Результат заполняет общий кэш коворкингов, поэтому чтение идет из основной базы:
+        отставшая реплика вернула бы в кэш данные, устаревшие после инвалидации
+        """
+        reader = self.manager
+        coworking: Optional[Coworking] = await reader.get_or_none(
+            Coworking, Coworking.id == coworking_id
+        )
+        if coworking is None:
             return None
+        seats, schedules, images, events, capabilities = await asyncio.gather(
+            reader.execute(
+                CoworkingSeat.select()
+                .where(CoworkingSeat.coworking == coworking_id)
+                .order_by(CoworkingSeat.id)
+            ),
+            reader.execute(
+                WorkingSchedule.select()
+                .where(WorkingSchedule.coworking == coworking_id)
+                .order_by(WorkingSchedule.week_day, WorkingSchedule.start_time)
+            ),
+            reader.execute(
+                CoworkingImages.select()
+                .where(CoworkingImages.coworking == coworking_id)
+                .order_by(CoworkingImages.id)
+            ),
+            reader.execute(
+                CoworkingEvent.select()
+                .where(
+                    (CoworkingEvent.coworking == coworking_id) &
+                    (CoworkingEvent.date >= date.today())
+                )
+                .order_by(CoworkingEvent.date)
+            ),
+            reader.execute(
+                TechCapability.select()
+                .where(TechCapability.coworking == coworking_id)
+                .order_by(TechCapability.id)
+            ),
+        )
+        coworking.seats = list(seats)
+        coworking.working_schedules = list(schedules)
+        coworking.images = list(images)
+        coworking.events = list(events)
+        coworking.technical_capabilities = list(capabilities)
+        return coworking
 
     async def find_by_search_params(self, search_params: SearchParams) -> List[Coworking]:
         not_null_filter_dict = search_params.model_dump(exclude_none=True)
@@ -47,40 +96,85 @@ class CoworkingRepository(AbstractCoworkingRepository):
         for attr, value in not_null_filter_dict.items():
             entity_attr: peewee.Field = getattr(Coworking, attr)
             query = query.where(entity_attr.contains(value.strip()))
-        return await self.manager.execute(query)
+        reader = await self.manager.reader()
+        return await reader.execute(query)
 
-    async def select_filter_by_timestamp_range(self, interval: TimestampInterval) -> List[Coworking]:
+    async def search(self, search_params: RankedSearchParams) -> List[Coworking]:
+        """
+        Нечеткий поиск по названию, институту, описанию и адресу с ранжированием по
+        word_similarity. Условие <% использует GIN-индекс по триграммам SEARCH_DOCUMENT
+        """
+        value = search_params.query.strip()
+        rank = peewee.fn.word_similarity(value, SEARCH_DOCUMENT)
         query = (
-            Coworking.select().distinct()
-            # Фильтрация по времени работы коворкинга
-            .join(WorkingSchedule, peewee.JOIN.LEFT_OUTER)
+            Coworking.select()
+            .where(peewee.Expression(value, '<%%', SEARCH_DOCUMENT))
+            .order_by(rank.desc(), Coworking.id)
+            .limit(search_params.limit)
+            .offset(search_params.offset)
+        )
+        reader = await self.manager.reader()
+        return await reader.execute(query)
+
+    async def select_filter_by_timestamp_range(
+            self,
+            interval: TimestampInterval
+    ) -> List[Tuple[Coworking, Dict[PlaceType, int]]]:
+        """
+        Коворкинги, открытые в течение интервала и имеющие свободные места.
+        Место свободно, если у него нет неотмененного бронирования, пересекающего интервал.
+        Свободные места считаются группировкой по (коворкинг, тип места), без строк
+        на каждую пару место × бронирование
+        :return: Коворкинги с количеством свободных мест каждого типа
+        """
+        event = (
+            CoworkingEvent.select(CoworkingEvent.id)
             .where(
-                (WorkingSchedule.id.is_null()) |
-                (
-                        (WorkingSchedule.week_day == interval.start.weekday()) &
-                        (WorkingSchedule.start_time <= interval.start.time()) &
-                        (interval.end.time() <= WorkingSchedule.end_time)
-                )
+                (CoworkingEvent.coworking == Coworking.id) &
+                (CoworkingEvent.date == interval.start.date())
             )
-            # Проверка, работает ли коворкинг в указанный день
-            .switch(Coworking)
-            .join(CoworkingEvent, peewee.JOIN.LEFT_OUTER)
+        )
+        any_schedule = (
+            WorkingSchedule.select(WorkingSchedule.id)
+            .where(WorkingSchedule.coworking == Coworking.id)
+        )
+        # Коворкинг без расписания считается работающим всегда
+        covering_schedule = any_schedule.where(
+            (WorkingSchedule.week_day == interval.start.weekday()) &
+            (WorkingSchedule.start_time <= interval.start.time()) &
+            (interval.end.time() <= WorkingSchedule.end_time)
+        )
+        # Условия совпадают с индексом reservation_seat_session_active_idx
+        overlapping = (
+            Reservation.select(Reservation.id)
             .where(
-                (CoworkingEvent.date.is_null()) |
-                (CoworkingEvent.date != interval.start.date())
+                (Reservation.seat == CoworkingSeat.id) &
+                (Reservation.status != BookingStatus.CANCELLED) &
+                (Reservation.session_end > interval.start) &
+                (Reservation.session_start < interval.end)
             )
-            # Проверка, есть ли доступное свободное место в указанное время
-            .switch(Coworking)
-            .join(CoworkingSeat, peewee.JOIN.LEFT_OUTER)
-            .join(Reservation, peewee.JOIN.LEFT_OUTER)
+        )
+        free = peewee.fn.COUNT(CoworkingSeat.id)
+        query = (
+            Coworking.select(Coworking, CoworkingSeat.place_type, free.alias('free'))
+            .join(CoworkingSeat)
             .where(
-                (Reservation.id.is_null()) |
-                (Reservation.status == BookingStatus.CANCELLED) |
-                (Reservation.session_end <= interval.start) |
-                (Reservation.session_start >= interval.end)
+                ~peewee.fn.EXISTS(event) &
+                (~peewee.fn.EXISTS(any_schedule) | peewee.fn.EXISTS(covering_schedule)) &
+                ~peewee.fn.EXISTS(overlapping)
             )
+            .group_by(Coworking.id, CoworkingSeat.place_type)
+            .order_by(Coworking.id)
+            .objects()
         )
-        return await self.manager.execute(query)
+        reader = await self.manager.reader()
+        result: Dict[str, Tuple[Coworking, Dict[PlaceType, int]]] = {}
+        for row in await reader.execute(query):
+            _, counts = result.setdefault(
+                row.id, (row, {place_type: 0 for place_type in PlaceType})
+            )
+            counts[PlaceType(row.place_type)] = row.free
+        return list(result.values())
 
     async def get(self, coworking_id: str) -> Optional[Coworking]:
         coworking = await self.manager.get_or_none(Coworking, Coworking.id == coworking_id)
@@ -101,40 +195,94 @@ class CoworkingRepository(AbstractCoworkingRepository):
             coworking: Coworking,
             capabilities: List[TechCapabilitySchema]
     ) -> List[TechCapability]:
-        result = []
-        async with self.manager.transaction():
-            for capability in capabilities:
-                created = await self.manager.create(
-                    TechCapability,
-                    coworking=coworking,
-                    capability=capability.capability
-                )
-                result.append(created)
+        return await self._insert_returning(
+            TechCapability, coworking, self._capability_rows(coworking, capabilities)
+        )
+
+    async def get_schedules_for(
+            self,
+            coworking_ids: List[str],
+            weekday: Weekday
+    ) -> Dict[str, WorkingSchedule]:
+        """
+        Загружает расписания коворкингов на день недели одним запросом
+        :return: Самое раннее расписание на день недели по идентификатору коворкинга
+        """
+        if not coworking_ids:
+            return {}
+        schedules: List[WorkingSchedule] = await self.manager.execute(
+            WorkingSchedule.select()
+            .where(
+                (WorkingSchedule.coworking.in_(coworking_ids)) &
+                (WorkingSchedule.week_day == weekday)
+            )
+            .order_by(WorkingSchedule.start_time)
+        )
+        result = {}
+        for schedule in schedules:
+            result.setdefault(schedule.coworking_id, schedule)
         return result
 
-    async def get_coworking_schedule_at_day(self, d: date | datetime) -> Optional[WorkingSchedule]:
-        return await self.manager.get_or_none(
-            WorkingSchedule,
-            WorkingSchedule.week_day == d.weekday()
+    async def get_schedules(self, coworking_id: str) -> List[WorkingSchedule]:
+        return await self.manager.execute(
+            WorkingSchedule.select().where(WorkingSchedule.coworking == coworking_id)
+        )
+
+    async def get_seats(self, coworking_id: str) -> List[CoworkingSeat]:
+        return await self.manager.execute(
+            CoworkingSeat.select()
+            .where(CoworkingSeat.coworking == coworking_id)
+            .order_by(CoworkingSeat.id)
+        )
+
+    async def get_events_between(
+            self,
+            coworking_id: str,
+            date_from: date,
+            date_to: date
+    ) -> List[CoworkingEvent]:
+        return await self.manager.execute(
+            CoworkingEvent.select()
+            .where(
+                (CoworkingEvent.coworking == coworking_id) &
+                (CoworkingEvent.date.between(date_from, date_to))
+            )
+        )
+
+    async def get_reservation_intervals(
+            self,
+            coworking_id: str,
+            start: datetime,
+            end: datetime
+    ) -> List[Tuple[int, datetime, datetime]]:
+        """
+        Возвращает неотмененные бронирования мест коворкинга, пересекающиеся с интервалом
+        :return: Кортежи (seat_id, session_start, session_end), отсортированные по месту и началу
+        """
+        query = (
+            Reservation.select(
+                Reservation.seat, Reservation.session_start, Reservation.session_end
+            )
+            .join(CoworkingSeat)
+            .where(
+                (CoworkingSeat.coworking == coworking_id) &
+                (Reservation.status != BookingStatus.CANCELLED) &
+                (Reservation.session_start < end) &
+                (Reservation.session_end > start)
+            )
+            .order_by(Reservation.seat, Reservation.session_start)
+            .tuples()
         )
+        return list(await self.manager.execute(query))
 
     async def register_schedule(
             self,
             coworking: Coworking,
             schedules: List[ScheduleCreateDTO]
     ) -> List[WorkingSchedule]:
-        result = []
-        async with self.manager.transaction():
-            for schema in schedules:
-                schedule = await self.manager.create(
-                    WorkingSchedule,
-                    coworking=coworking,
-                    week_day=schema.week_day,
-                    start_time=schema.start_time,
-                    end_time=schema.end_time,
-                )
-                result.append(schedule)
-        return result
+        return await self._insert_returning(
+            WorkingSchedule, coworking, self._schedule_rows(coworking, schedules)
+        )
 
     async def create_places(
             self,
@@ -142,27 +290,175 @@ class CoworkingRepository(AbstractCoworkingRepository):
             table_places: int,
             meeting_rooms: List[CreateSeatDTO]
     ) -> List[CoworkingSeat]:
-        result = []
+        return await self._insert_returning(
+            CoworkingSeat, coworking, self._seat_rows(coworking, table_places, meeting_rooms)
+        )
+
+    async def import_coworking(self, document: CoworkingDocument) -> Coworking:
+        """
+        Создает коворкинг вместе с местами, расписанием, событиями и техническими
+        возможностями в одной транзакции, каждая связь вставляется многострочным INSERT
+        """
         async with self.manager.transaction():
-            for _ in range(table_places):
-                table_place: CoworkingSeat = await self.manager.create(
-                    CoworkingSeat,
-                    coworking=coworking,
-                    label=None,
-                    description=None,
-                    place_type=PlaceType.TABLE,
-                    seats_count=1,
-                )
-                result.append(table_place)
-
-            for room in meeting_rooms:
-                meeting_room = await self.manager.create(
-                    CoworkingSeat,
-                    coworking=coworking,
-                    label=room.label,
-                    description=room.description,
-                    place_type=PlaceType.MEETING_ROOM,
-                    seats_count=room.seats_count
-                )
-                result.append(meeting_room)
-        return result
+            coworking: Coworking = await self.manager.create(
+                Coworking, **document.model_dump(include=set(CoworkingCreateDTO.model_fields))
+            )
+            coworking.seats = await self._insert_returning(
+                CoworkingSeat, coworking,
+                self._seat_rows(coworking, document.table_places, document.meeting_rooms)
+            )
+            coworking.working_schedules = await self._insert_returning(
+                WorkingSchedule, coworking,
+                self._schedule_rows(coworking, document.working_schedules)
+            )
+            coworking.events = await self._insert_returning(
+                CoworkingEvent, coworking, self._event_rows(coworking, document.events)
+            )
+            coworking.technical_capabilities = await self._insert_returning(
+                TechCapability, coworking,
+                self._capability_rows(coworking, document.technical_capabilities)
+            )
+        return coworking
+
+    async def export_coworkings(self, after_id: Optional[str], limit: int) -> List[Coworking]:
+        """
+        Страница коворкингов по возрастанию id со связанными сущностями.
+        Связи загружаются одним запросом на связь для всей страницы
+        :param after_id: id последнего коворкинга предыдущей страницы
+        """
+        reader = await self.manager.reader()
+        query = Coworking.select().order_by(Coworking.id).limit(limit)
+        if after_id is not None:
+            query = query.where(Coworking.id > after_id)
+        coworkings: List[Coworking] = list(await reader.execute(query))
+        if not coworkings:
+            return []
+        ids = [coworking.id for coworking in coworkings]
+        seats, schedules, events, capabilities = await asyncio.gather(
+            reader.execute(
+                CoworkingSeat.select()
+                .where(CoworkingSeat.coworking.in_(ids))
+                .order_by(CoworkingSeat.id)
+            ),
+            reader.execute(
+                WorkingSchedule.select()
+                .where(WorkingSchedule.coworking.in_(ids))
+                .order_by(WorkingSchedule.week_day, WorkingSchedule.start_time)
+            ),
+            reader.execute(
+                CoworkingEvent.select()
+                .where(CoworkingEvent.coworking.in_(ids))
+                .order_by(CoworkingEvent.date)
+            ),
+            reader.execute(
+                TechCapability.select()
+                .where(TechCapability.coworking.in_(ids))
+                .order_by(TechCapability.id)
+            ),
+        )
+        for coworking in coworkings:
+            coworking.seats = []
+            coworking.working_schedules = []
+            coworking.events = []
+            coworking.technical_capabilities = []
+        by_id = {coworking.id: coworking for coworking in coworkings}
+        for relation, items in (
+                ('seats', seats),
+                ('working_schedules', schedules),
+                ('events', events),
+                ('technical_capabilities', capabilities),
+        ):
+            for item in items:
+                getattr(by_id[item.coworking_id], relation).append(item)
+        return coworkings
+
+    @staticmethod
+    def _seat_rows(
+            coworking: Coworking,
+            table_places: int,
+            meeting_rooms: List[CreateSeatDTO]
+    ) -> List[Dict[peewee.Field, Any]]:
+        table_place = {
+            CoworkingSeat.coworking: coworking,
+            CoworkingSeat.label: None,
+            CoworkingSeat.description: None,
+            CoworkingSeat.place_type: PlaceType.TABLE,
+            CoworkingSeat.seats_count: 1,
+        }
+        return [table_place] * table_places + [
+            {
+                CoworkingSeat.coworking: coworking,
+                CoworkingSeat.label: room.label,
+                CoworkingSeat.description: room.description,
+                CoworkingSeat.place_type: PlaceType.MEETING_ROOM,
+                CoworkingSeat.seats_count: room.seats_count,
+            }
+            for room in meeting_rooms
+        ]
+
+    @staticmethod
+    def _schedule_rows(
+            coworking: Coworking,
+            schedules: List[ScheduleCreateDTO]
+    ) -> List[Dict[peewee.Field, Any]]:
+        return [
+            {
+                WorkingSchedule.coworking: coworking,
+                WorkingSchedule.week_day: schema.week_day,
+                WorkingSchedule.start_time: schema.start_time,
+                WorkingSchedule.end_time: schema.end_time,
+            }
+            for schema in schedules
+        ]
+
+    @staticmethod
+    def _event_rows(
+            coworking: Coworking,
+            events: List[CoworkingEventSchema]
+    ) -> List[Dict[peewee.Field, Any]]:
+        return [
+            {
+                CoworkingEvent.coworking: coworking,
+                CoworkingEvent.date: event.event_date,
+                CoworkingEvent.name: event.name,
+                CoworkingEvent.description: event.description,
+            }
+            for event in events
+        ]
+
+    @staticmethod
+    def _capability_rows(
+            coworking: Coworking,
+            capabilities: List[TechCapabilitySchema]
+    ) -> List[Dict[peewee.Field, Any]]:
+        return [
+            {TechCapability.coworking: coworking, TechCapability.capability: item.capability}
+            for item in capabilities
+        ]
+
+    async def _insert_returning(
+            self,
+            model: Type[peewee.Model],
+            coworking: Coworking,
+            rows: List[Dict[peewee.Field, Any]]
+    ) -> List[peewee.Model]:
+        """
+        Вставляет строки многострочными INSERT ... RETURNING пачками по INSERT_BATCH_SIZE.
+        Одна пачка атомарна сама по себе, транзакция открывается только для нескольких пачек
+        :return: Созданные записи в порядке rows
+        """
+        if not rows:
+            return []
+        batches = list(peewee.chunked(rows, INSERT_BATCH_SIZE))
+        if len(batches) == 1:
+            created = list(await self.manager.execute(model.insert_many(rows).returning(model)))
+        else:
+            created = []
+            async with self.manager.transaction():
+                for batch in batches:
+                    created.extend(
+                        await self.manager.execute(model.insert_many(batch).returning(model))
+                    )
+        for item in created:
+            item.coworking = coworking
+        return created
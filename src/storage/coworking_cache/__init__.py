@@ -0,0 +1,2 @@
+from .abstract_coworking_cache import AbstractCoworkingCache
+from .redis_coworking_cache import RedisCoworkingCache
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from common.dto.coworking import CoworkingDetailDTO
+
+
+class AbstractCoworkingCache(ABC):
+    @abstractmethod
+    async def get(self, coworking_id: str) -> Optional[CoworkingDetailDTO]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def set(self, coworking: CoworkingDetailDTO) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def invalidate(self, coworking_id: str) -> None:
+        raise NotImplementedError()
@@ -0,0 +1,60 @@
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from aioredis import Redis, RedisError
+
+from common.dto.coworking import CoworkingDetailDTO
+from common.utils import LRUCache
+from .abstract_coworking_cache import AbstractCoworkingCache
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCoworkingCache(AbstractCoworkingCache):
+    """
+    Read-through кэш детальной информации о коворкинге.
+    Перед Redis находится внутрипроцессный LRU-кэш с коротким временем жизни: явная инвалидация
+    доходит только до процесса, обработавшего изменение, остальные процессы увидят изменения
+    по истечении времени жизни локальной записи
+    """
+    KEY_PREFIX = 'coworking:detail:'
+
+    def __init__(self, redis: Redis, ttl: timedelta, local_cache: LRUCache[CoworkingDetailDTO]):
+        self.__redis = redis
+        self.__ttl = ttl
+        self.__local_cache = local_cache
+
+    async def get(self, coworking_id: str) -> Optional[CoworkingDetailDTO]:
+        coworking: Optional[CoworkingDetailDTO] = self.__local_cache.get(coworking_id)
+        if coworking is not None:
+            return coworking
+        try:
+            cached = await self.__redis.get(self.__key(coworking_id))
+        except RedisError as exc:
+            logger.warning("Failed to read Coworking(id=%s) from cache: %s", coworking_id, exc)
+            return None
+        if not cached:
+            return None
+        coworking = CoworkingDetailDTO.model_validate_json(cached)
+        self.__local_cache.put(coworking_id, coworking)
+        return coworking
+
+    async def set(self, coworking: CoworkingDetailDTO) -> None:
+        self.__local_cache.put(coworking.id, coworking)
+        try:
+            await self.__redis.setex(
+                self.__key(coworking.id), self.__ttl, coworking.model_dump_json()
+            )
+        except RedisError as exc:
+            logger.warning("Failed to write Coworking(id=%s) to cache: %s", coworking.id, exc)
+
+    async def invalidate(self, coworking_id: str) -> None:
+        self.__local_cache.pop(coworking_id)
+        try:
+            await self.__redis.delete(self.__key(coworking_id))
+        except RedisError as exc:
+            logger.warning("Failed to invalidate Coworking(id=%s) in cache: %s", coworking_id, exc)
+
+    def __key(self, coworking_id: str) -> str:
+        return f'{self.KEY_PREFIX}{coworking_id}'
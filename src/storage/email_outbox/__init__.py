@@ -0,0 +1,2 @@
+from .abstract_email_outbox import AbstractEmailOutbox
+from .redis_email_outbox import RedisEmailOutbox
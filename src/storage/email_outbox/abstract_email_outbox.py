@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import List, Tuple
+
+from common.dto.email import EmailMessageDTO
+
+
+class AbstractEmailOutbox(ABC):
+    @abstractmethod
+    async def enqueue(self, message: EmailMessageDTO) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def receive(
+            self,
+            consumer: str,
+            count: int,
+            block: timedelta
+    ) -> List[Tuple[str, EmailMessageDTO]]:
+        """
+        :return: Пары (идентификатор записи, письмо), которые нужно подтвердить после обработки
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def ack(self, *entry_ids: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def retry(self, entry_id: str, message: EmailMessageDTO) -> None:
+        """Возвращает письмо в очередь с увеличенным счетчиком попыток"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def dead_letter(self, entry_id: str, message: EmailMessageDTO) -> None:
+        """Убирает письмо из очереди после исчерпания попыток отправки"""
+        raise NotImplementedError()
@@ -0,0 +1,151 @@
+import re
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from aioredis import Redis
+from aioredis.exceptions import ResponseError
+
+from common.dto.email import EmailMessageDTO
+from .abstract_email_outbox import AbstractEmailOutbox
+
+# Параметр token в ссылках письма, например в ссылке смены пароля
+_TOKEN_PARAMETER = re.compile(r'([?&;]token=)[^&#"\'\s<]+')
+REDACTED = '[redacted]'
+
+
+def redact_tokens(message: EmailMessageDTO) -> EmailMessageDTO:
+    """:return: Копия письма, в ссылках которой значения token заменены на REDACTED"""
+    return message.model_copy(
+        update={'html': _TOKEN_PARAMETER.sub(rf'\g<1>{REDACTED}', message.html)}
+    )
+
+
+class RedisEmailOutbox(AbstractEmailOutbox):
+    """
+    Очередь исходящих писем на Redis Stream с группой потребителей.
+    Письмо удаляется из потока только после подтверждения отправки. Записи, зависшие
+    у остановленного потребителя дольше claim_idle, забирает другой потребитель.
+    Основной поток не обрезается: подтвержденные письма удаляются из него сразу, а обрезка
+    по длине могла бы удалить еще не отправленные письма. Длина ограничивается только
+    у dead letter потока, в который письма попадают без токенов из ссылок
+    """
+
+    GROUP = 'email-senders'
+    FIELD = 'message'
+
+    def __init__(
+            self,
+            redis: Redis,
+            stream: str,
+            claim_idle: timedelta,
+            dead_letter_maxlen: Optional[int] = None
+    ):
+        self.__redis = redis
+        self.stream = stream
+        self.dead_letter_stream = f'{stream}:dead'
+        self.__claim_idle_ms = int(claim_idle.total_seconds() * 1000)
+        self.__dead_letter_maxlen = dead_letter_maxlen
+        self.__group_created = False
+
+    async def enqueue(self, message: EmailMessageDTO) -> None:
+        await self.__redis.xadd(self.stream, {self.FIELD: message.model_dump_json()})
+
+    async def receive(
+            self,
+            consumer: str,
+            count: int,
+            block: timedelta
+    ) -> List[Tuple[str, EmailMessageDTO]]:
+        await self.__ensure_group()
+        try:
+            claimed = await self.__claim_stale(consumer, count)
+        except ResponseError as exc:
+            # Поток удален вместе с группой: создаем группу заново и читаем новые письма
+            if 'NOGROUP' not in str(exc):
+                raise
+            self.__group_created = False
+            await self.__ensure_group()
+            claimed = []
+        if claimed:
+            return claimed
+        response = await self.__redis.xreadgroup(
+            self.GROUP,
+            consumer,
+            {self.stream: '>'},
+            count=count,
+            block=int(block.total_seconds() * 1000)
+        )
+        if not response:
+            return []
+        _, entries = response[0]
+        return self.__parse_entries(entries)
+
+    async def ack(self, *entry_ids: str) -> None:
+        if not entry_ids:
+            return
+        async with self.__redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.GROUP, *entry_ids)
+            pipe.xdel(self.stream, *entry_ids)
+            await pipe.execute()
+
+    async def retry(self, entry_id: str, message: EmailMessageDTO) -> None:
+        await self.__move(entry_id, message, self.stream, None)
+
+    async def dead_letter(self, entry_id: str, message: EmailMessageDTO) -> None:
+        await self.__move(
+            entry_id, redact_tokens(message), self.dead_letter_stream, self.__dead_letter_maxlen
+        )
+
+    async def __move(
+            self,
+            entry_id: str,
+            message: EmailMessageDTO,
+            stream: str,
+            maxlen: Optional[int]
+    ) -> None:
+        async with self.__redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                stream, {self.FIELD: message.model_dump_json()},
+                maxlen=maxlen, approximate=False
+            )
+            pipe.xack(self.stream, self.GROUP, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+    async def __ensure_group(self) -> None:
+        if self.__group_created:
+            return
+        try:
+            await self.__redis.xgroup_create(self.stream, self.GROUP, id='0', mkstream=True)
+        except ResponseError as exc:
+            if 'BUSYGROUP' not in str(exc):
+                raise
+        self.__group_created = True
+
+    async def __claim_stale(self, consumer: str, count: int) -> List[Tuple[str, EmailMessageDTO]]:
+        # В aioredis 2.0 нет обертки для XAUTOCLAIM, команда доступна с Redis 6.2
+        response = await self.__redis.execute_command(
+            'XAUTOCLAIM', self.stream, self.GROUP, consumer,
+            self.__claim_idle_ms, '0-0', 'COUNT', count
+        )
+        entries = response[1]
+        # Redis 6.2 возвращает удаленные из потока записи без полей и оставляет их в PEL
+        deleted = [entry[0] for entry in entries if entry and not entry[1]]
+        if deleted:
+            await self.__redis.xack(self.stream, self.GROUP, *deleted)
+        return self.__parse_entries(entries)
+
+    def __parse_entries(self, entries) -> List[Tuple[str, EmailMessageDTO]]:
+        result = []
+        for entry in entries:
+            if not entry or not entry[1]:
+                continue
+            entry_id, fields = entry
+            if isinstance(fields, list):
+                fields = dict(zip(fields[::2], fields[1::2]))
+            data = fields.get(self.FIELD.encode()) or fields.get(self.FIELD)
+            result.append((
+                entry_id.decode() if isinstance(entry_id, bytes) else entry_id,
+                EmailMessageDTO.model_validate_json(data)
+            ))
+        return result
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Protocol
+
+from common.utils.image_validators import SIGNATURE_LENGTH, detect_image_media_type
+
+logger = logging.getLogger(__name__)
+
+_TEMP_SUFFIX = '.part'
+# Каталог с ETag файлов кэша. Имя с точкой в начале не может совпасть с именем файла кэша
+_META_DIRECTORY = '.meta'
+
+
+class CacheSource(Protocol):
+    """Источник файла для кэша, например объект S3"""
+    etag: Optional[str]
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        ...
+
+
+class LocalImageCache:
+    """
+    Ограниченный по размеру LRU-кэш изображений на локальном диске.
+    Имена файлов уникальны для каждой загрузки, поэтому содержимое по имени никогда не меняется
+    и записи не требуют проверки актуальности. Для каждого файла хранится тип изображения,
+    определенный по его сигнатуре, и ETag источника, сохраняемый рядом с файлом
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._media_types: Dict[str, Optional[str]] = {}
+        self._etags: Dict[str, Optional[str]] = {}
+        self._total_bytes = 0
+        self._pending: Dict[str, asyncio.Future] = {}
+        os.makedirs(os.path.join(directory, _META_DIRECTORY), exist_ok=True)
+        self.__load()
+
+    def get(self, filename: str) -> Optional[str]:
+        """
+        :return: Путь к файлу в кэше или None
+        """
+        if filename not in self._sizes:
+            return None
+        path = self.path(filename)
+        if not os.path.exists(path):
+            self.__forget(filename)
+            return None
+        self._sizes.move_to_end(filename)
+        return path
+
+    def media_type(self, filename: str) -> Optional[str]:
+        """
+        :return: Тип изображения по сигнатуре файла в кэше или None, если сигнатура неизвестна
+        """
+        return self._media_types.get(filename)
+
+    def etag(self, filename: str) -> Optional[str]:
+        """
+        :return: ETag источника, из которого заполнен файл, или None
+        """
+        return self._etags.get(filename)
+
+    async def put(self, filename: str, load: Callable[[], Awaitable[CacheSource]]) -> str:
+        """
+        Сохраняет файл в кэш. Одновременные запросы одного файла загружают его один раз,
+        а отключение клиента не прерывает общую загрузку
+        :param load: Открывает источник файла, вызывается только при загрузке
+        :return: Путь к файлу в кэше
+        """
+        if (path := self.get(filename)) is not None:
+            return path
+        pending = self._pending.get(filename)
+        if pending is None:
+            pending = asyncio.ensure_future(self.__write(filename, load))
+            self._pending[filename] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(filename, None))
+        return await asyncio.shield(pending)
+
+    async def __write(self, filename: str, load: Callable[[], Awaitable[CacheSource]]) -> str:
+        path = self.path(filename)
+        suffix = f'.{os.urandom(4).hex()}{_TEMP_SUFFIX}'
+        temp_path, temp_meta_path = f'{path}{suffix}', f'{self.__meta_path(filename)}{suffix}'
+        head = b''
+        size = 0
+        try:
+            source = await load()
+            with open(temp_path, 'wb') as file:
+                async for chunk in source:
+                    await asyncio.to_thread(file.write, chunk)
+                    if size < SIGNATURE_LENGTH:
+                        head += chunk[:SIGNATURE_LENGTH - size]
+                    size += len(chunk)
+            # ETag записывается раньше файла: файл без ETag удаляется при загрузке кэша
+            with open(temp_meta_path, 'w') as meta:
+                meta.write(source.etag or '')
+            os.replace(temp_meta_path, self.__meta_path(filename))
+            os.replace(temp_path, path)
+        except BaseException:
+            for temp in (temp_path, temp_meta_path):
+                if os.path.exists(temp):
+                    os.remove(temp)
+            raise
+        self._etags[filename] = source.etag
+        self._sizes[filename] = size
+        self._media_types[filename] = detect_image_media_type(head)
+        self._total_bytes += size
+        self.__evict()
+        return path
+
+    def discard(self, filename: str) -> None:
+        if filename not in self._sizes:
+            return
+        self.__forget(filename)
+        for path in (self.path(filename), self.__meta_path(filename)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def path(self, filename: str) -> str:
+        if os.path.basename(filename) != filename or filename in ('', '.', '..'):
+            raise ValueError(f"Invalid filename {filename!r}")
+        return os.path.join(self.directory, filename)
+
+    def __forget(self, filename: str) -> None:
+        self._total_bytes -= self._sizes.pop(filename, 0)
+        self._media_types.pop(filename, None)
+        self._etags.pop(filename, None)
+
+    def __meta_path(self, filename: str) -> str:
+        return os.path.join(self.directory, _META_DIRECTORY, os.path.basename(filename))
+
+    def __evict(self) -> None:
+        # Последний добавленный файл остается в кэше, даже если он больше лимита
+        while self._total_bytes > self.max_bytes and len(self._sizes) > 1:
+            filename = next(iter(self._sizes))
+            self.discard(filename)
+            logger.info("Image %s evicted from local cache", filename)
+
+    def __load(self) -> None:
+        """Восстанавливает индекс по файлам, оставшимся от предыдущего запуска"""
+        meta_directory = os.path.join(self.directory, _META_DIRECTORY)
+        etags = {}
+        for entry in os.scandir(meta_directory):
+            if entry.name.endswith(_TEMP_SUFFIX):
+                os.remove(entry.path)
+                continue
+            with open(entry.path) as meta:
+                etags[entry.name] = meta.read() or None
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(_TEMP_SUFFIX) or entry.name not in etags:
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_atime, entry.name, stat.st_size))
+        for filename in set(etags) - {name for _, name, _ in entries}:
+            os.remove(os.path.join(meta_directory, filename))
+        for _, filename, size in sorted(entries):
+            with open(self.path(filename), 'rb') as file:
+                self._media_types[filename] = detect_image_media_type(file.read(SIGNATURE_LENGTH))
+            self._etags[filename] = etags[filename]
+            self._sizes[filename] = size
+            self._total_bytes += size
+        self.__evict()
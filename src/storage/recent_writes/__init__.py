@@ -0,0 +1,2 @@
+from .abstract_recent_writes import AbstractRecentWrites
+from .redis_recent_writes import RedisRecentWrites
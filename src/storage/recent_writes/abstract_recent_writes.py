@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+
+
+class AbstractRecentWrites(ABC):
+    @abstractmethod
+    async def mark(self, user_id: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def contains(self, user_id: str) -> bool:
+        raise NotImplementedError()
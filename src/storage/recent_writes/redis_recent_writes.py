@@ -0,0 +1,40 @@
+import logging
+from datetime import timedelta
+
+from aioredis import Redis, RedisError
+
+from .abstract_recent_writes import AbstractRecentWrites
+
+logger = logging.getLogger(__name__)
+
+
+class RedisRecentWrites(AbstractRecentWrites):
+    """
+    Пользователи, изменявшие данные за последние ttl.
+    Хранится в Redis, чтобы отметка была видна всем процессам приложения.
+    ttl должен превышать задержку репликации
+    """
+    KEY_PREFIX = 'db:recent-write:'
+
+    def __init__(self, redis: Redis, ttl: timedelta):
+        self.__redis = redis
+        self.__ttl = ttl
+
+    async def mark(self, user_id: str) -> None:
+        try:
+            await self.__redis.set(self.__key(user_id), 1, px=self.__ttl)
+        except RedisError as exc:
+            logger.warning("Failed to mark write of User(id=%s): %s", user_id, exc)
+
+    async def contains(self, user_id: str) -> bool:
+        """
+        При недоступности Redis считается, что пользователь изменял данные
+        """
+        try:
+            return bool(await self.__redis.exists(self.__key(user_id)))
+        except RedisError as exc:
+            logger.warning("Failed to check recent write of User(id=%s): %s", user_id, exc)
+            return True
+
+    def __key(self, user_id: str) -> str:
+        return f'{self.KEY_PREFIX}{user_id}'
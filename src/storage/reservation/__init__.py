@@ -1 +1,2 @@
 from .abstract_reservation_repository import AbstractReservationRepository
+from .seat_occupancy_index import SeatOccupancyIndex
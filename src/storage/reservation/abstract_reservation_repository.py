@@ -16,18 +16,29 @@ class AbstractReservationRepository(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def mark_as_cancelled(self, reservation: Reservation) -> None:
+    async def mark_as_cancelled(self, reservation: Reservation) -> bool:
         raise NotImplementedError()
 
     @abstractmethod
-    async def get(self, reservation_id: int) -> Optional[Reservation]:
+    async def mark_as_confirmed(self, reservation: Reservation) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def mark_awaiting_confirmation(self, starts_before: datetime, limit: int) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def cancel_unconfirmed(self, started_before: datetime, limit: int) -> int:
         raise NotImplementedError()
 
     @abstractmethod
-    async def is_conflict_reservation(
-            self,
-            user: User,
-            session_start: datetime,
-            session_end: datetime
-    ) -> bool:
+    async def mark_as_passed(self, ended_before: datetime, limit: int) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def archive_finished(self, limit: int) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get(self, reservation_id: int) -> Optional[Reservation]:
         raise NotImplementedError()
@@ -1,17 +1,19 @@
 import logging
-from datetime import date, datetime, timedelta
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Set, Tuple, Union
 
 import peewee
-from peewee_async import Manager
+from psycopg2.errors import ExclusionViolation
 
 from common.dto.reservation import ReservationCreateRequest
 from common.exceptions.application import (
     CoworkingNonBusinessDayException,
-    NotAllowedReservationTimeException, CoworkingNotExistsException
+    NotAllowedReservationTimeException, CoworkingNotExistsException,
+    UserReservationConflictException
 )
 from infrastructure.database import (
     Reservation,
+    ReservationArchive,
     CoworkingSeat,
     Coworking,
     CoworkingEvent,
@@ -19,13 +21,23 @@ from infrastructure.database import (
 )
 from infrastructure.database.enum import BookingStatus
 from storage.reservation import AbstractReservationRepository
+from storage.routing_manager import RoutingManager
+from .seat_occupancy_index import SeatOccupancyIndex, CoworkingOccupancy
 
 logger = logging.getLogger(__name__)
 
+SEAT_ALLOCATION_ATTEMPTS = 3
+UNCONFIRMED_STATUSES = (BookingStatus.NEW, BookingStatus.AWAIT_CONFIRM)
+ACTIVE_STATUSES = (*UNCONFIRMED_STATUSES, BookingStatus.CONFIRMED)
+FINISHED_STATUSES = (BookingStatus.PASSED, BookingStatus.CANCELLED)
+
 
 class ReservationRepository(AbstractReservationRepository):
-    def __init__(self, manager: Manager) -> None:
+    def __init__(self, manager: RoutingManager, occupancy_index: SeatOccupancyIndex) -> None:
         self.manager = manager
+        self.occupancy_index = occupancy_index
+        # Месяцы, секции архива для которых уже созданы этим процессом
+        self._archive_partitions: Set[datetime] = set()
 
     async def get_user_reservations(self, user: User) -> List[Reservation]:
         query = (
@@ -39,106 +51,357 @@ class ReservationRepository(AbstractReservationRepository):
             .join(Coworking)
             .order_by(Reservation.session_start.asc())
         )
-        return await self.manager.execute(query)
+        reader = await self.manager.reader()
+        return await reader.execute(query)
 
     async def create(
             self,
             user: User,
             reservation: ReservationCreateRequest
     ) -> Reservation:
-        await self.check_coworking_exists(reservation.coworking_id)
-        await self.check_business_day(reservation.coworking_id,
-                                      reservation.session_start.date())
-        is_allowed_query = (
+        await self.check_reservation_verdict(user, reservation)
+        status = BookingStatus.NEW
+        if (reservation.session_start - datetime.now()) <= timedelta(minutes=30):
+            status = BookingStatus.CONFIRMED
+
+        booking: Optional[Reservation] = None
+        occupancy: Optional[CoworkingOccupancy] = self.occupancy_index.get(
+            reservation.coworking_id)
+        is_fresh = False
+        for _ in range(SEAT_ALLOCATION_ATTEMPTS):
+            if occupancy is None:
+                occupancy = await self._load_occupancy(reservation.coworking_id)
+                is_fresh = True
+            try:
+                booking = await self._insert_into_free_seat(user, reservation, status, occupancy)
+            except peewee.IntegrityError as error:
+                if not isinstance(getattr(error, 'orig', None), ExclusionViolation):
+                    raise
+                logger.info(
+                    "Seat for reservation %s was taken by concurrent booking, retrying",
+                    reservation
+                )
+                occupancy = None
+                continue
+            if booking is not None or is_fresh:
+                break
+            # Индекс мог устареть: места добавлены или бронирования изменены другим процессом
+            occupancy = None
+        if booking is None:
+            raise NotAllowedReservationTimeException()
+        self.occupancy_index.add(
+            booking.seat_id, booking.id, booking.session_start, booking.session_end
+        )
+        return booking
+
+    async def _load_occupancy(self, coworking_id: str) -> CoworkingOccupancy:
+        horizon = datetime.now()
+        seats: List[CoworkingSeat] = await self.manager.execute(
             CoworkingSeat.select()
-            .where(CoworkingSeat.place_type == reservation.place_type)
-            .join(Coworking)
-            .where(Coworking.id == reservation.coworking_id)
-            .switch(CoworkingSeat)
-            .join(Reservation, peewee.JOIN.LEFT_OUTER)
+            .where(CoworkingSeat.coworking == coworking_id)
+            .order_by(CoworkingSeat.id)
+        )
+        reservations = await self.manager.execute(
+            Reservation.select(
+                Reservation.id, Reservation.seat, Reservation.session_start, Reservation.session_end
+            )
+            .join(CoworkingSeat)
             .where(
-                (Reservation.id.is_null()) |
-                (Reservation.session_end <= reservation.session_start) |
-                (Reservation.session_start >= reservation.session_end) |
-                (Reservation.status == BookingStatus.CANCELLED)
+                (CoworkingSeat.coworking == coworking_id) &
+                (Reservation.status != BookingStatus.CANCELLED) &
+                (Reservation.session_end > horizon)
             )
+            .tuples()
         )
-        try:
-            seat: Optional[CoworkingSeat] = await self.manager.get_or_none(
-                is_allowed_query)
-        except AttributeError:
-            seat = None
-        if seat is None:
-            raise NotAllowedReservationTimeException()
-        status = BookingStatus.NEW
-        if (reservation.session_start - datetime.now()) <= timedelta(minutes=30):
-            status = BookingStatus.CONFIRMED
-        reservation: Reservation = await self.manager.create(
-            Reservation,
+        return self.occupancy_index.put(coworking_id, seats, reservations, horizon)
+
+    async def _insert_into_free_seat(
+            self,
+            user: User,
+            reservation: ReservationCreateRequest,
+            status: BookingStatus,
+            occupancy: CoworkingOccupancy
+    ) -> Optional[Reservation]:
+        """
+        Вставляет бронирование в первое из свободных по индексу мест одним запросом.
+        Отсутствие пересечений перепроверяется в БД, при их наличии возвращается None.
+        Гонку между проверкой и вставкой закрывает exclusion constraint, при его нарушении
+        выбрасывается IntegrityError с исходной ошибкой ExclusionViolation
+        """
+        seat_ids = occupancy.free_seats(
+            reservation.place_type, reservation.session_start, reservation.session_end
+        )
+        if not seat_ids:
+            return None
+        created_at = datetime.now()
+        busy = Reservation.alias('busy')
+        overlapping = (
+            busy.select(busy.id)
+            .where(
+                (busy.seat == CoworkingSeat.id) &
+                (busy.status != BookingStatus.CANCELLED) &
+                (busy.session_start < reservation.session_end) &
+                (busy.session_end > reservation.session_start)
+            )
+        )
+        free_seat = (
+            CoworkingSeat.select(
+                peewee.Value(user, converter=Reservation.user.db_value),
+                CoworkingSeat.id,
+                peewee.Value(reservation.session_start),
+                peewee.Value(reservation.session_end),
+                peewee.Value(status, converter=Reservation.status.db_value),
+                peewee.Value(created_at),
+            )
+            .where(CoworkingSeat.id.in_(seat_ids) & ~peewee.fn.EXISTS(overlapping))
+            .order_by(CoworkingSeat.id)
+            .limit(1)
+            # Конкурирующие бронирования сразу переходят к следующему свободному месту.
+            # NO KEY UPDATE не конфликтует с FOR KEY SHARE, которую вставка бронирования
+            # берет на строку места по внешнему ключу
+            .for_update('FOR NO KEY UPDATE SKIP LOCKED')
+        )
+        query = (
+            Reservation.insert_from(
+                free_seat,
+                fields=[
+                    Reservation.user,
+                    Reservation.seat,
+                    Reservation.session_start,
+                    Reservation.session_end,
+                    Reservation.status,
+                    Reservation.created_at,
+                ]
+            )
+            .returning(Reservation.id, Reservation.seat)
+        )
+        rows = list(await self.manager.execute(query))
+        if not rows:
+            return None
+        return Reservation(
+            id=rows[0].id,
             user=user,
-            seat=seat,
+            seat=occupancy.seats[rows[0].seat_id],
             session_start=reservation.session_start,
             session_end=reservation.session_end,
-            status=status
+            status=status,
+            created_at=created_at,
         )
-        return reservation
 
-    async def check_coworking_exists(self, coworking_id: str) -> None:
-        coworking: Optional[Coworking] = await self.manager.get_or_none(
-            Coworking,
-            Coworking.id == coworking_id
+    async def check_reservation_verdict(
+            self,
+            user: User,
+            reservation: ReservationCreateRequest
+    ) -> None:
+        """
+        Проверяет существование коворкинга, рабочий день и пересечения с бронированиями
+        пользователя одним запросом. Если коворкинга нет, запрос не возвращает строк
+        :raises CoworkingNotExistsException:
+        :raises CoworkingNonBusinessDayException:
+        :raises UserReservationConflictException:
+        """
+        event = (
+            CoworkingEvent.select(CoworkingEvent.id)
+            .where(
+                (CoworkingEvent.coworking == Coworking.id) &
+                (CoworkingEvent.date == reservation.session_start.date())
+            )
         )
-        if coworking is None:
-            raise CoworkingNotExistsException()
-
-    async def check_business_day(self, coworking_id: str, _date: date) -> None:
-        event: Optional[CoworkingEvent] = await self.manager.get_or_none(
-            CoworkingEvent,
-            CoworkingEvent.date == _date,
-            coworking_id=coworking_id
+        conflict = self._user_conflicts(user, reservation.session_start, reservation.session_end)
+        query = (
+            Coworking.select(
+                peewee.fn.EXISTS(event).alias('is_non_business_day'),
+                peewee.fn.EXISTS(conflict).alias('has_user_conflict'),
+            )
+            .where(Coworking.id == reservation.coworking_id)
+            .namedtuples()
         )
-        if event is not None:
+        rows = list(await self.manager.execute(query))
+        if not rows:
+            raise CoworkingNotExistsException()
+        if rows[0].is_non_business_day:
             raise CoworkingNonBusinessDayException()
+        if rows[0].has_user_conflict:
+            raise UserReservationConflictException()
 
-    async def mark_as_cancelled(self, reservation: Reservation) -> None:
+    async def mark_as_cancelled(self, reservation: Reservation) -> bool:
+        """
+        Отменяет бронирование, если оно еще активно. Статус проверяется в том же UPDATE,
+        чтобы не отменить бронирование, которое планировщик успел перевести в прошедшие
+        или перенести в архив
+        :return: Было ли бронирование отменено
+        """
+        query = (
+            Reservation.update(status=BookingStatus.CANCELLED)
+            .where(
+                (Reservation.id == reservation.id) &
+                Reservation.status.in_(ACTIVE_STATUSES)
+            )
+        )
+        if not await self.manager.execute(query):
+            return False
         reservation.status = BookingStatus.CANCELLED
-        await self.manager.update(reservation)
+        self.occupancy_index.discard(reservation.seat_id, reservation.id)
+        return True
 
-    async def get(self, reservation_id: int) -> Optional[Reservation]:
-        try:
-            query = (
-                Reservation.select(Reservation, User)
-                .where(Reservation.id == reservation_id)
-                .join(User)
+    async def mark_as_confirmed(self, reservation: Reservation) -> bool:
+        """
+        Подтверждает бронирование, если оно еще не подтверждено и не отменено.
+        Статус проверяется в том же UPDATE, чтобы не подтвердить бронирование,
+        отмененное планировщиком между чтением и записью
+        :return: Было ли бронирование подтверждено
+        """
+        query = (
+            Reservation.update(status=BookingStatus.CONFIRMED)
+            .where(
+                (Reservation.id == reservation.id) &
+                Reservation.status.in_(UNCONFIRMED_STATUSES)
+            )
+        )
+        if not await self.manager.execute(query):
+            return False
+        reservation.status = BookingStatus.CONFIRMED
+        return True
+
+    async def mark_awaiting_confirmation(self, starts_before: datetime, limit: int) -> int:
+        rows = await self._transition_batch(
+            (BookingStatus.NEW,), BookingStatus.AWAIT_CONFIRM,
+            Reservation.session_start, starts_before, limit
+        )
+        return len(rows)
+
+    async def cancel_unconfirmed(self, started_before: datetime, limit: int) -> int:
+        rows = await self._transition_batch(
+            UNCONFIRMED_STATUSES, BookingStatus.CANCELLED,
+            Reservation.session_start, started_before, limit
+        )
+        for reservation_id, seat_id in rows:
+            self.occupancy_index.discard(seat_id, reservation_id)
+        return len(rows)
+
+    async def mark_as_passed(self, ended_before: datetime, limit: int) -> int:
+        rows = await self._transition_batch(
+            (BookingStatus.CONFIRMED,), BookingStatus.PASSED,
+            Reservation.session_end, ended_before, limit
+        )
+        return len(rows)
+
+    async def _transition_batch(
+            self,
+            from_statuses: Sequence[BookingStatus],
+            to_status: BookingStatus,
+            moment: peewee.Field,
+            before: datetime,
+            limit: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Переводит не более limit самых ранних по moment бронирований в статус to_status
+        одним UPDATE. Кандидаты выбираются по частичным индексам из миграции v0003,
+        заблокированные другими транзакциями строки пропускаются, поэтому планировщики
+        нескольких процессов не ждут друг друга
+        :return: Пары (id бронирования, id места) переведенных бронирований
+        """
+        candidates = (
+            Reservation.select(Reservation.id)
+            .where(Reservation.status.in_(from_statuses) & (moment <= before))
+            .order_by(moment)
+            .limit(limit)
+            .for_update('FOR UPDATE SKIP LOCKED')
+        )
+        query = (
+            Reservation.update(status=to_status)
+            .where(Reservation.id.in_(candidates))
+            .returning(Reservation.id, Reservation.seat)
+            .tuples()
+        )
+        return list(await self.manager.execute(query))
+
+    async def archive_finished(self, limit: int) -> int:
+        """
+        Переносит не более limit прошедших и отмененных бронирований в архив,
+        секционированный по месяцам начала сессии. Недостающие секции создаются в той же
+        транзакции, поэтому при ее откате не остаются в кэше созданных секций
+        :return: Количество перенесенных бронирований
+        """
+        fields = [
+            Reservation.id,
+            Reservation.user,
+            Reservation.seat,
+            Reservation.session_start,
+            Reservation.session_end,
+            Reservation.status,
+            Reservation.created_at,
+        ]
+        async with self.manager.transaction():
+            rows = list(await self.manager.execute(
+                Reservation.select(Reservation.id, Reservation.session_start)
+                .where(Reservation.status.in_(FINISHED_STATUSES))
+                .order_by(Reservation.id)
+                .limit(limit)
+                .for_update('FOR UPDATE SKIP LOCKED')
+                .tuples()
+            ))
+            if not rows:
+                return 0
+            months = {
+                session_start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+                for _, session_start in rows
+            } - self._archive_partitions
+            for month in sorted(months):
+                await self.manager.scalar(
+                    peewee.Select(columns=[
+                        peewee.fn.seats_reservations_archive_partition(month)
+                    ]).bind(self.manager.database)
+                )
+            ids = [reservation_id for reservation_id, _ in rows]
+            await self.manager.execute(
+                ReservationArchive.insert_from(
+                    Reservation.select(*fields).where(Reservation.id.in_(ids)),
+                    fields=[ReservationArchive._meta.fields[field.name] for field in fields]
+                )
             )
-            reservation = await self.manager.get_or_none(query)
-            return reservation
+            await self.manager.execute(Reservation.delete().where(Reservation.id.in_(ids)))
+        self._archive_partitions |= months
+        return len(rows)
+
+    async def get(
+            self,
+            reservation_id: int
+    ) -> Optional[Union[Reservation, ReservationArchive]]:
+        """
+        Бронирование ищется в рабочей таблице, затем в архиве
+        """
+        try:
+            for model in (Reservation, ReservationArchive):
+                query = (
+                    model.select(model, User)
+                    .where(model.id == reservation_id)
+                    .join(User)
+                    .limit(1)
+                )
+                rows = list(await self.manager.execute(query))
+                if rows:
+                    return rows[0]
         except Exception as exc:
             logger.exception(
                 "Failed to fetch Reservation(id=%s) with exc = %s",
                 reservation_id, exc
             )
-            pass
+        return None
 
-    async def is_conflict_reservation(
-            self,
+    @staticmethod
+    def _user_conflicts(
             user: User,
             session_start: datetime,
             session_end: datetime
-    ) -> bool:
-        query = (
-            Reservation.select()
-            .join(User)
+    ) -> peewee.ModelSelect:
+        own = Reservation.alias('own')
+        return (
+            own.select(own.id)
             .where(
-                (Reservation.user == user) &
-                (Reservation.status != BookingStatus.CANCELLED)
-            )
-            .where(
-                ~(
-                        (Reservation.session_end <= session_start) |
-                        (Reservation.session_start >= session_end)
-                )
+                (own.user == user) &
+                (own.status != BookingStatus.CANCELLED) &
+                (own.session_start < session_end) &
+                (own.session_end > session_start)
             )
         )
-        result: List[Reservation] = await self.manager.execute(query)
-        return len(result) > 0
@@ -0,0 +1,158 @@
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from infrastructure.database import CoworkingSeat
+from infrastructure.database.enum import PlaceType
+
+DEFAULT_TTL = timedelta(minutes=5)
+
+
+class SeatIntervals:
+    """
+    Отсортированные по началу интервалы бронирований одного места.
+    Проверка занятости выполняется за O(log n), но add и discard пересчитывают reach
+    от позиции изменения и вместе со вставкой в списки стоят O(n) от числа бронирований места
+    """
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.reservation_ids: List[int] = []
+        # reach[i] - максимальный конец среди интервалов [0..i],
+        # позволяет проверять пересечение за O(log n) даже при наложении интервалов
+        self.reach: List[datetime] = []
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        position = bisect_left(self.starts, end)
+        return position == 0 or self.reach[position - 1] <= start
+
+    def load(self, intervals: Iterable[Tuple[int, datetime, datetime]]) -> None:
+        """
+        Заполняет пустой набор за один пересчет reach вместо пересчета на каждый интервал
+        :param intervals: Кортежи (reservation_id, start, end)
+        """
+        for reservation_id, start, end in sorted(intervals, key=lambda interval: interval[1]):
+            self.starts.append(start)
+            self.ends.append(end)
+            self.reservation_ids.append(reservation_id)
+            self.reach.append(end)
+        self.__rebuild_reach(0)
+
+    def add(self, reservation_id: int, start: datetime, end: datetime) -> None:
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.reservation_ids.insert(position, reservation_id)
+        self.reach.insert(position, end)
+        self.__rebuild_reach(position)
+
+    def discard(self, reservation_id: int) -> None:
+        try:
+            position = self.reservation_ids.index(reservation_id)
+        except ValueError:
+            return
+        for items in (self.starts, self.ends, self.reservation_ids, self.reach):
+            del items[position]
+        self.__rebuild_reach(position)
+
+    def __rebuild_reach(self, position: int) -> None:
+        for i in range(position, len(self.ends)):
+            self.reach[i] = self.ends[i] if i == 0 else max(self.reach[i - 1], self.ends[i])
+
+
+class CoworkingOccupancy:
+    """Снимок занятости мест одного коворкинга начиная с момента horizon"""
+
+    def __init__(self, seats: Iterable[CoworkingSeat], horizon: datetime):
+        self.horizon = horizon
+        self.loaded_at = time.monotonic()
+        self.seats: Dict[int, CoworkingSeat] = {}
+        self.seats_by_type: Dict[PlaceType, List[int]] = {}
+        self.intervals: Dict[int, SeatIntervals] = {}
+        for seat in seats:
+            self.seats[seat.id] = seat
+            self.seats_by_type.setdefault(seat.place_type, []).append(seat.id)
+            self.intervals[seat.id] = SeatIntervals()
+
+    def free_seats(self, place_type: PlaceType, start: datetime, end: datetime) -> List[int]:
+        """
+        Возвращает места, свободные по данным индекса.
+        Интервалы до horizon не индексируются, поэтому для них кандидатами являются все места
+        """
+        seat_ids = self.seats_by_type.get(place_type, [])
+        if start < self.horizon:
+            return list(seat_ids)
+        return [seat_id for seat_id in seat_ids if self.intervals[seat_id].is_free(start, end)]
+
+
+class SeatOccupancyIndex:
+    """
+    Внутрипроцессный индекс занятости мест по коворкингам.
+    Индекс является лишь подсказкой для выбора места: он свой у каждого процесса, обновляется
+    только бронированиями этого процесса и перечитывается из БД по истечении ttl, поэтому
+    может быть устаревшим. Запрос вставки перепроверяет пересечения, но сам по себе не исключает
+    гонку двух вставок. Двойное бронирование исключает только exclusion constraint
+    seats_reservations_no_overlap в БД
+    """
+
+    def __init__(self, ttl: timedelta = DEFAULT_TTL):
+        self.ttl = ttl.total_seconds()
+        self._coworkings: Dict[str, CoworkingOccupancy] = {}
+        self._seat_coworking: Dict[int, str] = {}
+
+    def get(self, coworking_id: str) -> Optional[CoworkingOccupancy]:
+        occupancy = self._coworkings.get(coworking_id)
+        if occupancy is None:
+            return None
+        if time.monotonic() - occupancy.loaded_at > self.ttl:
+            self.invalidate(coworking_id)
+            return None
+        return occupancy
+
+    def put(
+            self,
+            coworking_id: str,
+            seats: Iterable[CoworkingSeat],
+            reservations: Iterable[Tuple[int, int, datetime, datetime]],
+            horizon: datetime
+    ) -> CoworkingOccupancy:
+        """
+        :param reservations: Кортежи (reservation_id, seat_id, session_start, session_end)
+        """
+        self.invalidate(coworking_id)
+        occupancy = CoworkingOccupancy(seats, horizon)
+        by_seat: Dict[int, List[Tuple[int, datetime, datetime]]] = {}
+        for reservation_id, seat_id, start, end in reservations:
+            if seat_id in occupancy.intervals:
+                by_seat.setdefault(seat_id, []).append((reservation_id, start, end))
+        for seat_id, intervals in by_seat.items():
+            occupancy.intervals[seat_id].load(intervals)
+        for seat_id in occupancy.seats:
+            self._seat_coworking[seat_id] = coworking_id
+        self._coworkings[coworking_id] = occupancy
+        return occupancy
+
+    def add(self, seat_id: int, reservation_id: int, start: datetime, end: datetime) -> None:
+        if (occupancy := self.__get_by_seat(seat_id)) is None:
+            return
+        occupancy.intervals[seat_id].add(reservation_id, start, end)
+
+    def discard(self, seat_id: int, reservation_id: int) -> None:
+        if (occupancy := self.__get_by_seat(seat_id)) is None:
+            return
+        occupancy.intervals[seat_id].discard(reservation_id)
+
+    def invalidate(self, coworking_id: str) -> None:
+        occupancy = self._coworkings.pop(coworking_id, None)
+        if occupancy is None:
+            return
+        for seat_id in occupancy.seats:
+            self._seat_coworking.pop(seat_id, None)
+
+    def __get_by_seat(self, seat_id: int) -> Optional[CoworkingOccupancy]:
+        coworking_id = self._seat_coworking.get(seat_id)
+        if coworking_id is None:
+            return None
+        return self._coworkings.get(coworking_id)
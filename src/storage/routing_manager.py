@@ -0,0 +1,70 @@
+import contextvars
+import itertools
+import logging
+from typing import Optional, Sequence
+
+import peewee
+from peewee_async import Manager
+
+from common.context import CONTEXT_USER
+from storage.recent_writes import AbstractRecentWrites
+
+logger = logging.getLogger(__name__)
+
+# Выполнялась ли запись в текущем контексте (запросе)
+_CONTEXT_WRITTEN: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    '_CONTEXT_WRITTEN', default=False
+)
+
+
+class RoutingManager(Manager):
+    """
+    Manager основной базы данных, распределяющий чтения по репликам.
+    Записи всегда выполняются через основную базу. Чтения, для которых допустимо отставание
+    реплики, получают Manager через reader(). Пользователь читает свои записи (read-your-writes):
+    после записи в том же запросе и в течение ttl отметки в recent_writes его чтения
+    направляются в основную базу. Записи без пользователя в контексте (фоновые задачи,
+    пакетные операции) не отмечаются
+    """
+
+    def __init__(
+            self,
+            database,
+            replicas: Sequence[Manager] = (),
+            recent_writes: Optional[AbstractRecentWrites] = None
+    ):
+        super().__init__(database)
+        if replicas and recent_writes is None:
+            raise ValueError("recent_writes is required when replicas are configured")
+        self.replicas = list(replicas)
+        self.recent_writes = recent_writes
+        self.__replicas = itertools.cycle(self.replicas)
+
+    async def reader(self) -> Manager:
+        """
+        :return: Manager реплики или основной базы, если пользователь недавно изменял данные
+        """
+        if not self.replicas or _CONTEXT_WRITTEN.get():
+            return self
+        user = CONTEXT_USER.get(None)
+        if user is not None and await self.recent_writes.contains(user.id):
+            return self
+        return next(self.__replicas)
+
+    async def execute(self, query):
+        result = await super().execute(query)
+        if self.replicas and not isinstance(query, peewee.SelectBase):
+            await self.__mark_written()
+        return result
+
+    async def close(self):
+        await super().close()
+        for replica in self.replicas:
+            await replica.close()
+
+    async def __mark_written(self) -> None:
+        user = CONTEXT_USER.get(None)
+        if user is None or _CONTEXT_WRITTEN.get():
+            return
+        _CONTEXT_WRITTEN.set(True)
+        await self.recent_writes.mark(user.id)
@@ -1,18 +1,51 @@
 import logging
 import os
-from typing import AsyncGenerator
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
 
 import aioboto3
-from fastapi import UploadFile
+from aiobotocore.client import AioBaseClient
+from aiobotocore.config import AioConfig
+from aiobotocore.response import StreamingBody
+from botocore.exceptions import ClientError
 
+from common.exceptions.application import RangeNotSatisfiableException
+from common.utils.http_range import ByteRange
 from infrastructure.config import ObjectStorageSettings
 
 CHUNK_SIZE = 16 * 1024
+# Минимальный размер части multipart upload в S3, кроме последней
+MULTIPART_PART_SIZE = 5 * 1024 * 1024
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class S3Object:
+    body: StreamingBody
+    content_length: int
+    content_type: Optional[str] = None
+    content_range: Optional[str] = None
+    etag: Optional[str] = None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        # Соединение возвращается в пул, даже если клиент прервал загрузку
+        async with self.body:
+            while bytes_data := await self.body.read(CHUNK_SIZE):
+                yield bytes_data
+
+    def close(self) -> None:
+        """Закрывает непрочитанное тело ответа"""
+        self.body.close()
+
+
 class S3Repository:
+    """
+    Репозиторий объектного хранилища с одним долгоживущим клиентом.
+    Клиент и пул соединений создаются в start() при запуске приложения и закрываются в close()
+    """
+
     def __init__(self, settings: ObjectStorageSettings):
         self.service_name = 's3'
         self.endpoint = settings.S3_ENDPOINT_URL
@@ -22,27 +55,143 @@ class S3Repository:
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
             region_name=settings.REGION_NAME,
         )
+        self.config = AioConfig(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+        )
+        self.__exit_stack: Optional[AsyncExitStack] = None
+        self.__client: Optional[AioBaseClient] = None
+
+    async def start(self) -> None:
+        if self.__client is not None:
+            return
+        self.__exit_stack = AsyncExitStack()
+        self.__client = await self.__exit_stack.enter_async_context(
+            self.session.client(self.service_name, endpoint_url=self.endpoint, config=self.config)
+        )
+
+    async def close(self) -> None:
+        if self.__exit_stack is None:
+            return
+        await self.__exit_stack.aclose()
+        self.__exit_stack, self.__client = None, None
 
-    async def upload_file(self, file: UploadFile) -> str:
-        unique_filename = self._get_unique_filename(file.filename)
-        async with self.session.client(self.service_name, endpoint_url=self.endpoint) as client:
-            await client.upload_fileobj(file, self.bucket, unique_filename)
+    @property
+    def client(self) -> AioBaseClient:
+        if self.__client is None:
+            raise RuntimeError("S3Repository is not started")
+        return self.__client
+
+    async def upload_stream(
+            self,
+            original_name: str,
+            chunks: AsyncIterable[bytes],
+            content_type: Optional[str] = None
+    ) -> str:
+        """
+        Загружает поток в хранилище частями multipart upload, в памяти хранится не больше
+        одной части. Если поток меньше одной части, файл загружается одним запросом.
+        Буфер части передается клиенту без копирования
+        :return: Уникальное имя файла в хранилище
+        """
+        unique_filename = self._get_unique_filename(original_name)
+        extra = {'ContentType': content_type} if content_type else {}
+        buffer = bytearray()
+        upload_id: Optional[str] = None
+        parts = []
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) < MULTIPART_PART_SIZE:
+                    continue
+                if upload_id is None:
+                    upload = await self.client.create_multipart_upload(
+                        Bucket=self.bucket, Key=unique_filename, **extra
+                    )
+                    upload_id = upload['UploadId']
+                parts.append(await self.__upload_part(unique_filename, upload_id, parts, buffer))
+                buffer = bytearray()
+            if upload_id is None:
+                await self.client.put_object(
+                    Bucket=self.bucket, Key=unique_filename, Body=buffer, **extra
+                )
+                return unique_filename
+            if buffer:
+                parts.append(await self.__upload_part(unique_filename, upload_id, parts, buffer))
+            await self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=unique_filename,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            if upload_id is not None:
+                logger.info("Aborting multipart upload of %s", unique_filename)
+                await self.client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=unique_filename, UploadId=upload_id
+                )
+            raise
         return unique_filename
 
-    async def get_file_stream(self, filename: str) -> AsyncGenerator[bytes, None]:
-        async with self.session.client(self.service_name, endpoint_url=self.endpoint) as client:
-            try:
-                response = await client.get_object(Bucket=self.bucket, Key=filename)
-            except Exception as exc:
-                logger.info("Failed to receive file(name=%s) stream with exc=%s", filename, exc)
-                yield b""
-            else:
-                while bytes_data := await response['Body'].read(CHUNK_SIZE):
-                    yield bytes_data
+    async def __upload_part(
+            self,
+            filename: str,
+            upload_id: str,
+            parts: List[Dict[str, Any]],
+            data: bytearray
+    ) -> Dict[str, Any]:
+        part_number = len(parts) + 1
+        response = await self.client.upload_part(
+            Bucket=self.bucket,
+            Key=filename,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+        return {'ETag': response['ETag'], 'PartNumber': part_number}
+
+    async def get_object(self, filename: str, byte_range: Optional[ByteRange] = None) -> S3Object:
+        """
+        Запрашивает объект или его диапазон. Тело объекта читается при итерации по S3Object
+        :raises FileNotFoundError: Объекта с таким именем нет в хранилище
+        :raises RangeNotSatisfiableException: Диапазон за пределами объекта
+        """
+        params = {'Bucket': self.bucket, 'Key': filename}
+        if byte_range is not None:
+            params['Range'] = byte_range.to_header()
+        try:
+            response = await self.client.get_object(**params)
+        except ClientError as exc:
+            logger.info("Failed to receive file(name=%s) stream with exc=%s", filename, exc)
+            error = exc.response.get('Error', {})
+            if error.get('Code') in ('NoSuchKey', '404'):
+                raise FileNotFoundError(filename) from exc
+            if error.get('Code') == 'InvalidRange':
+                size = error.get('ActualObjectSize')
+                raise RangeNotSatisfiableException(int(size) if size else None) from exc
+            raise
+        return S3Object(
+            body=response['Body'],
+            content_length=response['ContentLength'],
+            content_type=response.get('ContentType'),
+            content_range=response.get('ContentRange'),
+            etag=response.get('ETag'),
+        )
+
+    async def upload_bytes(self, filename: str, data: bytes, content_type: str) -> None:
+        await self.client.put_object(
+            Bucket=self.bucket, Key=filename, Body=data, ContentType=content_type
+        )
 
     async def delete_file(self, filename: str) -> None:
-        async with self.session.client(self.service_name, endpoint_url=self.endpoint) as client:
-            await client.delete_object(Bucket=self.bucket, Key=filename)
+        await self.client.delete_object(Bucket=self.bucket, Key=filename)
+
+    async def delete_files(self, filenames: List[str]) -> None:
+        await self.client.delete_objects(
+            Bucket=self.bucket,
+            Delete={'Objects': [{'Key': filename} for filename in filenames], 'Quiet': True}
+        )
 
     def _get_unique_filename(self, original_name: str) -> str:
         extension = original_name.split('.')[-1]
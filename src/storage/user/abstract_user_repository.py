@@ -18,6 +18,10 @@ class AbstractUserRepository(ABC):
     async def get(self, *filters) -> Optional[User]:
         raise NotImplementedError()
 
+    @abstractmethod
+    async def get_by_id(self, user_id: str) -> Optional[User]:
+        raise NotImplementedError()
+
     @abstractmethod
     async def update(self, user: User, **value_set) -> User:
         raise NotImplementedError()
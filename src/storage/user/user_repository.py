@@ -1,9 +1,10 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from peewee_async import Manager
 
 from common.dto.user import UserCreateDTO
 from common.hasher import Hasher
+from common.utils import LRUCache
 from common.utils.user import is_student
 from infrastructure.database import User
 from .abstract_user_repository import AbstractUserRepository
@@ -13,16 +14,18 @@ class UserRepository(AbstractUserRepository):
     def __init__(
             self,
             manager: Manager,
-            hasher: Hasher
+            hasher: Hasher,
+            user_cache: LRUCache[Dict[str, Any]]
     ):
         self.manager = manager
         self.hasher = hasher
+        self.user_cache = user_cache
 
     async def create(self, data: UserCreateDTO) -> User:
         user: User = await self.manager.create(
             User,
             email=data.email,
-            hashed_password=self.hasher.get_hash(data.password),
+            hashed_password=await self.hasher.get_hash(data.password),
             last_name=data.last_name,
             first_name=data.first_name,
             patronymic=data.patronymic,
@@ -34,16 +37,35 @@ class UserRepository(AbstractUserRepository):
         user: Optional[User] = await self.manager.get_or_none(User, *filters)
         return user
 
+    async def get_by_id(self, user_id: str) -> Optional[User]:
+        """
+        Возвращает пользователя из внутрипроцессного кэша или БД.
+        Кэш хранит копии полей, поэтому каждый вызов получает собственный экземпляр модели
+        """
+        data: Optional[Dict[str, Any]] = self.user_cache.get(user_id)
+        if data is None:
+            user: Optional[User] = await self.manager.get_or_none(User, User.id == user_id)
+            if user is None:
+                return None
+            data = dict(user.__data__)
+            self.user_cache.put(user_id, data)
+        user = User(**data)
+        user._dirty.clear()
+        return user
+
     async def set_avatar(self, user: User, filename: str) -> None:
         user.avatar_filename = filename
         await self.manager.update(user)
+        self.user_cache.pop(user.id)
 
     async def update(self, user: User, **value_set) -> User:
         for attribute in value_set:
             setattr(user, attribute, value_set[attribute])
         await self.manager.update(user)
+        self.user_cache.pop(user.id)
         return await self.manager.get(User, User.id == user.id)
 
     async def update_password(self, user: User, password: str) -> None:
-        user.hashed_password = self.hasher.get_hash(password)
+        user.hashed_password = await self.hasher.get_hash(password)
         await self.manager.update(user)
+        self.user_cache.pop(user.id)
@@ -3,5 +3,8 @@
 set -u
 set -e
 
+echo "Apply database migrations"
+python -m infrastructure.database.migrations
+
 echo "Start application using Uvicorn🔥"
 exec uvicorn main:app --host $APP_HOSTNAME --port $APP_PORT
@@ -2,10 +2,13 @@ import asyncio
 
 import pytest
 import pytest_asyncio
-from peewee_async import PostgresqlDatabase, Manager
+from peewee_async import Manager
 
 from infrastructure.config import DatabaseSettings
+from infrastructure.database.db import create_database
+from infrastructure.database.migrations import MigrationRunner
 from infrastructure.database.models import *
+from storage.routing_manager import RoutingManager
 
 database_models = [
     User,
@@ -13,6 +16,7 @@ database_models = [
     WorkingSchedule,
     CoworkingSeat,
     Reservation,
+    ReservationArchive,
     CoworkingImages,
     CoworkingEvent,
     EmailAuthData,
@@ -37,19 +41,13 @@ def db_settings() -> DatabaseSettings:
 
 @pytest.fixture(scope='session', autouse=True)
 def db_manager(db_settings: DatabaseSettings) -> Manager:
-    database = PostgresqlDatabase(
-        database=db_settings.DATABASE_NAME,
-        user=db_settings.DATABASE_USER,
-        password=db_settings.DATABASE_PASSWORD,
-        host=db_settings.DATABASE_HOST,
-        port=db_settings.DATABASE_PORT
-    )
+    database = create_database(db_settings)
     database.set_allow_sync(False)
-    manager = Manager(database=database)
+    manager = RoutingManager(database)
+    for model in database_models:
+        model._meta.database = database
     with manager.allow_sync():
-        for model in database_models:
-            model._meta.database = database
-            model.create_table()
+        MigrationRunner(database).run()
     return manager
 
 
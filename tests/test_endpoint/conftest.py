@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from typing import Optional, Any, Callable
 
 import fastapi_jsonrpc as jsonrpc
@@ -8,42 +11,114 @@ from aioredis import Redis
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from common.hasher import Hasher
+from common.service.coworking_transfer_service import CoworkingTransferService
+from common.service.reset_password_send_service import PasswordResetSendService
 from common.session import TokenService
+from common.template_registry import TemplateRegistry
+from common.utils import LRUCache
 from controllers.middlewares import AuthMiddleware
+from controllers.rest import HealthRouter
 from controllers.rpc import AuthRouter, ReservationRouter, CoworkingRouter, UserRouter, \
-    AdminCoworkingRouter
-from infrastructure.config import RedisSettings, ApplicationSettings
+    AdminCoworkingRouter, UserSettingsRouter
+from infrastructure.config import RedisSettings, ApplicationSettings, InfrastructureSettings
 from storage.coworking import CoworkingRepository
+from storage.coworking_cache import RedisCoworkingCache
 from storage.coworking_event import CoworkingEventRepository
+from storage.email_outbox import RedisEmailOutbox
+from storage.password_reset_token import PasswordResetTokenRepository
+from storage.reservation import SeatOccupancyIndex
 from storage.reservation.reservation_repository import ReservationRepository
 from storage.session import RedisSessionRepository
 from storage.user import UserRepository
 
 
 @pytest.fixture(scope='session')
-def async_client(db_manager) -> httpx.AsyncClient:
-    # Initialize settings
-    application_settings = ApplicationSettings()
+def redis() -> Redis:
     redis_settings = RedisSettings()
+    return Redis(host=redis_settings.REDIS_HOST, port=redis_settings.REDIS_PORT)
+
+
+@pytest.fixture(scope='session')
+def coworking_local_cache() -> LRUCache:
+    return LRUCache(256, timedelta(seconds=10))
+
+
+@pytest.fixture(scope='session')
+def user_cache() -> LRUCache:
+    return LRUCache(1024, timedelta(seconds=30))
+
+
+@pytest.fixture(scope='function', autouse=True)
+def clear_user_cache(user_cache: LRUCache) -> None:
+    yield
+    user_cache.clear()
+
+
+@pytest_asyncio.fixture(scope='function', autouse=True)
+async def clear_coworking_cache(redis: Redis, coworking_local_cache: LRUCache) -> None:
+    yield
+    coworking_local_cache.clear()
+    keys = await redis.keys(f'{RedisCoworkingCache.KEY_PREFIX}*')
+    if keys:
+        await redis.delete(*keys)
+
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'templates')
 
-    redis = Redis(host=redis_settings.REDIS_HOST, port=redis_settings.REDIS_PORT)
+
+@pytest.fixture(scope='session')
+def email_outbox(redis: Redis) -> RedisEmailOutbox:
+    return RedisEmailOutbox(redis, 'test:email:outbox', timedelta(minutes=5))
+
+
+@pytest_asyncio.fixture(scope='function', autouse=True)
+async def clear_email_outbox(redis: Redis, email_outbox: RedisEmailOutbox) -> None:
+    yield
+    await redis.delete(email_outbox.stream, email_outbox.dead_letter_stream)
+
+
+@pytest.fixture(scope='session')
+def async_client(
+        db_manager,
+        redis: Redis,
+        coworking_local_cache: LRUCache,
+        user_cache: LRUCache,
+        email_outbox: RedisEmailOutbox
+) -> httpx.AsyncClient:
+    # Initialize settings
+    application_settings = ApplicationSettings()
 
     # Initialize utils, repositories and etc.
-    hasher = Hasher()
-    user_repository = UserRepository(db_manager, hasher)
-    reservation_repository = ReservationRepository(db_manager)
+    hasher = Hasher(ThreadPoolExecutor(max_workers=2))
+    user_repository = UserRepository(db_manager, hasher, user_cache)
+    reservation_repository = ReservationRepository(db_manager, SeatOccupancyIndex())
     session_repository = RedisSessionRepository(redis, application_settings.session_ttl)
     coworking_repository = CoworkingRepository(db_manager)
+    coworking_cache = RedisCoworkingCache(redis, timedelta(minutes=10), coworking_local_cache)
     coworking_event_repository = CoworkingEventRepository(db_manager)
     token_service = TokenService(
         application_settings.SECRET_KEY, application_settings.access_token_ttl
     )
+    send_service = PasswordResetSendService(
+        TemplateRegistry(TEMPLATES_DIR), email_outbox, InfrastructureSettings()
+    )
+
     # Initialize routers
     auth_router = AuthRouter(user_repository, hasher, token_service, session_repository)
     reservation_router = ReservationRouter(reservation_repository)
-    coworking_router = CoworkingRouter(coworking_repository)
+    coworking_router = CoworkingRouter(coworking_repository, coworking_cache)
     user_router = UserRouter(user_repository, token_service)
-    admin_router = AdminCoworkingRouter(coworking_repository, coworking_event_repository, None)
+    admin_router = AdminCoworkingRouter(
+        coworking_repository,
+        coworking_event_repository,
+        None,
+        coworking_cache,
+        CoworkingTransferService(coworking_repository, chunk_size=2, export_page_size=2)
+    )
+    user_settings_router = UserSettingsRouter(
+        user_repository, PasswordResetTokenRepository(db_manager), send_service, hasher
+    )
+    health_router = HealthRouter(db_manager.database, redis)
 
     # Create app and register routers
     _app = jsonrpc.API()
@@ -52,6 +127,8 @@ def async_client(db_manager) -> httpx.AsyncClient:
     _app.bind_entrypoint(coworking_router.build_entrypoint())
     _app.bind_entrypoint(user_router.build_entrypoint())
     _app.bind_entrypoint(admin_router.build_entrypoint())
+    _app.bind_entrypoint(user_settings_router.build_entrypoint())
+    _app.include_router(health_router.build_api_router())
 
     auth_middleware = AuthMiddleware(token_service, user_repository)
     _app.add_middleware(BaseHTTPMiddleware, dispatch=auth_middleware)
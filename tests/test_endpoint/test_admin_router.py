@@ -1,13 +1,19 @@
 import datetime
+import json
 import os
 from typing import Callable
 
 import httpx
 import pytest
 import pytest_asyncio
+from aioredis import Redis
 from peewee_async import Manager
 
-from infrastructure.database import User, Coworking
+from common.utils import LRUCache
+
+from infrastructure.database import User, Coworking, CoworkingSeat
+from storage.coworking import coworking_repository
+from storage.coworking_cache import RedisCoworkingCache
 
 url: str = "/api/v1/admin/coworking"
 
@@ -199,3 +205,141 @@ class TestRegisterCoworkingSeats:
         json_ = response.json()
         assert json_.get('result'), json_
         assert len(json_['result']) == 6
+        assert [seat['place_type'] for seat in json_['result']] == ['table'] * 5 + ['meeting_room']
+        assert json_['result'][-1]['label'] == "Метка"
+        assert json_['result'][-1]['seats_count'] == 14
+
+    @pytest.mark.asyncio
+    async def test_create_seats_in_several_batches(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager,
+            admin_access_token: str,
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(coworking_repository, 'INSERT_BATCH_SIZE', 2)
+        coworking: Coworking = await db_manager.create(
+            Coworking,
+            title="Антресоли",
+            institute="ГУК",
+            description="Коворкинг",
+            address="Мира, д.19",
+        )
+        response: httpx.Response = await rpc_request(
+            url=url,
+            method="register_coworking_seats",
+            params={"coworking_id": coworking.id, "table_places": 5, "meeting_rooms": []},
+            headers={"Authorization": admin_access_token}
+        )
+        json_ = response.json()
+        assert len(json_['result']) == 5, json_
+        ids = [seat['id'] for seat in json_['result']]
+        assert ids == sorted(ids)
+        assert await db_manager.count(
+            CoworkingSeat.select().where(CoworkingSeat.coworking == coworking)
+        ) == 5
+
+    @pytest.mark.asyncio
+    async def test_cached_detail_invalidated(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager,
+            admin_access_token: str
+    ) -> None:
+        coworking: Coworking = await db_manager.create(
+            Coworking,
+            title="Антресоли",
+            institute="ГУК",
+            description="Коворкинг",
+            address="Мира, д.19",
+        )
+        params = {"coworking_id": coworking.id}
+        response: httpx.Response = await rpc_request(
+            url="/api/v1/coworking", method="get_coworking", params=params
+        )
+        assert response.json()['result']['seats'] == []
+
+        await rpc_request(
+            url=url,
+            method="register_coworking_seats",
+            params={"coworking_id": coworking.id, "table_places": 2, "meeting_rooms": []},
+            headers={"Authorization": admin_access_token}
+        )
+        response = await rpc_request(
+            url="/api/v1/coworking", method="get_coworking", params=params
+        )
+        json_ = response.json()
+        assert len(json_['result']['seats']) == 2, json_
+
+
+    @pytest.mark.asyncio
+    async def test_invalidate_survives_unavailable_redis(self) -> None:
+        cache = RedisCoworkingCache(
+            Redis(host='localhost', port=1), datetime.timedelta(minutes=10),
+            LRUCache(10, datetime.timedelta(seconds=10))
+        )
+        await cache.invalidate("coworking_id")
+
+
+class TestCoworkingImportExport:
+    documents = [
+        {
+            "title": "Антресоли", "institute": "ГУК", "description": "Коворкинг",
+            "address": "Мира, д.19", "table_places": 3,
+            "meeting_rooms": [{"label": "Переговорная", "description": None, "seats_count": 8}],
+            "working_schedules": [
+                {"week_day": 0, "start_time": "09:00:00", "end_time": "21:00:00"},
+                {"week_day": 1, "start_time": "09:00:00", "end_time": "21:00:00"},
+            ],
+            "events": [{"date": "2030-01-01", "name": "Праздник", "description": None}],
+            "technical_capabilities": [{"capability": "Wi-Fi"}],
+        },
+        {
+            "title": "Радиоточка", "institute": "ИРИТ-РТФ", "description": "Коворкинг",
+            "address": "Мира, д.32", "table_places": 0, "meeting_rooms": [],
+            "working_schedules": [], "events": [], "technical_capabilities": [],
+        },
+        {
+            "title": "Территория идей", "institute": "ИНМИТ", "description": "Коворкинг",
+            "address": "Мира, д.28", "table_places": 1, "meeting_rooms": [],
+            "working_schedules": [], "events": [], "technical_capabilities": [],
+        },
+    ]
+
+    @pytest.mark.asyncio
+    async def test_user_not_admin(
+            self,
+            async_client: httpx.AsyncClient,
+            access_token: str
+    ) -> None:
+        response = await async_client.post(
+            f"{url}/import", content=b"{}\n", headers={"Authorization": access_token}
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_import_and_export(
+            self,
+            async_client: httpx.AsyncClient,
+            db_manager: Manager,
+            admin_access_token: str
+    ) -> None:
+        lines = [json.dumps(document, ensure_ascii=False) for document in self.documents]
+        body = "\n".join([lines[0], '{"title": "Без адреса"}', "", lines[1], "not json", lines[2]])
+        response = await async_client.post(
+            f"{url}/import", content=body.encode(), headers={"Authorization": admin_access_token}
+        )
+        assert response.status_code == 200, response.text
+        result = response.json()
+        assert len(result["coworking_ids"]) == 3
+        assert [error["line"] for error in result["errors"]] == [2, 5]
+        assert await db_manager.count(CoworkingSeat.select()) == 5
+
+        response = await async_client.get(
+            f"{url}/export", headers={"Authorization": admin_access_token}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        key = lambda document: document["title"]
+        assert sorted(exported, key=key) == sorted(self.documents, key=key)
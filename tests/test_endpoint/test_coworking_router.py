@@ -1,10 +1,11 @@
 import logging
 import os
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Callable, Dict, Any
 
 import httpx
 import pytest
+import pytest_asyncio
 from peewee_async import Manager
 
 from infrastructure.database import (
@@ -13,7 +14,9 @@ from infrastructure.database import (
     User,
     Reservation,
     CoworkingEvent,
-    WorkingSchedule
+    WorkingSchedule,
+    CoworkingImages,
+    TechCapability
 )
 from infrastructure.database.enum import PlaceType, BookingStatus
 
@@ -32,6 +35,65 @@ class TestGetCoworkingById:
         assert error["code"] == -32008, _json
 
 
+    @pytest.mark.asyncio
+    async def test_detail_with_relations(self, rpc_request: Callable, db_manager: Manager) -> None:
+        """
+        Тестирует, что связанные сущности не дублируются, а прошедшие мероприятия не
+        исключают коворкинг из ответа
+        """
+        coworking: Coworking = await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        for _ in range(3):
+            await db_manager.create(
+                CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+            )
+        for week_day in (0, 1):
+            await db_manager.create(
+                WorkingSchedule, coworking=coworking, week_day=week_day,
+                start_time=datetime(2024, 5, 20, 10), end_time=datetime(2024, 5, 20, 16),
+            )
+        for filename in ("first.png", "second.png"):
+            await db_manager.create(CoworkingImages, coworking=coworking, image_filename=filename)
+        for event_date in (date(2024, 5, 20), date.today() + timedelta(days=1)):
+            await db_manager.create(
+                CoworkingEvent, coworking=coworking, date=event_date, name="null",
+            )
+        await db_manager.create(TechCapability, coworking=coworking, capability="Wi-Fi")
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="get_coworking", params={"coworking_id": coworking.id}
+        )
+        result = response.json()["result"]
+        assert len(result["seats"]) == 3
+        assert len(result["working_schedules"]) == 2
+        assert len(result["images"]) == 2
+        assert len(result["events"]) == 1
+        assert len(result["technical_capabilities"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_detail_served_from_cache(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager
+    ) -> None:
+        """
+        Тестирует, что повторный запрос отдается из кэша без обращения к БД
+        """
+        coworking: Coworking = await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        params = {"coworking_id": coworking.id}
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="get_coworking", params=params
+        )
+        assert response.json()["result"]["title"] == "Title"
+        coworking.title = "Changed"
+        await db_manager.update(coworking)
+        response = await rpc_request(url=coworking_url, method="get_coworking", params=params)
+        assert response.json()["result"]["title"] == "Title"
+
 class TestGetCoworkingByTimestampRange:
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
@@ -417,6 +479,147 @@ class TestGetCoworkingByTimestampRange:
         assert len(json_["result"]) == 0
 
 
+    @pytest.mark.asyncio
+    async def test_each_coworking_has_own_schedule(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager
+    ) -> None:
+        """
+        Тестирует, что каждому коворкингу в списке соответствует его собственное расписание
+        """
+        expected = {}
+        for start_hour, end_hour in [(10, 16), (12, 18)]:
+            coworking: Coworking = await db_manager.create(
+                Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+                institute="IRIT RTF", description="Description", address="Mira 32",
+            )
+            await db_manager.create(
+                CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+            )
+            for week_day in (0, 1):
+                await db_manager.create(
+                    WorkingSchedule,
+                    coworking=coworking,
+                    week_day=week_day,
+                    start_time=datetime(2024, 5, 20, start_hour + week_day),
+                    end_time=datetime(2024, 5, 20, end_hour),
+                )
+            expected[coworking.id] = f"{start_hour}:00:00"
+        interval = {"from": "2024-05-20T13:00:00", "to": "2024-05-20T14:00:00"}
+        response: httpx.Response = await rpc_request(
+            url=coworking_url,
+            method="available_coworking_by_timestamp",
+            params={"interval": interval}
+        )
+        json_ = response.json()
+        assert len(json_["result"]) == 2
+        for coworking in json_["result"]:
+            assert coworking["working_schedule"]["coworking_id"] == coworking["id"]
+            assert coworking["working_schedule"]["start_time"] == expected[coworking["id"]]
+
+    @pytest.mark.asyncio
+    async def test_coworking_without_seats_is_not_available(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager
+    ) -> None:
+        await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        interval = {"from": "2024-05-20T14:00:00", "to": "2024-05-20T15:00:00"}
+        response: httpx.Response = await rpc_request(
+            url=coworking_url,
+            method="available_coworking_by_timestamp",
+            params={"interval": interval}
+        )
+        assert response.json()["result"] == []
+
+    @pytest.mark.asyncio
+    async def test_seat_busy_in_interval_despite_other_reservations(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager
+    ) -> None:
+        """
+        Проверяет, что непересекающееся бронирование места не делает его свободным,
+        если другое бронирование того же места пересекает интервал
+        """
+        user: User = await db_manager.create(
+            User, email="correct@urfu.me", hashed_password="hashed_pwd",
+            last_name="Surname", first_name="Name", is_student=True,
+        )
+        coworking: Coworking = await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        seat: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        for start_hour, status in [(10, BookingStatus.CONFIRMED), (14, BookingStatus.NEW)]:
+            await db_manager.create(
+                Reservation, user=user, seat=seat, status=status,
+                session_start=datetime(2024, 5, 20, start_hour),
+                session_end=datetime(2024, 5, 20, start_hour + 1),
+            )
+        await db_manager.create(
+            CoworkingEvent, coworking=coworking, date=date(2024, 5, 21), name="null",
+        )
+        interval = {"from": "2024-05-20T14:30:00", "to": "2024-05-20T15:00:00"}
+        response: httpx.Response = await rpc_request(
+            url=coworking_url,
+            method="available_coworking_by_timestamp",
+            params={"interval": interval}
+        )
+        assert response.json()["result"] == []
+
+    @pytest.mark.asyncio
+    async def test_free_seats_count_by_place_type(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager
+    ) -> None:
+        user: User = await db_manager.create(
+            User, email="correct@urfu.me", hashed_password="hashed_pwd",
+            last_name="Surname", first_name="Name", is_student=True,
+        )
+        coworking: Coworking = await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        tables = [
+            await db_manager.create(
+                CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+            )
+            for _ in range(3)
+        ]
+        meeting_room: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.MEETING_ROOM,
+            seats_count=10,
+        )
+        for seat, status in [
+            (tables[0], BookingStatus.CONFIRMED),
+            (tables[1], BookingStatus.CANCELLED),
+            (meeting_room, BookingStatus.AWAIT_CONFIRM),
+        ]:
+            await db_manager.create(
+                Reservation, user=user, seat=seat, status=status,
+                session_start=datetime(2024, 5, 20, 14),
+                session_end=datetime(2024, 5, 20, 16),
+            )
+        interval = {"from": "2024-05-20T15:00:00", "to": "2024-05-20T17:00:00"}
+        response: httpx.Response = await rpc_request(
+            url=coworking_url,
+            method="available_coworking_by_timestamp",
+            params={"interval": interval}
+        )
+        result = response.json()["result"]
+        assert len(result) == 1
+        assert result[0]["id"] == coworking.id
+        assert result[0]["free"] == {"table": 2, "meeting_room": 0}
+
+
 class TestSearchCoworking:
     @pytest.mark.asyncio
     async def test_no_coworkings(self, rpc_request: Callable) -> None:
@@ -521,3 +724,150 @@ class TestSearchCoworking:
             )
             json_: Dict[str, Any] = response.json()
             assert len(json_["result"]) == 0
+
+
+class TestAvailabilityGrid:
+    @pytest.mark.asyncio
+    async def test_coworking_not_exists(self, rpc_request: Callable) -> None:
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="get_availability_grid",
+            params={
+                "coworking_id": os.urandom(16).hex(),
+                "params": {"date_from": "2024-05-20", "date_to": "2024-05-20"}
+            }
+        )
+        json_ = response.json()
+        assert json_["error"]["code"] == -32008, json_
+
+    @pytest.mark.asyncio
+    async def test_too_long_range(self, rpc_request: Callable) -> None:
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="get_availability_grid",
+            params={
+                "coworking_id": os.urandom(16).hex(),
+                "params": {"date_from": "2024-05-20", "date_to": "2024-05-27"}
+            }
+        )
+        json_ = response.json()
+        assert json_["error"]["code"] == -32602, json_
+
+    @pytest.mark.asyncio
+    async def test_grid_with_schedule_and_reservations(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager
+    ) -> None:
+        """
+        Тестирует, что слоты вне расписания закрыты, а пересекающиеся со слотом бронирования
+        уменьшают количество свободных мест
+        """
+        user: User = await db_manager.create(
+            User, email="example@urfu.me", hashed_password="password",
+            last_name="Surname", first_name="Name", is_student=True,
+        )
+        coworking: Coworking = await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        await db_manager.create(
+            WorkingSchedule, coworking=coworking, week_day=0,
+            start_time=datetime(2024, 5, 20, 10), end_time=datetime(2024, 5, 20, 12),
+        )
+        table: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        for start, end, status in [
+            (datetime(2024, 5, 20, 10, 15), datetime(2024, 5, 20, 10, 45), BookingStatus.NEW),
+            (datetime(2024, 5, 20, 10, 45), datetime(2024, 5, 20, 11), BookingStatus.NEW),
+            (datetime(2024, 5, 20, 11), datetime(2024, 5, 20, 12), BookingStatus.CANCELLED),
+        ]:
+            await db_manager.create(
+                Reservation, user=user, seat=table, session_start=start, session_end=end,
+                status=status,
+            )
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="get_availability_grid",
+            params={
+                "coworking_id": coworking.id,
+                "params": {"date_from": "2024-05-20", "date_to": "2024-05-21"}
+            }
+        )
+        result = response.json()["result"]
+        assert len(result["slots"]) == 96
+        assert result["slots"][20] == "2024-05-20T10:00:00"
+        assert result["is_open"][19:25] == [False, True, True, True, True, False]
+        assert result["free"]["table"][19:25] == [0, 1, 1, 2, 2, 0]
+        assert result["free"]["meeting_room"][19:25] == [0] * 6
+        # Вторник без расписания закрыт
+        assert not any(result["is_open"][48:])
+
+    @pytest.mark.asyncio
+    async def test_grid_with_event(self, rpc_request: Callable, db_manager: Manager) -> None:
+        coworking: Coworking = await db_manager.create(
+            Coworking, avatar="image.png", title="Title", id=os.urandom(16).hex(),
+            institute="IRIT RTF", description="Description", address="Mira 32",
+        )
+        await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        await db_manager.create(
+            CoworkingEvent, coworking=coworking, date=date(2024, 5, 20), name="null",
+        )
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="get_availability_grid",
+            params={
+                "coworking_id": coworking.id,
+                "params": {"date_from": "2024-05-20", "date_to": "2024-05-21", "slot_minutes": 15}
+            }
+        )
+        result = response.json()["result"]
+        assert result["slot_minutes"] == 15
+        assert result["free"]["table"] == [0] * 96 + [1] * 96
+
+
+class TestRankedSearch:
+    @pytest_asyncio.fixture()
+    async def coworkings(self, db_manager: Manager) -> None:
+        for title, institute, address in [
+            ("Радиоточка", "ИРИТ РТФ", "ул. Мира, д. 32"),
+            ("Антресоли", "ГУК", "ул. Мира, д. 19"),
+            ("Точка кипения", "ИНФО", "ул. Тургенева, д. 4"),
+        ]:
+            await db_manager.create(
+                Coworking, title=title, institute=institute, description="Коворкинг",
+                address=address,
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("query", ["Радиоточка", "радиоточк", "радиотчка", "иРиТ"])
+    async def test_found_with_typos(self, rpc_request: Callable, coworkings, query: str) -> None:
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="search_coworkings", params={"search": {"query": query}}
+        )
+        json_: Dict[str, Any] = response.json()
+        assert json_["result"][0]["title"] == "Радиоточка", json_
+
+    @pytest.mark.asyncio
+    async def test_ranked_and_paginated(self, rpc_request: Callable, coworkings) -> None:
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="search_coworkings", params={"search": {"query": "точка"}}
+        )
+        titles = [coworking["title"] for coworking in response.json()["result"]]
+        assert titles == ["Точка кипения", "Радиоточка"]
+
+        response = await rpc_request(
+            url=coworking_url, method="search_coworkings",
+            params={"search": {"query": "точка", "limit": 1, "offset": 1}}
+        )
+        titles = [coworking["title"] for coworking in response.json()["result"]]
+        assert titles == ["Радиоточка"]
+
+    @pytest.mark.asyncio
+    async def test_nothing_found(self, rpc_request: Callable, coworkings) -> None:
+        response: httpx.Response = await rpc_request(
+            url=coworking_url, method="search_coworkings", params={"search": {"query": "бассейн"}}
+        )
+        assert response.json()["result"] == []
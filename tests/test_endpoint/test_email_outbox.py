@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+import pytest
+from aioredis import Redis
+
+from common.dto.email import EmailMessageDTO
+from storage.email_outbox import RedisEmailOutbox
+
+
+@pytest.mark.asyncio
+async def test_only_dead_letter_stream_is_capped(redis: Redis) -> None:
+    outbox = RedisEmailOutbox(
+        redis, 'test:email:capped', timedelta(minutes=5), dead_letter_maxlen=2
+    )
+    try:
+        for i in range(5):
+            await outbox.enqueue(EmailMessageDTO(to=f'{i}@urfu.me', subject='s', html='h'))
+        assert await redis.xlen(outbox.stream) == 5
+
+        entries = await outbox.receive('test-consumer', 10, timedelta(milliseconds=1))
+        for entry_id, message in entries[:4]:
+            await outbox.dead_letter(entry_id, message)
+        entry_id, message = entries[4]
+        await outbox.retry(entry_id, message)
+
+        assert await redis.xlen(outbox.dead_letter_stream) == 2
+        assert await redis.xlen(outbox.stream) == 1
+    finally:
+        await redis.delete(outbox.stream, outbox.dead_letter_stream)
+
+
+@pytest.mark.asyncio
+async def test_dead_letter_redacts_tokens(redis: Redis, email_outbox: RedisEmailOutbox) -> None:
+    html = (
+        '<a href="https://urfu.me/password-recovery?token=secret-token&amp;email=a@urfu.me">'
+        'https://urfu.me/password-recovery?token=secret-token&email=a@urfu.me</a>'
+    )
+    await email_outbox.enqueue(EmailMessageDTO(to='a@urfu.me', subject='s', html=html))
+    [(entry_id, message)] = await email_outbox.receive(
+        'test-consumer', 10, timedelta(milliseconds=1)
+    )
+    await email_outbox.dead_letter(entry_id, message)
+
+    [(_, fields)] = await redis.xrange(email_outbox.dead_letter_stream)
+    dead = EmailMessageDTO.model_validate_json(fields[RedisEmailOutbox.FIELD.encode()])
+    assert 'secret-token' not in dead.html
+    assert dead.html.count('?token=[redacted]&') == 2
+    assert dead.to == 'a@urfu.me'
@@ -0,0 +1,72 @@
+from typing import Callable
+
+import httpx
+import pytest
+import pytest_asyncio
+from peewee_async import Manager
+
+from infrastructure.database import User
+
+
+@pytest_asyncio.fixture()
+async def admin_access_token(
+        rpc_request: Callable,
+        db_manager: Manager,
+        registered_user: dict
+) -> str:
+    user = await db_manager.get(User, User.email == registered_user['email'])
+    user.is_admin = True
+    await db_manager.update(user)
+    response: httpx.Response = await rpc_request(
+        url='/api/v1/auth', method='login',
+        params={'data': {
+            'email': registered_user['email'],
+            'password': 'Password1!',
+            'fingerprint': 'fingerprint',
+        }}
+    )
+    return response.json()['result']['access_token']
+
+
+class TestHealth:
+    @pytest.mark.asyncio
+    async def test_healthy(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get('/api/v1/health')
+        assert response.status_code == 200
+        assert response.json() == {'healthy': True, 'checks': {'database': True, 'redis': True}}
+
+    @pytest.mark.asyncio
+    async def test_database_pool_stats_no_user(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get('/api/v1/health/db-pool')
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_database_pool_stats_not_admin(
+            self,
+            async_client: httpx.AsyncClient,
+            access_token: str
+    ) -> None:
+        response = await async_client.get(
+            '/api/v1/health/db-pool',
+            headers={'Authorization': access_token}
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_database_pool_stats(
+            self,
+            async_client: httpx.AsyncClient,
+            admin_access_token: str
+    ) -> None:
+        response = await async_client.get(
+            '/api/v1/health/db-pool',
+            headers={'Authorization': admin_access_token}
+        )
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats['max_size'] == 20
+        assert 1 <= stats['size'] <= stats['max_size']
+        assert stats['used'] == stats['size'] - stats['free']
+        assert stats['acquired'] > 0
+        assert stats['timeouts'] == 0
+        assert stats['acquire_seconds_max'] >= stats['acquire_seconds_avg'] >= 0
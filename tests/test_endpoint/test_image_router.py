@@ -0,0 +1,292 @@
+import hashlib
+import io
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from PIL import Image
+
+from common.utils.http_range import ByteRange
+from controllers.rest.images import ImageRouter
+from storage.image_cache import LocalImageCache
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def etag_of(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+PNG = make_png()
+ETAG = etag_of(PNG)
+
+
+@dataclass
+class InMemoryObject:
+    data: bytes
+    content_length: int
+    content_type: Optional[str] = None
+    content_range: Optional[str] = None
+    etag: Optional[str] = None
+    closed: bool = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.data
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class InMemoryS3Repository:
+    """Хранилище с файлами в памяти, запоминающее запрошенные имена"""
+
+    def __init__(self, files: Dict[str, bytes]):
+        self.files = files
+        self.requested: List[str] = []
+
+    async def get_object(
+            self,
+            filename: str,
+            byte_range: Optional[ByteRange] = None
+    ) -> InMemoryObject:
+        self.requested.append(filename)
+        if filename not in self.files:
+            raise FileNotFoundError(filename)
+        data = self.files[filename]
+        if byte_range is None:
+            return InMemoryObject(data, len(data), 'image/png', etag=etag_of(data))
+        start, end = byte_range.resolve(len(data))
+        return InMemoryObject(
+            data[start:end + 1], end - start + 1, 'image/png',
+            f'bytes {start}-{end}/{len(data)}', etag_of(data)
+        )
+
+
+@pytest.fixture
+def s3_repository() -> InMemoryS3Repository:
+    # Расширение в имени не совпадает с содержимым, как при загрузке с поддельным именем
+    return InMemoryS3Repository({'avatar.jpg': PNG})
+
+
+@pytest.fixture
+def image_cache(tmp_path) -> LocalImageCache:
+    return LocalImageCache(str(tmp_path), max_bytes=1024 * 1024)
+
+
+@pytest_asyncio.fixture
+async def image_client(
+        s3_repository: InMemoryS3Repository,
+        image_cache: LocalImageCache
+) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(ImageRouter(None, s3_repository, image_cache, None).build_api_router())
+    async with httpx.AsyncClient(app=app, base_url='http://testserver') as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_falls_through_to_s3(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository,
+        image_cache: LocalImageCache
+) -> None:
+    response = await image_client.get('/api/v1/image/avatar.jpg')
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert s3_repository.requested == ['avatar.jpg']
+    assert image_cache.get('avatar.jpg') is not None
+
+    response = await image_client.get('/api/v1/image/avatar.jpg')
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert s3_repository.requested == ['avatar.jpg']
+
+
+@pytest.mark.asyncio
+async def test_media_type_is_taken_from_signature(image_client: httpx.AsyncClient) -> None:
+    response = await image_client.get('/api/v1/image/avatar.jpg')
+    assert response.headers['Content-Type'] == 'image/png'
+
+
+@pytest.mark.asyncio
+async def test_missing_image(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository,
+        image_cache: LocalImageCache
+) -> None:
+    response = await image_client.get('/api/v1/image/missing.png')
+    assert response.status_code == 404
+    assert s3_repository.requested == ['missing.png']
+    assert image_cache.get('missing.png') is None
+
+
+@pytest.mark.asyncio
+async def test_range_of_cached_image(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository
+) -> None:
+    await image_client.get('/api/v1/image/avatar.jpg')
+    response = await image_client.get('/api/v1/image/avatar.jpg', headers={'Range': 'bytes=-10'})
+    assert response.status_code == 206
+    assert response.content == PNG[-10:]
+    assert response.headers['Content-Range'] == f'bytes {len(PNG) - 10}-{len(PNG) - 1}/{len(PNG)}'
+    assert response.headers['Content-Length'] == '10'
+    assert response.headers['Content-Type'] == 'image/png'
+    assert s3_repository.requested == ['avatar.jpg']
+
+
+@pytest.mark.asyncio
+async def test_range_of_uncached_image_is_requested_from_s3(
+        image_client: httpx.AsyncClient,
+        image_cache: LocalImageCache
+) -> None:
+    response = await image_client.get('/api/v1/image/avatar.jpg', headers={'Range': 'bytes=0-7'})
+    assert response.status_code == 206
+    assert response.content == PNG[:8]
+    assert response.headers['Content-Range'] == f'bytes 0-7/{len(PNG)}'
+    assert image_cache.get('avatar.jpg') is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('cached', [True, False])
+async def test_unsatisfiable_range(image_client: httpx.AsyncClient, cached: bool) -> None:
+    if cached:
+        await image_client.get('/api/v1/image/avatar.jpg')
+    response = await image_client.get(
+        '/api/v1/image/avatar.jpg', headers={'Range': f'bytes={len(PNG)}-'}
+    )
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(PNG)}'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('headers', [
+    {'Range': 'bytes=0-1,4-5'},
+    {'Range': 'bytes=0-1', 'If-Range': '"other"'},
+    {'Range': 'bytes=0-1', 'If-Range': f'W/{ETAG}'},
+])
+async def test_range_falls_back_to_whole_image(image_client: httpx.AsyncClient, headers) -> None:
+    response = await image_client.get('/api/v1/image/avatar.jpg', headers=headers)
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert 'Content-Range' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_range_with_matching_if_range(image_client: httpx.AsyncClient) -> None:
+    response = await image_client.get(
+        '/api/v1/image/avatar.jpg', headers={'Range': 'bytes=0-1', 'If-Range': ETAG}
+    )
+    assert response.status_code == 206
+    assert response.content == PNG[:2]
+    assert response.headers['ETag'] == ETAG
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('if_none_match', [ETAG, f'W/{ETAG}', f'"other", {ETAG}', '*'])
+@pytest.mark.parametrize('range_header', [{}, {'Range': 'bytes=0-1'}])
+async def test_not_modified(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository,
+        if_none_match: str,
+        range_header: Dict[str, str]
+) -> None:
+    response = await image_client.get(
+        '/api/v1/image/avatar.jpg', headers={'If-None-Match': if_none_match, **range_header}
+    )
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['ETag'] == ETAG
+    assert s3_repository.requested == ['avatar.jpg']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('if_none_match', ['*', '"avatar_card.png"', ETAG])
+async def test_missing_image_is_not_reported_unmodified(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository,
+        if_none_match: str
+) -> None:
+    del s3_repository.files['avatar.jpg']
+    response = await image_client.get(
+        '/api/v1/image/avatar.jpg', params={'size': 'card'},
+        headers={'If-None-Match': if_none_match}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_modified_image_is_served(image_client: httpx.AsyncClient) -> None:
+    response = await image_client.get(
+        '/api/v1/image/avatar.jpg', headers={'If-None-Match': '"previous"'}
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] == ETAG
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+@pytest.mark.asyncio
+async def test_variant_falls_back_to_original(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository
+) -> None:
+    response = await image_client.get(
+        '/api/v1/image/avatar.jpg', params={'size': 'card'}, headers={'Accept': 'image/webp'}
+    )
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers['Vary'] == 'Accept'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'ETag' not in response.headers
+    assert 'Last-Modified' not in response.headers
+    assert s3_repository.requested == ['avatar_card.webp', 'avatar.jpg']
+
+
+@pytest.mark.asyncio
+async def test_variant_created_after_fallback_is_served(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository
+) -> None:
+    url, params = '/api/v1/image/avatar.jpg', {'size': 'card'}
+    response = await image_client.get(url, params=params, headers={'If-None-Match': ETAG})
+    assert response.status_code == 200
+    assert response.content == PNG
+
+    s3_repository.files['avatar_card.jpg'] = b'card'
+    response = await image_client.get(url, params=params, headers={'If-None-Match': ETAG})
+    assert response.status_code == 200
+    assert response.content == b'card'
+    assert response.headers['ETag'] == etag_of(b'card')
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+@pytest.mark.asyncio
+async def test_variant_is_served_by_size(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository
+) -> None:
+    s3_repository.files['avatar_thumbnail.jpg'] = b'thumbnail'
+    response = await image_client.get('/api/v1/image/avatar.jpg', params={'size': 'thumbnail'})
+    assert response.status_code == 200
+    assert response.content == b'thumbnail'
+    assert response.headers['ETag'] == etag_of(b'thumbnail')
+    assert s3_repository.requested == ['avatar_thumbnail.jpg']
+
+
+@pytest.mark.asyncio
+async def test_unknown_size_returns_original(
+        image_client: httpx.AsyncClient,
+        s3_repository: InMemoryS3Repository
+) -> None:
+    response = await image_client.get('/api/v1/image/avatar.jpg', params={'size': 'huge'})
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert 'Vary' not in response.headers
+    assert s3_repository.requested == ['avatar.jpg']
@@ -0,0 +1,176 @@
+from datetime import datetime
+from typing import Type
+
+import peewee
+import pytest
+from peewee_async import Manager
+
+from infrastructure.database import models
+from infrastructure.database.enum import BookingStatus, PlaceType
+from infrastructure.database.migrations import MigrationRunner, load_migrations
+from infrastructure.database.migrations.versions import v0001_initial_schema
+
+
+class TestMigrations:
+    def test_versions_are_sequential(self) -> None:
+        versions = [migration.version for migration in load_migrations()]
+        assert versions == list(range(1, len(versions) + 1))
+
+    @pytest.mark.parametrize('index', [
+        'reservation_seat_session_active_idx',
+        'reservation_user_session_end_idx',
+        'coworkingevent_coworking_date_idx',
+        'workingschedule_coworking_week_day_idx',
+    ])
+    def test_query_indexes_exist(self, db_manager: Manager, index: str) -> None:
+        with db_manager.allow_sync():
+            cursor = db_manager.database.execute_sql(
+                'SELECT 1 FROM pg_indexes WHERE indexname = %s', (index,)
+            )
+            assert cursor.fetchone() is not None
+
+    def test_rerun_is_noop(self, db_manager: Manager) -> None:
+        with db_manager.allow_sync():
+            runner = MigrationRunner(db_manager.database)
+            assert runner.pending() == []
+            assert runner.run() == []
+
+
+    def test_initial_schema_cancels_overlapping_reservations(self, db_manager: Manager) -> None:
+        database = db_manager.database
+        with db_manager.allow_sync(), database.atomic() as transaction:
+            # База, созданная до появления ограничения
+            database.execute_sql(
+                'ALTER TABLE seats_reservations DROP CONSTRAINT seats_reservations_no_overlap'
+            )
+            user = models.User.create(
+                id='user', email='name.surname@urfu.ru', hashed_password='hash',
+                last_name='Surname', first_name='Name', is_student=False, is_admin=False
+            )
+            coworking = models.Coworking.create(
+                id='coworking', title='Title', institute='Institute',
+                description='Description', address='Address'
+            )
+            seat = models.CoworkingSeat.create(
+                coworking=coworking, place_type=PlaceType.TABLE, seats_count=1
+            )
+
+            def reserve(start: int, end: int, created: int, status=BookingStatus.CONFIRMED):
+                return models.Reservation.create(
+                    user=user, seat=seat, status=status,
+                    session_start=datetime(2024, 5, 20, start),
+                    session_end=datetime(2024, 5, 20, end),
+                    created_at=datetime(2024, 5, 1, created)
+                ).id
+
+            first = reserve(10, 12, created=1)
+            # Пересекается с первым, но не с третьим: после его отмены третье остается
+            second = reserve(11, 14, created=2)
+            third = reserve(13, 15, created=3)
+            already_cancelled = reserve(10, 12, created=0, status=BookingStatus.CANCELLED)
+            adjacent = reserve(12, 13, created=4)
+
+            v0001_initial_schema.up(database)
+
+            statuses = {
+                reservation.id: reservation.status for reservation in models.Reservation.select()
+            }
+            assert statuses == {
+                first: BookingStatus.CONFIRMED,
+                second: BookingStatus.CANCELLED,
+                third: BookingStatus.CONFIRMED,
+                already_cancelled: BookingStatus.CANCELLED,
+                adjacent: BookingStatus.CONFIRMED,
+            }
+            assert database.execute_sql(
+                "SELECT 1 FROM pg_constraint WHERE conname = 'seats_reservations_no_overlap'"
+            ).fetchone() is not None
+            transaction.rollback()
+
+
+# Типы столбцов PostgreSQL, в которые peewee создает поля моделей
+COLUMN_TYPES = {
+    'BIGAUTO': 'bigint',
+    'BIGINT': 'bigint',
+    'INT': 'integer',
+    'SMALLINT': 'smallint',
+    'VARCHAR': 'character varying',
+    'BOOL': 'boolean',
+    'DATE': 'date',
+    'TIME': 'time without time zone',
+    'DATETIME': 'timestamp without time zone',
+}
+# Коды pg_constraint.confdeltype
+ON_DELETE_ACTIONS = {
+    None: 'a', 'RESTRICT': 'r', 'CASCADE': 'c', 'SET NULL': 'n', 'SET DEFAULT': 'd'
+}
+# В отличие от Database.get_indexes учитывает и индексы секционированных таблиц
+INDEXES_QUERY = (
+    'SELECT idx.indisunique, ARRAY('
+    'SELECT a.attname FROM unnest(idx.indkey) WITH ORDINALITY AS k(attnum, n) '
+    'JOIN pg_attribute a ON a.attrelid = idx.indrelid AND a.attnum = k.attnum '
+    'ORDER BY k.n) '
+    'FROM pg_index idx WHERE idx.indrelid = %s::regclass'
+)
+
+
+@pytest.mark.parametrize('model', [getattr(models, name) for name in models.__all__])
+class TestSchemaMatchesModels:
+    """Схема, созданная миграциями, совпадает с описанием моделей peewee"""
+
+    def test_columns(self, db_manager: Manager, model: Type[peewee.Model]) -> None:
+        with db_manager.allow_sync():
+            columns = {
+                column.name: column
+                for column in db_manager.database.get_columns(model._meta.table_name)
+            }
+        assert set(columns) == {field.column_name for field in model._meta.sorted_fields}
+        for field in model._meta.sorted_fields:
+            column = columns[field.column_name]
+            assert column.data_type == COLUMN_TYPES[field.field_type], field.name
+            assert column.null == field.null, field.name
+
+    def test_primary_key(self, db_manager: Manager, model: Type[peewee.Model]) -> None:
+        with db_manager.allow_sync():
+            primary_keys = db_manager.database.get_primary_keys(model._meta.table_name)
+        expected = [field.column_name for field in model._meta.get_primary_keys()]
+        assert sorted(primary_keys) == sorted(expected)
+
+    def test_foreign_keys(self, db_manager: Manager, model: Type[peewee.Model]) -> None:
+        with db_manager.allow_sync():
+            foreign_keys = db_manager.database.get_foreign_keys(model._meta.table_name)
+            on_delete = dict(db_manager.database.execute_sql(
+                'SELECT a.attname, c.confdeltype FROM pg_constraint c '
+                'JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] '
+                "WHERE c.contype = 'f' AND c.conrelid = %s::regclass",
+                (model._meta.table_name,)
+            ).fetchall())
+        actual = {
+            (key.column, key.dest_table, key.dest_column, on_delete[key.column])
+            for key in foreign_keys
+        }
+        expected = {
+            (
+                field.column_name,
+                field.rel_model._meta.table_name,
+                field.rel_field.column_name,
+                ON_DELETE_ACTIONS[field.on_delete]
+            )
+            for field in model._meta.refs
+        }
+        assert actual == expected
+
+    def test_indexes(self, db_manager: Manager, model: Type[peewee.Model]) -> None:
+        with db_manager.allow_sync():
+            indexes = db_manager.database.execute_sql(
+                INDEXES_QUERY, (model._meta.table_name,)
+            ).fetchall()
+        for field in model._meta.sorted_fields:
+            if not (field.index or field.unique) or field.primary_key:
+                continue
+            # Индекс по полю может быть префиксом составного индекса из миграций
+            covering = [
+                columns for unique, columns in indexes
+                if columns[:1] == [field.column_name] and unique == field.unique
+            ]
+            assert covering, field.name
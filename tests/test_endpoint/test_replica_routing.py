@@ -0,0 +1,130 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from aioredis import Redis
+from peewee_async import Manager
+
+from common.context import CONTEXT_USER
+from common.dto.input_params import SearchParams
+from infrastructure.config import DatabaseSettings
+from infrastructure.database import Coworking, User
+from infrastructure.database.db import create_database
+from storage.coworking import CoworkingRepository
+from storage.recent_writes import RedisRecentWrites
+from storage.reservation import SeatOccupancyIndex
+from storage.reservation.reservation_repository import ReservationRepository
+from storage.routing_manager import RoutingManager
+
+
+@pytest_asyncio.fixture
+async def routing_manager(db_manager: Manager, db_settings: DatabaseSettings, redis: Redis):
+    """
+    Реплика берется из DATABASE_REPLICA_HOSTS, например второго локального экземпляра
+    Postgres с потоковой репликацией. Без нее реплику заменяет отдельный пул к основной базе
+    """
+    host, port = (db_settings.replica_hosts or [(None, None)])[0]
+    replica = Manager(create_database(db_settings, host, port))
+    recent_writes = RedisRecentWrites(redis, timedelta(seconds=5))
+    manager = RoutingManager(db_manager.database, [replica], recent_writes)
+    yield manager
+    await replica.close()
+    keys = await redis.keys(f'{RedisRecentWrites.KEY_PREFIX}*')
+    if keys:
+        await redis.delete(*keys)
+
+
+async def in_request(user, coroutine_function):
+    """Выполняет функцию в отдельном контексте, как при обработке запроса"""
+
+    async def request():
+        CONTEXT_USER.set(user)
+        return await coroutine_function()
+
+    return await asyncio.create_task(request())
+
+
+async def create_user(manager: Manager, email: str) -> User:
+    return await manager.create(
+        User, email=email, hashed_password='hash', last_name='Surname', first_name='Name',
+        is_student=False
+    )
+
+
+async def create_coworking(manager: Manager) -> Coworking:
+    return await manager.create(
+        Coworking, title='Title', institute='Institute', description='Description',
+        address='Address'
+    )
+
+
+class TestRoutingManager:
+    @pytest.mark.asyncio
+    async def test_reads_go_to_replica(
+            self,
+            db_manager: Manager,
+            routing_manager: RoutingManager
+    ) -> None:
+        replica = routing_manager.replicas[0]
+        repository = CoworkingRepository(routing_manager)
+        await create_coworking(db_manager)
+
+        acquired = replica.database.counters.acquired
+        coworkings = await in_request(
+            None, lambda: repository.find_by_search_params(SearchParams())
+        )
+        assert replica.database.counters.acquired > acquired
+        assert len(coworkings) == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_loader_reads_primary(
+            self,
+            db_manager: Manager,
+            routing_manager: RoutingManager
+    ) -> None:
+        replica = routing_manager.replicas[0]
+        repository = CoworkingRepository(routing_manager)
+        coworking = await create_coworking(db_manager)
+
+        acquired = replica.database.counters.acquired
+        loaded = await in_request(None, lambda: repository.get_coworking_by_id(coworking.id))
+        assert replica.database.counters.acquired == acquired
+        assert loaded.id == coworking.id
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes(
+            self,
+            db_manager: Manager,
+            routing_manager: RoutingManager
+    ) -> None:
+        author = await create_user(db_manager, 'author.surname@urfu.ru')
+        other = await create_user(db_manager, 'other.surname@urfu.ru')
+        repository = ReservationRepository(routing_manager, SeatOccupancyIndex())
+
+        async def write_and_read():
+            await create_coworking(routing_manager)
+            return await routing_manager.reader()
+
+        # В запросе с записью и в следующих запросах автора чтения идут в основную базу
+        assert await in_request(author, write_and_read) is routing_manager
+        assert await in_request(author, routing_manager.reader) is routing_manager
+        assert await in_request(other, routing_manager.reader) is routing_manager.replicas[0]
+
+        acquired = routing_manager.replicas[0].database.counters.acquired
+        reservations = await in_request(author, lambda: repository.get_user_reservations(author))
+        assert list(reservations) == []
+        assert routing_manager.replicas[0].database.counters.acquired == acquired
+
+    @pytest.mark.asyncio
+    async def test_write_without_user_is_not_marked(
+            self,
+            redis: Redis,
+            routing_manager: RoutingManager
+    ) -> None:
+        async def write_and_read():
+            await create_coworking(routing_manager)
+            return await routing_manager.reader()
+
+        assert await in_request(None, write_and_read) is routing_manager.replicas[0]
+        assert await redis.keys(f'{RedisRecentWrites.KEY_PREFIX}*') == []
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+import peewee
+import pytest
+from peewee_async import Manager
+
+from common.service.reservation_lifecycle_worker import ReservationLifecycleWorker
+from infrastructure.database import PlaceType
+from infrastructure.database.enum import BookingStatus
+from infrastructure.database.models import (
+    Coworking,
+    CoworkingSeat,
+    Reservation,
+    ReservationArchive
+)
+from storage.reservation import SeatOccupancyIndex
+from storage.reservation.reservation_repository import ReservationRepository
+
+NOW = datetime(2024, 6, 7, 12)
+
+
+@pytest.mark.asyncio
+async def test_run_once_moves_reservations_by_time(
+        db_manager: Manager,
+        registered_user: Dict[str, Any],
+) -> None:
+    coworking: Coworking = await db_manager.create(
+        Coworking, title="a", institute="a", description="a", address="a",
+    )
+    seat: CoworkingSeat = await db_manager.create(
+        CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+    )
+    # (начало относительно NOW, статус до, ожидаемый статус после)
+    cases = [
+        (timedelta(hours=-5), BookingStatus.CONFIRMED, BookingStatus.PASSED),
+        (timedelta(hours=-3), BookingStatus.NEW, BookingStatus.CANCELLED),
+        (timedelta(minutes=-20), BookingStatus.AWAIT_CONFIRM, BookingStatus.CANCELLED),
+        (timedelta(minutes=-10), BookingStatus.AWAIT_CONFIRM, BookingStatus.AWAIT_CONFIRM),
+        (timedelta(hours=-8), BookingStatus.CANCELLED, BookingStatus.CANCELLED),
+        (timedelta(minutes=20), BookingStatus.NEW, BookingStatus.AWAIT_CONFIRM),
+        (timedelta(minutes=25), BookingStatus.NEW, BookingStatus.AWAIT_CONFIRM),
+        (timedelta(hours=2), BookingStatus.NEW, BookingStatus.NEW),
+        (timedelta(hours=4), BookingStatus.CONFIRMED, BookingStatus.CONFIRMED),
+    ]
+    reservations = []
+    for shift, status, expected in cases:
+        start = NOW + shift
+        reservation = await db_manager.create(
+            Reservation,
+            user_id=registered_user["id"],
+            seat=seat,
+            session_start=start,
+            session_end=start + timedelta(minutes=5),
+            status=status,
+        )
+        reservations.append((reservation.id, expected))
+
+    repository = ReservationRepository(db_manager, SeatOccupancyIndex())
+    worker = ReservationLifecycleWorker(
+        repository,
+        confirm_window=timedelta(minutes=30),
+        no_show_grace=timedelta(minutes=15),
+        batch_size=1,
+    )
+    counts = await worker.run_once(NOW)
+
+    assert counts == {'cancelled': 2, 'passed': 1, 'await_confirm': 2, 'archived': 4}
+    for reservation_id, expected in reservations:
+        reservation = await repository.get(reservation_id)
+        assert reservation.status == expected, reservation_id
+    assert await worker.run_once(NOW) == {
+        'cancelled': 0, 'passed': 0, 'await_confirm': 0, 'archived': 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_finished_reservations_to_monthly_partitions(
+        db_manager: Manager,
+        registered_user: Dict[str, Any],
+        rpc_request: Callable,
+        access_token: str,
+) -> None:
+    coworking: Coworking = await db_manager.create(
+        Coworking, title="a", institute="a", description="a", address="a",
+    )
+    seat: CoworkingSeat = await db_manager.create(
+        CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+    )
+    statuses = {
+        datetime(2024, 5, 31, 10): BookingStatus.PASSED,
+        datetime(2024, 6, 1, 10): BookingStatus.CANCELLED,
+        datetime(2024, 6, 2, 10): BookingStatus.CONFIRMED,
+    }
+    ids = {}
+    for start, status in statuses.items():
+        reservation = await db_manager.create(
+            Reservation,
+            user_id=registered_user["id"],
+            seat=seat,
+            session_start=start,
+            session_end=start + timedelta(hours=1),
+            status=status,
+        )
+        ids[status] = reservation.id
+    repository = ReservationRepository(db_manager, SeatOccupancyIndex())
+
+    assert await repository.archive_finished(limit=10) == 2
+    assert await repository.archive_finished(limit=10) == 0
+
+    hot = await db_manager.execute(Reservation.select(Reservation.id).tuples())
+    assert list(hot) == [(ids[BookingStatus.CONFIRMED],)]
+    archived = await db_manager.execute(
+        ReservationArchive.select(
+            ReservationArchive.id, peewee.SQL('tableoid::regclass::text')
+        )
+        .order_by(ReservationArchive.id)
+        .tuples()
+    )
+    assert list(archived) == [
+        (ids[BookingStatus.PASSED], 'seats_reservations_archive_2024_05'),
+        (ids[BookingStatus.CANCELLED], 'seats_reservations_archive_2024_06'),
+    ]
+
+    response = await rpc_request(
+        url="/api/v1/reservation",
+        method="cancel_reservation",
+        params={"reservation_id": ids[BookingStatus.PASSED]},
+        headers={"Authorization": access_token},
+    )
+    assert response.json()['error']['data'] == {'error': 'reservation already passed'}
+
+
+@pytest.mark.asyncio
+async def test_cancel_does_not_overwrite_concurrent_transition(
+        db_manager: Manager,
+        registered_user: Dict[str, Any],
+) -> None:
+    coworking: Coworking = await db_manager.create(
+        Coworking, title="a", institute="a", description="a", address="a",
+    )
+    seat: CoworkingSeat = await db_manager.create(
+        CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+    )
+    created: Reservation = await db_manager.create(
+        Reservation,
+        user_id=registered_user["id"],
+        seat=seat,
+        session_start=NOW - timedelta(hours=2),
+        session_end=NOW - timedelta(hours=1),
+        status=BookingStatus.CONFIRMED,
+    )
+    repository = ReservationRepository(db_manager, SeatOccupancyIndex())
+    reservation = await repository.get(created.id)
+    # Планировщик переводит бронирование в прошедшие между чтением и отменой
+    await repository.mark_as_passed(NOW, limit=10)
+
+    assert await repository.mark_as_cancelled(reservation) is False
+    assert (await repository.get(created.id)).status == BookingStatus.PASSED
+
+    await repository.archive_finished(limit=10)
+    assert await repository.mark_as_cancelled(reservation) is False
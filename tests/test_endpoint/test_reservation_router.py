@@ -1,11 +1,14 @@
+import asyncio
 import datetime
 import logging
 from typing import Callable, Any, Dict
 
 import httpx
+import peewee
 import pytest
 import pytest_asyncio
 from peewee_async import Manager
+from psycopg2.errors import ExclusionViolation
 
 from infrastructure.database import PlaceType
 from infrastructure.database.enum import BookingStatus
@@ -519,6 +522,183 @@ class TestCreateReservationMethod:
         json_ = response.json()
         assert json_['error']['code'] == -32005
 
+    @pytest.mark.asyncio
+    async def test_seat_busy_by_another_user_reservation(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager,
+            access_token: str,
+    ) -> None:
+        user: User = await db_manager.create(
+            User, email="another.user@urfu.me", hashed_password="password",
+            last_name="Surname", first_name="Name", is_student=True,
+        )
+        coworking: Coworking = await db_manager.create(
+            Coworking, title="a", institute="a", description="a", address="a",
+        )
+        seat: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        session_start = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=1)
+        session_end = session_start + datetime.timedelta(hours=1)
+        hour = datetime.timedelta(hours=1)
+        intervals = [(session_start - 2 * hour, session_start - hour), (session_start, session_end)]
+        for start, end in intervals:
+            await db_manager.create(
+                Reservation, user=user, seat=seat, session_start=start, session_end=end,
+                status=BookingStatus.NEW,
+            )
+        response: httpx.Response = await rpc_request(
+            url='/api/v1/reservation',
+            method='create_reservation',
+            params={'reservation': {
+                'coworking_id': coworking.id, 'session_start': session_start.isoformat(),
+                'session_end': session_end.isoformat(), 'place_type': PlaceType.TABLE.value,
+            }},
+            headers={"Authorization": access_token}
+        )
+        json_: Dict[str, Any] = response.json()
+        assert json_['error']['code'] == -32005, json_
+
+    @pytest.mark.asyncio
+    async def test_create_after_cancel_same_time(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager,
+            access_token: str,
+    ) -> None:
+        coworking: Coworking = await db_manager.create(
+            Coworking, title="a", institute="a", description="a", address="a",
+        )
+        await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        session_start = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=1)
+        session_end = session_start + datetime.timedelta(hours=1)
+        params = {'reservation': {
+            'coworking_id': coworking.id, 'session_start': session_start.isoformat(),
+            'session_end': session_end.isoformat(), 'place_type': PlaceType.TABLE.value,
+        }}
+        response: httpx.Response = await rpc_request(
+            url='/api/v1/reservation', method='create_reservation', params=params,
+            headers={"Authorization": access_token}
+        )
+        reservation_id = response.json()['result']['id']
+        response = await rpc_request(
+            url='/api/v1/reservation', method='cancel_reservation',
+            params={'reservation_id': reservation_id}, headers={"Authorization": access_token}
+        )
+        assert response.json().get('error') is None
+
+        response = await rpc_request(
+            url='/api/v1/reservation', method='create_reservation', params=params,
+            headers={"Authorization": access_token}
+        )
+        json_: Dict[str, Any] = response.json()
+        assert json_.get('error') is None, json_
+        assert json_['result']['id'] != reservation_id
+
+    @pytest.mark.asyncio
+    async def test_concurrent_booking_of_single_seat(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager,
+            access_token: str,
+    ) -> None:
+        coworking: Coworking = await db_manager.create(
+            Coworking, title="a", institute="a", description="a", address="a",
+        )
+        await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        session_start = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=1)
+        session_end = session_start + datetime.timedelta(hours=1)
+        params = {'reservation': {
+            'coworking_id': coworking.id, 'session_start': session_start.isoformat(),
+            'session_end': session_end.isoformat(), 'place_type': PlaceType.TABLE.value,
+        }}
+        responses = await asyncio.gather(*(
+            rpc_request(
+                url='/api/v1/reservation', method='create_reservation', params=params,
+                headers={"Authorization": access_token}
+            )
+            for _ in range(5)
+        ))
+        results = [response.json() for response in responses]
+        assert len([json_ for json_ in results if json_.get('error') is None]) == 1, results
+        assert await db_manager.count(Reservation.select()) == 1
+
+    @pytest.mark.asyncio
+    async def test_booking_seat_referenced_by_uncommitted_reservation(
+            self,
+            rpc_request: Callable,
+            db_manager: Manager,
+            access_token: str,
+    ) -> None:
+        """
+        Вставка бронирования берет FOR KEY SHARE на строку места. Выбор свободного места
+        не должен конфликтовать с этой блокировкой и пропускать место для непересекающегося
+        времени
+        """
+        user: User = await db_manager.create(
+            User, email="name.surname@urfu.me", hashed_password="password",
+            last_name="Surname", first_name="Name", is_student=True,
+        )
+        coworking: Coworking = await db_manager.create(
+            Coworking, title="a", institute="a", description="a", address="a",
+        )
+        seat: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        session_start = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=1)
+        params = {'reservation': {
+            'coworking_id': coworking.id, 'place_type': PlaceType.TABLE.value,
+            'session_start': (session_start + datetime.timedelta(hours=2)).isoformat(),
+            'session_end': (session_start + datetime.timedelta(hours=3)).isoformat(),
+        }}
+        async with db_manager.transaction():
+            await db_manager.create(
+                Reservation, user=user, seat=seat, session_start=session_start,
+                session_end=session_start + datetime.timedelta(hours=1),
+                status=BookingStatus.NEW,
+            )
+            # Запрос выполняется в отдельной задаче и потому через другое соединение
+            response: httpx.Response = await asyncio.create_task(rpc_request(
+                url='/api/v1/reservation', method='create_reservation', params=params,
+                headers={"Authorization": access_token}
+            ))
+        json_ = response.json()
+        assert json_.get('error') is None, json_
+        assert json_['result']['seat']['id'] == seat.id
+
+    @pytest.mark.asyncio
+    async def test_overlapping_insert_rejected_by_constraint(
+            self,
+            db_manager: Manager,
+            registered_user: dict,
+            create_coworking_seat: CoworkingSeat,
+    ) -> None:
+        user: User = await db_manager.get(User, User.id == registered_user['id'])
+        session_start = datetime.datetime(2024, 5, 10, 10)
+        await db_manager.create(
+            Reservation, user=user, seat=create_coworking_seat, session_start=session_start,
+            session_end=session_start + datetime.timedelta(hours=2), status=BookingStatus.NEW,
+        )
+        with pytest.raises(peewee.IntegrityError) as error:
+            await db_manager.create(
+                Reservation, user=user, seat=create_coworking_seat,
+                session_start=session_start + datetime.timedelta(hours=1),
+                session_end=session_start + datetime.timedelta(hours=3),
+                status=BookingStatus.NEW,
+            )
+        assert isinstance(error.value.orig, ExclusionViolation)
+        await db_manager.create(
+            Reservation, user=user, seat=create_coworking_seat,
+            session_start=session_start + datetime.timedelta(hours=1),
+            session_end=session_start + datetime.timedelta(hours=3),
+            status=BookingStatus.CANCELLED,
+        )
+
 
 class TestCancelReservation:
     @pytest.mark.asyncio
@@ -678,3 +858,77 @@ class TestCancelReservation:
             Reservation, Reservation.id == reservation.id
         )
         assert booking.status == BookingStatus.CANCELLED
+
+
+class TestConfirmReservation:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('status', [BookingStatus.NEW, BookingStatus.AWAIT_CONFIRM])
+    async def test_successful_confirm(
+            self,
+            status: BookingStatus,
+            db_manager: Manager,
+            registered_user: Dict[str, Any],
+            access_token: str,
+            rpc_request: Callable
+    ) -> None:
+        coworking: Coworking = await db_manager.create(
+            Coworking, title="a", institute="a", description="a", address="a",
+        )
+        seat: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        reservation: Reservation = await db_manager.create(
+            Reservation,
+            user_id=registered_user["id"],
+            seat=seat,
+            session_start=datetime.datetime(2024, 6, 7, 10),
+            session_end=datetime.datetime(2024, 6, 7, 12),
+            status=status,
+        )
+        response: httpx.Response = await rpc_request(
+            url="/api/v1/reservation",
+            method="confirm_reservation",
+            params={"reservation_id": reservation.id},
+            headers={"Authorization": access_token},
+        )
+        assert response.json()["result"] is None
+        booking: Reservation = await db_manager.get(
+            Reservation, Reservation.id == reservation.id
+        )
+        assert booking.status == BookingStatus.CONFIRMED
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('status', [BookingStatus.CANCELLED, BookingStatus.PASSED])
+    async def test_confirm_finished_reservation(
+            self,
+            status: BookingStatus,
+            db_manager: Manager,
+            registered_user: Dict[str, Any],
+            access_token: str,
+            rpc_request: Callable
+    ) -> None:
+        coworking: Coworking = await db_manager.create(
+            Coworking, title="a", institute="a", description="a", address="a",
+        )
+        seat: CoworkingSeat = await db_manager.create(
+            CoworkingSeat, coworking=coworking, place_type=PlaceType.TABLE, seats_count=1,
+        )
+        reservation: Reservation = await db_manager.create(
+            Reservation,
+            user_id=registered_user["id"],
+            seat=seat,
+            session_start=datetime.datetime(2024, 6, 7, 10),
+            session_end=datetime.datetime(2024, 6, 7, 12),
+            status=status,
+        )
+        response: httpx.Response = await rpc_request(
+            url="/api/v1/reservation",
+            method="confirm_reservation",
+            params={"reservation_id": reservation.id},
+            headers={"Authorization": access_token},
+        )
+        assert response.json()['error']['code'] == -32005
+        booking: Reservation = await db_manager.get(
+            Reservation, Reservation.id == reservation.id
+        )
+        assert booking.status == status
@@ -101,3 +101,43 @@ class TestUpdateUserInfo:
         assert user.last_name == "Surname"
         assert user.first_name == "Name"
         assert user.patronymic is None
+
+
+class TestGetProfile:
+    @pytest.mark.asyncio
+    async def test_profile_after_update(self, rpc_request: Callable, access_token: str) -> None:
+        response: httpx.Response = await rpc_request(
+            url="/api/v1/user", method="get_profile", params=None,
+            headers={"Authorization": access_token}
+        )
+        assert response.json()["result"]["last_name"] == "Surname"
+        await rpc_request(
+            url="/api/v1/user",
+            method="update_user_data",
+            params={"values_set": {"last_name": "NewSurname"}},
+            headers={"Authorization": access_token}
+        )
+        response = await rpc_request(
+            url="/api/v1/user", method="get_profile", params=None,
+            headers={"Authorization": access_token}
+        )
+        assert response.json()["result"]["last_name"] == "NewSurname"
+
+    @pytest.mark.asyncio
+    async def test_profile_served_from_cache(
+            self,
+            rpc_request: Callable,
+            access_token: str,
+            db_manager: Manager
+    ) -> None:
+        response: httpx.Response = await rpc_request(
+            url="/api/v1/user", method="get_profile", params=None,
+            headers={"Authorization": access_token}
+        )
+        user_id = response.json()["result"]["id"]
+        await db_manager.execute(User.update(last_name="Changed").where(User.id == user_id))
+        response = await rpc_request(
+            url="/api/v1/user", method="get_profile", params=None,
+            headers={"Authorization": access_token}
+        )
+        assert response.json()["result"]["last_name"] == "Surname"
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from typing import Callable
+
+import httpx
+import pytest
+from aioredis import Redis
+
+from storage.email_outbox import RedisEmailOutbox
+
+
+class TestRequestResetPasswordLink:
+    @pytest.mark.asyncio
+    async def test_message_enqueued(
+            self,
+            rpc_request: Callable,
+            registered_user: dict,
+            redis: Redis,
+            email_outbox: RedisEmailOutbox
+    ) -> None:
+        response: httpx.Response = await rpc_request(
+            url='/api/v1/user/settings',
+            method='request_reset_password_link',
+            params={'email': 'name.surname@urfu.ru', 'fingerprint': 'fingerprint'}
+        )
+        assert response.json().get('error') is None
+        assert await redis.xlen(email_outbox.stream) == 1
+        entries = await email_outbox.receive('test-consumer', 10, timedelta(milliseconds=1))
+        assert len(entries) == 1
+        _, message = entries[0]
+        assert message.to == 'name.surname@urfu.ru'
+        assert 'password-recovery?token=' in message.html
+        assert message.attempts == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_user(
+            self,
+            rpc_request: Callable,
+            redis: Redis,
+            email_outbox: RedisEmailOutbox
+    ) -> None:
+        response: httpx.Response = await rpc_request(
+            url='/api/v1/user/settings',
+            method='request_reset_password_link',
+            params={'email': 'unknown@urfu.ru', 'fingerprint': 'fingerprint'}
+        )
+        assert response.json()['error'] is not None
+        assert await redis.xlen(email_outbox.stream) == 0
@@ -0,0 +1,93 @@
+import pytest
+
+from common.exceptions.application import RangeNotSatisfiableException
+from common.utils.http_range import ByteRange, etag_matches, if_range_matches, parse_byte_range
+
+ETAG = '"image.png"'
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', ByteRange(0, 99)),
+    (' bytes=10-10 ', ByteRange(10, 10)),
+    ('bytes=100-', ByteRange(100, None)),
+    ('bytes=-20', ByteRange(None, 20)),
+])
+def test_parse_single_range(header: str, expected: ByteRange) -> None:
+    assert parse_byte_range(header) == expected
+
+
+@pytest.mark.parametrize('header', [
+    None,
+    '',
+    'bytes=0-1,5-6',
+    'bytes=0-1, -5',
+    'bytes=-',
+    'bytes=10-5',
+    'items=0-1',
+    'bytes=a-b',
+])
+def test_unsupported_range_serves_whole_file(header) -> None:
+    assert parse_byte_range(header) is None
+
+
+@pytest.mark.parametrize('byte_range, expected', [
+    (ByteRange(0, 9), (0, 9)),
+    (ByteRange(90, 200), (90, 99)),
+    (ByteRange(40, None), (40, 99)),
+    (ByteRange(None, 30), (70, 99)),
+    (ByteRange(None, 500), (0, 99)),
+])
+def test_resolve(byte_range: ByteRange, expected) -> None:
+    assert byte_range.resolve(100) == expected
+
+
+@pytest.mark.parametrize('byte_range, size', [
+    (ByteRange(100, None), 100),
+    (ByteRange(150, 200), 100),
+    (ByteRange(None, 0), 100),
+    (ByteRange(None, 10), 0),
+])
+def test_unsatisfiable_range(byte_range: ByteRange, size: int) -> None:
+    with pytest.raises(RangeNotSatisfiableException) as exc_info:
+        byte_range.resolve(size)
+    assert exc_info.value.size == size
+
+
+def test_to_header_round_trip() -> None:
+    for header in ('bytes=0-99', 'bytes=100-', 'bytes=-20'):
+        assert parse_byte_range(header).to_header() == header
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('', False),
+    (ETAG, True),
+    ('W/"image.png"', True),
+    ('"other.png", "image.png"', True),
+    ('"other.png"', False),
+    ('*', True),
+    ('"image"', False),
+])
+def test_if_none_match(header, expected: bool) -> None:
+    assert etag_matches(header, ETAG) is expected
+    assert etag_matches(header, f'W/{ETAG}') is expected
+
+
+def test_resource_without_etag() -> None:
+    assert etag_matches('*', None)
+    assert not etag_matches(ETAG, None)
+    assert if_range_matches(None, None)
+    assert not if_range_matches(ETAG, None)
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, True),
+    (ETAG, True),
+    (f' {ETAG} ', True),
+    ('W/"image.png"', False),
+    ('*', False),
+    ('"other.png"', False),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', False),
+])
+def test_if_range(header, expected: bool) -> None:
+    assert if_range_matches(header, ETAG) is expected
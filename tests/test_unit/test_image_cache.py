@@ -0,0 +1,120 @@
+import asyncio
+import os
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import pytest
+
+from storage.image_cache import LocalImageCache
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+class ChunksSource:
+    def __init__(self, chunks: List[bytes], etag: Optional[str]):
+        self.chunks = chunks
+        self.etag = etag
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+
+
+def chunks_of(*chunks: bytes, etag: Optional[str] = '"etag"') -> Callable[[], Awaitable]:
+    async def load() -> ChunksSource:
+        return ChunksSource(list(chunks), etag)
+
+    return load
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used_by_size(tmp_path) -> None:
+    cache = LocalImageCache(str(tmp_path), max_bytes=10)
+    await cache.put('a', chunks_of(b'aaaa'))
+    await cache.put('b', chunks_of(b'bb', b'bb'))
+    assert cache.get('a') is not None
+
+    await cache.put('c', chunks_of(b'cccc'))
+
+    assert cache.get('b') is None
+    assert not os.path.exists(cache.path('b'))
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+@pytest.mark.asyncio
+async def test_keeps_last_file_larger_than_limit(tmp_path) -> None:
+    cache = LocalImageCache(str(tmp_path), max_bytes=4)
+    await cache.put('a', chunks_of(b'aa'))
+    await cache.put('b', chunks_of(b'bbbbbb'))
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fills_of_same_key_download_once(tmp_path) -> None:
+    cache = LocalImageCache(str(tmp_path), max_bytes=1024)
+    downloads: List[str] = []
+
+    async def download() -> ChunksSource:
+        downloads.append('image.png')
+        return await chunks_of(b'12', b'34', b'56')()
+
+    paths = await asyncio.gather(*(cache.put('image.png', download) for _ in range(5)))
+
+    assert downloads == ['image.png']
+    assert set(paths) == {cache.path('image.png')}
+    with open(paths[0], 'rb') as file:
+        assert file.read() == b'123456'
+    assert sorted(os.listdir(tmp_path)) == ['.meta', 'image.png']
+    assert os.listdir(tmp_path / '.meta') == ['image.png']
+
+
+@pytest.mark.asyncio
+async def test_failed_fill_leaves_no_entry(tmp_path) -> None:
+    cache = LocalImageCache(str(tmp_path), max_bytes=1024)
+
+    async def missing() -> ChunksSource:
+        raise FileNotFoundError('image.png')
+
+    with pytest.raises(FileNotFoundError):
+        await cache.put('image.png', missing)
+    assert cache.get('image.png') is None
+    assert os.listdir(tmp_path) == ['.meta']
+    assert os.listdir(tmp_path / '.meta') == []
+
+
+@pytest.mark.asyncio
+async def test_media_type_is_detected_by_signature(tmp_path) -> None:
+    cache = LocalImageCache(str(tmp_path), max_bytes=1024)
+    await cache.put('image.jpg', chunks_of(PNG_HEADER[:3], PNG_HEADER[3:] + b'data'))
+    await cache.put('text.png', chunks_of(b'not an image'))
+    assert cache.media_type('image.jpg') == 'image/png'
+    assert cache.media_type('text.png') is None
+
+    restored = LocalImageCache(str(tmp_path), max_bytes=1024)
+    assert restored.get('image.jpg') is not None
+    assert restored.media_type('image.jpg') == 'image/png'
+
+
+@pytest.mark.asyncio
+async def test_etag_is_restored_after_restart(tmp_path) -> None:
+    cache = LocalImageCache(str(tmp_path), max_bytes=1024)
+    await cache.put('a.png', chunks_of(b'aaaa', etag='"etag-a"'))
+    await cache.put('b.png', chunks_of(b'bbbb', etag=None))
+    assert cache.etag('a.png') == '"etag-a"'
+    assert cache.etag('b.png') is None
+    # Файл без ETag, например оставшийся от прошлой версии кэша, не восстанавливается
+    (tmp_path / 'legacy.png').write_bytes(b'legacy')
+    (tmp_path / '.meta' / 'orphan.png').write_text('"orphan"')
+
+    restored = LocalImageCache(str(tmp_path), max_bytes=1024)
+    assert restored.etag('a.png') == '"etag-a"'
+    assert restored.get('b.png') is not None
+    assert restored.etag('b.png') is None
+    assert restored.get('legacy.png') is None
+    assert sorted(os.listdir(tmp_path)) == ['.meta', 'a.png', 'b.png']
+    assert sorted(os.listdir(tmp_path / '.meta')) == ['a.png', 'b.png']
+
+    restored.discard('a.png')
+    assert os.listdir(tmp_path / '.meta') == ['b.png']
@@ -0,0 +1,101 @@
+import io
+
+import pytest
+from PIL import Image
+
+from common.exceptions.application import ImageProcessingException
+from common.image_processor import (
+    WEBP,
+    ImageProcessor,
+    ImageSize,
+    parse_image_size,
+    variant_filename,
+    variant_filenames
+)
+
+
+def encode(image: Image.Image, pil_format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format)
+    return buffer.getvalue()
+
+
+def write(tmp_path, data: bytes) -> str:
+    path = tmp_path / 'source'
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_variant_filename() -> None:
+    assert variant_filename('abc.png', ImageSize.CARD) == 'abc_card.png'
+    assert variant_filename('abc.jpeg', ImageSize.THUMBNAIL, WEBP) == 'abc_thumbnail.webp'
+
+
+def test_variant_filenames() -> None:
+    assert variant_filenames('abc.jpg') == [
+        'abc_thumbnail.jpg', 'abc_thumbnail.webp',
+        'abc_card.jpg', 'abc_card.webp',
+        'abc_full.jpg', 'abc_full.webp',
+    ]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('card', ImageSize.CARD),
+    ('full', ImageSize.FULL),
+    (None, None),
+    ('huge', None),
+    ('CARD', None),
+])
+def test_parse_image_size(value, expected) -> None:
+    assert parse_image_size(value) is expected
+
+
+@pytest.mark.asyncio
+async def test_render_variants_fit_bounds(tmp_path) -> None:
+    path = write(tmp_path, encode(Image.new('RGB', (2000, 1000), 'blue'), 'PNG'))
+    variants = await ImageProcessor().render_variants(path, 'PNG')
+
+    dimensions = {}
+    for size, image_format, content in variants:
+        with Image.open(io.BytesIO(content)) as image:
+            assert image.format == ('WEBP' if image_format == WEBP else 'PNG')
+            dimensions[size, image_format] = image.size
+    assert dimensions == {
+        (ImageSize.THUMBNAIL, None): (160, 80),
+        (ImageSize.THUMBNAIL, WEBP): (160, 80),
+        (ImageSize.CARD, None): (480, 240),
+        (ImageSize.CARD, WEBP): (480, 240),
+        (ImageSize.FULL, None): (1600, 800),
+        (ImageSize.FULL, WEBP): (1600, 800),
+    }
+
+
+@pytest.mark.asyncio
+async def test_small_image_is_not_upscaled(tmp_path) -> None:
+    path = write(tmp_path, encode(Image.new('RGBA', (100, 300), 'red'), 'PNG'))
+    variants = await ImageProcessor().render_variants(path, 'jpeg')
+
+    sizes = {}
+    for size, image_format, content in variants:
+        with Image.open(io.BytesIO(content)) as image:
+            assert image.format == ('WEBP' if image_format == WEBP else 'JPEG')
+            sizes[size] = image.size
+    assert sizes == {
+        ImageSize.THUMBNAIL: (53, 160),
+        ImageSize.CARD: (100, 300),
+        ImageSize.FULL: (100, 300),
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('data, source_format', [
+    (b'\x89PNG\r\n\x1a\n truncated', 'png'),
+    (encode(Image.new('RGB', (1, 1)), 'PNG'), 'gif'),
+])
+async def test_render_variants_rejects_invalid_image(
+        tmp_path,
+        data: bytes,
+        source_format: str
+) -> None:
+    with pytest.raises(ImageProcessingException):
+        await ImageProcessor().render_variants(write(tmp_path, data), source_format)
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import os
+import tempfile
+from typing import AsyncIterable, Dict, List, Optional
+
+import pytest
+from PIL import Image
+from starlette.requests import Request
+
+from common.exceptions.application import ImageProcessingException
+from common.image_processor import ImageProcessor, variant_filenames
+from common.service.image_upload_service import ImageUploadService
+
+BOUNDARY = 'test-boundary'
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 300), 'green').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def upload_request(
+        content: bytes,
+        chunk_size: int = 1024,
+        filename: str = 'photo.png',
+        gate: Optional[asyncio.Event] = None,
+        received: Optional[List[int]] = None
+) -> Request:
+    body = (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="image"; filename="{filename}"\r\n'
+        'Content-Type: image/png\r\n\r\n'
+    ).encode() + content + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive() -> dict:
+        if gate is not None:
+            await gate.wait()
+        chunk = chunks.pop(0)
+        if received is not None:
+            received.append(len(chunk))
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(chunks)}
+
+    headers = [(b'content-type', f'multipart/form-data; boundary={BOUNDARY}'.encode())]
+    return Request({'type': 'http', 'method': 'POST', 'headers': headers}, receive)
+
+
+class InMemoryS3Repository:
+    """Хранилище в памяти без чтения: варианты должны строиться без запроса исходника"""
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+        self.content_types: Dict[str, Optional[str]] = {}
+
+    async def upload_stream(
+            self,
+            original_name: str,
+            chunks: AsyncIterable[bytes],
+            content_type: Optional[str] = None
+    ) -> str:
+        filename = f'stored.{original_name.split(".")[-1]}'
+        self.files[filename] = b''.join([chunk async for chunk in chunks])
+        self.content_types[filename] = content_type
+        return filename
+
+    async def upload_bytes(self, filename: str, data: bytes, content_type: str) -> None:
+        self.files[filename] = data
+        self.content_types[filename] = content_type
+
+    async def delete_files(self, filenames: List[str]) -> None:
+        for filename in filenames:
+            self.files.pop(filename, None)
+
+    async def get_object(self, filename: str, byte_range=None):
+        raise AssertionError(f"Unexpected download of {filename}")
+
+
+@pytest.mark.asyncio
+async def test_variants_are_rendered_from_uploaded_stream() -> None:
+    content = make_png()
+    s3_repository = InMemoryS3Repository()
+    service = ImageUploadService(s3_repository, ImageProcessor(), max_bytes=len(content))
+
+    filename = await service.upload(upload_request(content))
+
+    assert filename == 'stored.png'
+    assert s3_repository.files[filename] == content
+    assert s3_repository.content_types[filename] == 'image/png'
+    assert set(s3_repository.files) == {filename, *variant_filenames(filename)}
+    assert s3_repository.content_types['stored_card.webp'] == 'image/webp'
+
+
+@pytest.mark.asyncio
+async def test_undecodable_image_is_deleted() -> None:
+    content = make_png()[:100]
+    s3_repository = InMemoryS3Repository()
+    service = ImageUploadService(s3_repository, ImageProcessor(), max_bytes=len(content))
+
+    with pytest.raises(ImageProcessingException):
+        await service.upload(upload_request(content, chunk_size=7))
+    assert s3_repository.files == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('original_name', ['photo', 'photo.gif', 'photo.PNG'])
+async def test_variants_do_not_depend_on_extension(original_name: str) -> None:
+    content = make_png()
+    s3_repository = InMemoryS3Repository()
+    service = ImageUploadService(s3_repository, ImageProcessor(), max_bytes=len(content))
+
+    filename = await service.upload(upload_request(content, filename=original_name))
+
+    assert set(s3_repository.files) == {filename, *variant_filenames(filename)}
+    for variant in variant_filenames(filename):
+        expected = 'image/webp' if variant.endswith('.webp') else 'image/png'
+        assert s3_repository.content_types[variant] == expected
+        with Image.open(io.BytesIO(s3_repository.files[variant])) as image:
+            assert image.format == expected.split('/')[1].upper()
+
+
+@pytest.mark.asyncio
+async def test_spooled_upload_is_removed(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    content = make_png()
+    service = ImageUploadService(InMemoryS3Repository(), ImageProcessor(), max_bytes=len(content))
+
+    await service.upload(upload_request(content))
+    with pytest.raises(ImageProcessingException):
+        await service.upload(upload_request(content[:100]))
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_uploads_are_limited() -> None:
+    content = make_png()
+    s3_repository = InMemoryS3Repository()
+    service = ImageUploadService(
+        s3_repository, ImageProcessor(), max_bytes=len(content), max_concurrency=1
+    )
+    gate = asyncio.Event()
+    received: List[int] = []
+    first = asyncio.create_task(service.upload(upload_request(content, gate=gate)))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(service.upload(upload_request(content, received=received)))
+    await asyncio.sleep(0.01)
+    # Вторая загрузка не читает тело запроса, пока не завершится первая
+    assert received == []
+
+    gate.set()
+    assert await asyncio.gather(first, second) == ['stored.png', 'stored.png']
+    assert received
@@ -0,0 +1,121 @@
+from typing import List, Optional
+
+import pytest
+from starlette.requests import Request
+
+from common.exceptions.application import InvalidMultipartException, UploadTooLargeException
+from common.utils.multipart_stream import MultipartFileStream
+
+BOUNDARY = 'test-boundary'
+CONTENT = bytes(range(256)) * 8
+
+
+def multipart_body(*parts: bytes, boundary: str = BOUNDARY) -> bytes:
+    body = b''.join(b'--' + boundary.encode() + b'\r\n' + part + b'\r\n' for part in parts)
+    return body + b'--' + boundary.encode() + b'--\r\n'
+
+
+def file_part(name: str, filename: str, content: bytes) -> bytes:
+    return (
+        f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+        'Content-Type: image/png\r\n\r\n'
+    ).encode() + content
+
+
+def field_part(name: str, value: str) -> bytes:
+    return f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}'.encode()
+
+
+def make_request(
+        body: bytes,
+        chunk_size: int,
+        content_type: Optional[str] = f'multipart/form-data; boundary={BOUNDARY}'
+) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b'']
+
+    async def receive() -> dict:
+        chunk = chunks.pop(0)
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(chunks)}
+
+    headers = [(b'content-type', content_type.encode())] if content_type else []
+    return Request({'type': 'http', 'method': 'POST', 'headers': headers}, receive)
+
+
+async def read_all(stream: MultipartFileStream) -> bytes:
+    chunks: List[bytes] = [chunk async for chunk in stream]
+    return b''.join(chunks)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 100000])
+async def test_file_split_across_chunks(chunk_size: int) -> None:
+    body = multipart_body(
+        field_part('comment', 'before'),
+        file_part('image', 'photo.png', CONTENT),
+        field_part('comment', 'after'),
+    )
+    stream = MultipartFileStream(make_request(body, chunk_size), 'image', len(CONTENT))
+    await stream.open()
+    assert stream.filename == 'photo.png'
+    assert stream.content_type == 'image/png'
+    assert await stream.peek(10) == CONTENT[:10]
+    assert await stream.peek(300) == CONTENT[:300]
+    assert await read_all(stream) == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_missing_file_part() -> None:
+    body = multipart_body(field_part('comment', 'text'), file_part('other', 'a.png', CONTENT))
+    stream = MultipartFileStream(make_request(body, 16), 'image', len(CONTENT))
+    with pytest.raises(InvalidMultipartException):
+        await stream.open()
+
+
+@pytest.mark.asyncio
+async def test_field_without_filename() -> None:
+    body = multipart_body(field_part('image', 'text'))
+    stream = MultipartFileStream(make_request(body, 16), 'image', len(CONTENT))
+    with pytest.raises(InvalidMultipartException):
+        await stream.open()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('chunk_size', [1, 1000, 100000])
+async def test_body_larger_than_limit(chunk_size: int) -> None:
+    body = multipart_body(file_part('image', 'photo.png', CONTENT))
+    stream = MultipartFileStream(make_request(body, chunk_size), 'image', len(CONTENT) - 1)
+    await stream.open()
+    with pytest.raises(UploadTooLargeException) as exc_info:
+        await read_all(stream)
+    assert exc_info.value.max_bytes == len(CONTENT) - 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('content_type', [
+    None,
+    'application/json',
+    'multipart/form-data',
+    'multipart/form-data; boundary=',
+])
+async def test_invalid_content_type(content_type: Optional[str]) -> None:
+    body = multipart_body(file_part('image', 'photo.png', CONTENT))
+    stream = MultipartFileStream(make_request(body, 64, content_type), 'image', len(CONTENT))
+    with pytest.raises(InvalidMultipartException):
+        await stream.open()
+
+
+@pytest.mark.asyncio
+async def test_body_with_other_boundary() -> None:
+    body = multipart_body(file_part('image', 'photo.png', CONTENT), boundary='other-boundary')
+    stream = MultipartFileStream(make_request(body, 64), 'image', len(CONTENT))
+    with pytest.raises(InvalidMultipartException):
+        await stream.open()
+
+
+@pytest.mark.asyncio
+async def test_truncated_body() -> None:
+    body = multipart_body(file_part('image', 'photo.png', CONTENT))
+    stream = MultipartFileStream(make_request(body[:len(body) // 2], 64), 'image', len(CONTENT))
+    await stream.open()
+    with pytest.raises(InvalidMultipartException):
+        await read_all(stream)
@@ -0,0 +1,125 @@
+from typing import AsyncIterator, List, Optional, Tuple
+
+import pytest
+
+from infrastructure.config import ObjectStorageSettings
+from storage.s3_repository import MULTIPART_PART_SIZE, S3Repository
+
+SETTINGS = ObjectStorageSettings(
+    AWS_ACCESS_KEY_ID='key',
+    AWS_SECRET_ACCESS_KEY='secret',
+    REGION_NAME='region',
+    BUCKET_NAME='bucket',
+    S3_ENDPOINT_URL='http://localhost',
+)
+
+
+class RecordingClient:
+    """Клиент S3, запоминающий вызовы. Загрузка части с номером fail_part завершается ошибкой"""
+
+    def __init__(self, fail_part: Optional[int] = None):
+        self.fail_part = fail_part
+        self.calls: List[Tuple[str, dict]] = []
+
+    async def create_multipart_upload(self, **params) -> dict:
+        self.calls.append(('create_multipart_upload', params))
+        return {'UploadId': 'upload-id'}
+
+    async def upload_part(self, **params) -> dict:
+        self.calls.append(('upload_part', params))
+        if params['PartNumber'] == self.fail_part:
+            raise ConnectionError('part upload failed')
+        return {'ETag': f'"etag-{params["PartNumber"]}"'}
+
+    async def complete_multipart_upload(self, **params) -> None:
+        self.calls.append(('complete_multipart_upload', params))
+
+    async def abort_multipart_upload(self, **params) -> None:
+        self.calls.append(('abort_multipart_upload', params))
+
+    async def put_object(self, **params) -> None:
+        self.calls.append(('put_object', params))
+
+    @property
+    def methods(self) -> List[str]:
+        return [method for method, _ in self.calls]
+
+
+class RecordingS3Repository(S3Repository):
+    def __init__(self, client: RecordingClient):
+        super().__init__(SETTINGS)
+        self.recording_client = client
+
+    @property
+    def client(self) -> RecordingClient:
+        return self.recording_client
+
+
+async def chunks_of(*chunks: bytes, error: Optional[Exception] = None) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+    if error is not None:
+        raise error
+
+
+PART = b'x' * MULTIPART_PART_SIZE
+
+
+@pytest.mark.asyncio
+async def test_small_stream_is_put_at_once() -> None:
+    client = RecordingClient()
+    filename = await RecordingS3Repository(client).upload_stream(
+        'photo.png', chunks_of(b'ab', b'cd'), 'image/png'
+    )
+    assert filename.endswith('.png')
+    assert client.methods == ['put_object']
+    assert client.calls[0][1] == {
+        'Bucket': 'bucket', 'Key': filename, 'Body': b'abcd', 'ContentType': 'image/png'
+    }
+
+
+@pytest.mark.asyncio
+async def test_large_stream_is_uploaded_in_parts() -> None:
+    client = RecordingClient()
+    filename = await RecordingS3Repository(client).upload_stream(
+        'photo.png', chunks_of(PART[:100], PART[100:], b'tail'), 'image/png'
+    )
+    assert client.methods == [
+        'create_multipart_upload', 'upload_part', 'upload_part', 'complete_multipart_upload'
+    ]
+    assert [len(params['Body']) for _, params in client.calls[1:3]] == [len(PART), 4]
+    assert client.calls[-1][1]['MultipartUpload'] == {'Parts': [
+        {'ETag': '"etag-1"', 'PartNumber': 1}, {'ETag': '"etag-2"', 'PartNumber': 2}
+    ]}
+    assert client.calls[-1][1]['Key'] == filename
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_is_aborted_when_stream_fails() -> None:
+    client = RecordingClient()
+    with pytest.raises(ValueError):
+        await RecordingS3Repository(client).upload_stream(
+            'photo.png', chunks_of(PART, b'tail', error=ValueError('client disconnected'))
+        )
+    assert client.methods == ['create_multipart_upload', 'upload_part', 'abort_multipart_upload']
+    assert client.calls[-1][1]['UploadId'] == 'upload-id'
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_is_aborted_when_part_fails() -> None:
+    client = RecordingClient(fail_part=2)
+    with pytest.raises(ConnectionError):
+        await RecordingS3Repository(client).upload_stream('photo.png', chunks_of(PART, PART))
+    assert client.methods == [
+        'create_multipart_upload', 'upload_part', 'upload_part', 'abort_multipart_upload'
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_small_stream_uploads_nothing() -> None:
+    client = RecordingClient()
+    with pytest.raises(ValueError):
+        await RecordingS3Repository(client).upload_stream(
+            'photo.png', chunks_of(b'ab', error=ValueError('client disconnected'))
+        )
+    assert client.calls == []
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from storage.reservation.seat_occupancy_index import SeatIntervals
+
+DAY = datetime(2024, 5, 20)
+
+
+def hours(start: int, end: int):
+    return DAY + timedelta(hours=start), DAY + timedelta(hours=end)
+
+
+def test_load_matches_incremental_add() -> None:
+    intervals = [(1, *hours(14, 15)), (2, *hours(9, 13)), (3, *hours(10, 11))]
+    loaded, added = SeatIntervals(), SeatIntervals()
+    loaded.load(intervals)
+    for interval in intervals:
+        added.add(*interval)
+    assert loaded.starts == added.starts
+    assert loaded.reach == added.reach
+    assert loaded.reservation_ids == [2, 3, 1]
+
+
+def test_is_free_uses_reach_of_nested_intervals() -> None:
+    intervals = SeatIntervals()
+    intervals.load([(1, *hours(9, 13)), (2, *hours(10, 11))])
+    assert not intervals.is_free(*hours(12, 14))
+    assert intervals.is_free(*hours(13, 14))
+
+    intervals.discard(1)
+    assert intervals.is_free(*hours(12, 14))
+    assert not intervals.is_free(*hours(10, 12))
@@ -0,0 +1,93 @@
+import smtplib
+from typing import List
+
+import pytest
+
+from common.dto.email import EmailMessageDTO
+from common.service.smtp_email_sender import SMTPEmailSender
+from infrastructure.config import SMTPSettings
+
+SETTINGS = SMTPSettings(
+    SMTP_EMAIL='sender@urfu.me', SMTP_PASSWORD='password', SMTP_SERVER='localhost', SMTP_PORT=465
+)
+MESSAGE = EmailMessageDTO(to='name.surname@urfu.me', subject='Subject', html='<p>Text</p>')
+
+
+class RecordingSMTP:
+    """Соединение SMTP, ошибки которого задаются заранее для каждого нового соединения"""
+    connections: List['RecordingSMTP'] = []
+    send_errors: List[Exception] = []
+    login_errors: List[Exception] = []
+
+    def __init__(self, host: str, port: int):
+        self.closed = False
+        self.sent = 0
+        self.send_error = self.send_errors.pop(0) if self.send_errors else None
+        self.login_error = self.login_errors.pop(0) if self.login_errors else None
+        self.connections.append(self)
+
+    def login(self, user: str, password: str) -> None:
+        if self.login_error is not None:
+            raise self.login_error
+
+    def send_message(self, message) -> None:
+        if self.send_error is not None:
+            raise self.send_error
+        self.sent += 1
+
+    def quit(self) -> None:
+        self.closed = True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def smtp(monkeypatch):
+    RecordingSMTP.connections, RecordingSMTP.send_errors, RecordingSMTP.login_errors = [], [], []
+    monkeypatch.setattr(smtplib, 'SMTP_SSL', RecordingSMTP)
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused() -> None:
+    sender = SMTPEmailSender(SETTINGS)
+    await sender.send(MESSAGE)
+    await sender.send(MESSAGE)
+    [connection] = RecordingSMTP.connections
+    assert connection.sent == 2 and not connection.closed
+    await sender.close()
+    assert connection.closed
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_server_disconnect() -> None:
+    RecordingSMTP.send_errors = [smtplib.SMTPServerDisconnected()]
+    sender = SMTPEmailSender(SETTINGS)
+    await sender.send(MESSAGE)
+    stale, fresh = RecordingSMTP.connections
+    assert stale.closed
+    assert fresh.sent == 1 and not fresh.closed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('error', [smtplib.SMTPDataError(554, b'rejected'), OSError('reset')])
+async def test_failed_reconnect_closes_new_connection(error: Exception) -> None:
+    RecordingSMTP.send_errors = [smtplib.SMTPServerDisconnected(), error]
+    sender = SMTPEmailSender(SETTINGS)
+    with pytest.raises(type(error)):
+        await sender.send(MESSAGE)
+    assert all(connection.closed for connection in RecordingSMTP.connections)
+    assert len(RecordingSMTP.connections) == 2
+
+    await sender.send(MESSAGE)
+    assert RecordingSMTP.connections[-1].sent == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_login_closes_connection() -> None:
+    RecordingSMTP.login_errors = [smtplib.SMTPAuthenticationError(535, b'invalid')]
+    sender = SMTPEmailSender(SETTINGS)
+    with pytest.raises(smtplib.SMTPAuthenticationError):
+        await sender.send(MESSAGE)
+    [connection] = RecordingSMTP.connections
+    assert connection.closed